@@ -5,11 +5,16 @@ Provides enhanced search capabilities with multi-city, flexible dates, and advan
 
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any, Literal
+from typing import List, Optional, Dict, Any, Literal, Callable
 from datetime import datetime, timedelta
 from enum import Enum
+import json
 import logging
 
+from search_pipeline import Facet, SearchPipeline
+from search_sessions import SearchSession, SearchView, search_sessions
+from fx_rate_service import fx_rates
+
 logger = logging.getLogger(__name__)
 
 # Create router
@@ -43,14 +48,17 @@ class ActivitySortBy(str, Enum):
     DURATION = "duration"
     POPULARITY = "popularity"
 
+def _validate_currency(v: str) -> str:
+    if not fx_rates.supports(v):
+        raise ValueError(f'Unsupported currency: {v}')
+    return v.upper()
+
 class PriceRange(BaseModel):
     min: Optional[float] = Field(None, ge=0, description="Minimum price")
     max: Optional[float] = Field(None, ge=0, description="Maximum price")
     currency: str = Field("USD", description="Currency code")
-
-# ============================================================================
-# ADVANCED SEARCH REQUEST MODELS
-# ============================================================================
+    
+    _currency = validator('currency', allow_reuse=True)(_validate_currency)
 
 class FlexibleDateRange(BaseModel):
     """Flexible date search (±days from target date)"""
@@ -81,6 +89,9 @@ class AdvancedHotelSearchRequest(BaseModel):
     neighborhood: Optional[str] = Field(None, description="Specific neighborhood filter")
     distance_from_center: Optional[float] = Field(None, description="Max km from city center")
     
+    # Display currency
+    currency: str = Field("USD", description="Currency for result prices and price filters")
+    
     # Sort & pagination
     sort_by: HotelSortBy = Field(HotelSortBy.PRICE, description="Sort criterion")
     sort_order: SortOrder = Field(SortOrder.ASC, description="Sort direction")
@@ -93,6 +104,10 @@ class AdvancedHotelSearchRequest(BaseModel):
     
     # Cache control
     use_cache: bool = Field(True, description="Use cached results if available")
+    search_id: Optional[str] = Field(None, description="Search session to page/re-sort/re-filter")
+    refresh: bool = Field(False, description="Re-query providers instead of using the session snapshot")
+    
+    _currency = validator('currency', allow_reuse=True)(_validate_currency)
     
     @validator('checkin', 'checkout')
     def validate_dates(cls, v):
@@ -128,6 +143,9 @@ class AdvancedFlightSearchRequest(BaseModel):
     max_duration_hours: Optional[float] = Field(None, ge=0, description="Maximum flight duration")
     departure_time_range: Optional[Dict[str, str]] = Field(None, description="{'min': 'HH:MM', 'max': 'HH:MM'}")
     
+    # Display currency
+    currency: str = Field("USD", description="Currency for result prices and price filters")
+    
     # Sort & pagination
     sort_by: FlightSortBy = Field(FlightSortBy.PRICE, description="Sort criterion")
     sort_order: SortOrder = Field(SortOrder.ASC, description="Sort direction")
@@ -140,6 +158,10 @@ class AdvancedFlightSearchRequest(BaseModel):
     
     # Cache control
     use_cache: bool = Field(True)
+    search_id: Optional[str] = Field(None, description="Search session to page/re-sort/re-filter")
+    refresh: bool = Field(False, description="Re-query providers instead of using the session snapshot")
+    
+    _currency = validator('currency', allow_reuse=True)(_validate_currency)
     
     @validator('multi_city_legs')
     def validate_multi_city(cls, v, values):
@@ -165,6 +187,9 @@ class AdvancedActivitySearchRequest(BaseModel):
     languages: Optional[List[str]] = Field(None, description="Preferred tour languages")
     accessibility: Optional[bool] = Field(None, description="Wheelchair accessible")
     
+    # Display currency
+    currency: str = Field("USD", description="Currency for result prices and price filters")
+    
     # Sort & pagination
     sort_by: ActivitySortBy = Field(ActivitySortBy.POPULARITY)
     sort_order: SortOrder = Field(SortOrder.DESC)
@@ -173,6 +198,10 @@ class AdvancedActivitySearchRequest(BaseModel):
     
     # Cache control
     use_cache: bool = Field(True)
+    search_id: Optional[str] = Field(None, description="Search session to page/re-sort/re-filter")
+    refresh: bool = Field(False, description="Re-query providers instead of using the session snapshot")
+    
+    _currency = validator('currency', allow_reuse=True)(_validate_currency)
 
 # ============================================================================
 # RESPONSE MODELS
@@ -244,6 +273,348 @@ class ActivityResult(BaseModel):
     accessibility: bool
     provider: str
 
+# ============================================================================
+# COMPACT RESULT RECORDS
+# ============================================================================
+
+class _CompactResult:
+    """
+    Slot-based result row used inside the filter/sort/paginate pipeline.
+
+    Building and validating a Pydantic model per candidate dominates search
+    latency once providers return hundreds or thousands of offers, so rows
+    stay as plain slotted records until the requested page is known. Only
+    that page is converted with to_model().
+    """
+    __slots__ = ()
+    model = None
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def to_model(self):
+        """Validate this row into its response model"""
+        return self.model(**{name: getattr(self, name) for name in self.__slots__})
+
+class HotelRecord(_CompactResult):
+    __slots__ = (
+        "hotel_id", "name", "star_rating", "guest_rating", "review_count",
+        "price_per_night", "total_price", "currency", "location", "amenities",
+        "property_type", "images", "distance_from_center_km",
+        "cancellation_policy", "provider", "availability"
+    )
+    model = HotelResult
+
+class FlightRecord(_CompactResult):
+    __slots__ = (
+        "flight_id", "airline", "flight_number", "origin", "destination",
+        "departure_time", "arrival_time", "duration_minutes", "stops",
+        "stop_cities", "cabin_class", "price", "currency", "seats_available",
+        "baggage_allowance", "provider"
+    )
+    model = FlightResult
+
+class ActivityRecord(_CompactResult):
+    __slots__ = (
+        "activity_id", "title", "description", "category", "activity_type",
+        "duration_hours", "price", "currency", "rating", "review_count",
+        "location", "images", "languages", "accessibility", "provider"
+    )
+    model = ActivityResult
+
+def _to_models(records: List[_CompactResult]) -> list:
+    """Convert the returned page of records into response models"""
+    return [record.to_model() for record in records]
+
+HOTEL_PRICE_FIELDS = ("price_per_night", "total_price")
+FLIGHT_PRICE_FIELDS = ("price",)
+ACTIVITY_PRICE_FIELDS = ("price",)
+
+def _convert_records(records: List[_CompactResult], price_fields: tuple, currency: str) -> List[_CompactResult]:
+    """Convert candidate prices into the requested currency in one vectorized step"""
+    if not records or all(record.currency == currency for record in records):
+        return records
+    
+    converted = fx_rates.convert_many(
+        [[getattr(record, field) for field in price_fields] for record in records],
+        [record.currency for record in records],
+        currency
+    )
+    for record, prices in zip(records, converted.tolist()):
+        for field, price in zip(price_fields, prices):
+            setattr(record, field, round(price, 2))
+        record.currency = currency
+    return records
+
+# ============================================================================
+# MOCK RESULT GENERATION
+# ============================================================================
+
+def generate_mock_hotels(destination: str, count: int = 20) -> List[HotelRecord]:
+    """Mock hotel candidates until real provider APIs are integrated"""
+    return [
+        HotelRecord(
+            hotel_id=f"hotel_{i}",
+            name=f"Hotel {i} - {destination}",
+            star_rating=float(4 + (i % 2)),
+            guest_rating=8.5 + (i * 0.1),
+            review_count=500 + (i * 50),
+            price_per_night=100.0 + (i * 20),
+            total_price=300.0 + (i * 60),
+            currency="USD",
+            location={
+                "address": f"123 Main St, {destination}",
+                "latitude": 40.7128 + (i * 0.01),
+                "longitude": -74.0060 + (i * 0.01)
+            },
+            amenities=["wifi", "pool", "gym", "restaurant"] if i % 2 == 0 else ["wifi", "breakfast"],
+            property_type="hotel" if i % 3 == 0 else "resort",
+            images=[f"https://example.com/hotel{i}.jpg"],
+            distance_from_center_km=1.5 + (i * 0.5),
+            cancellation_policy="Free cancellation until 24 hours before check-in",
+            provider="Expedia",
+            availability=True
+        )
+        for i in range(1, count + 1)
+    ]
+
+def generate_mock_flights(request: "AdvancedFlightSearchRequest", count: int = 15) -> List[FlightRecord]:
+    """Mock flight candidates until real provider APIs are integrated"""
+    return [
+        FlightRecord(
+            flight_id=f"flight_{i}",
+            airline=["United", "Delta", "American", "Emirates", "Lufthansa"][i % 5],
+            flight_number=f"UA{1000 + i}",
+            origin=request.origin or request.multi_city_legs[0].origin if request.multi_city_legs else "NYC",
+            destination=request.destination or request.multi_city_legs[0].destination if request.multi_city_legs else "LON",
+            departure_time=f"2025-06-{10 + (i % 20):02d}T{8 + (i % 12):02d}:00:00",
+            arrival_time=f"2025-06-{10 + (i % 20):02d}T{20 + (i % 4):02d}:00:00",
+            duration_minutes=360 + (i * 30),
+            stops=i % 3,
+            stop_cities=["ATL"] if i % 3 == 1 else [] if i % 3 == 0 else ["ATL", "FRA"],
+            cabin_class=request.cabin_class,
+            price=500.0 + (i * 50),
+            currency="USD",
+            seats_available=20 + i,
+            baggage_allowance={"checked": "2 bags", "carry_on": "1 bag"},
+            provider="Expedia"
+        )
+        for i in range(1, count + 1)
+    ]
+
+def generate_mock_activities(destination: str, count: int = 15) -> List[ActivityRecord]:
+    """Mock activity candidates until real provider APIs are integrated"""
+    return [
+        ActivityRecord(
+            activity_id=f"activity_{i}",
+            title=f"Amazing {destination} Tour {i}",
+            description=f"Experience the best of {destination} with this curated tour",
+            category=["tours", "activities", "attractions"][i % 3],
+            activity_type=["cultural", "adventure", "food", "nature"][i % 4],
+            duration_hours=2.0 + (i * 0.5),
+            price=50.0 + (i * 15),
+            currency="USD",
+            rating=4.0 + (i * 0.1),
+            review_count=100 + (i * 20),
+            location={
+                "address": f"{destination} Center",
+                "latitude": 40.7128,
+                "longitude": -74.0060
+            },
+            images=[f"https://example.com/activity{i}.jpg"],
+            languages=["English", "Spanish"] if i % 2 == 0 else ["English"],
+            accessibility=i % 3 == 0,
+            provider="Viator"
+        )
+        for i in range(1, count + 1)
+    ]
+
+# ============================================================================
+# SEARCH PIPELINES
+# ============================================================================
+
+HOTEL_SORT_FIELDS = {
+    HotelSortBy.PRICE: "price_per_night",
+    HotelSortBy.RATING: "guest_rating",
+    HotelSortBy.DISTANCE: "distance_from_center_km",
+    HotelSortBy.POPULARITY: "review_count",
+    HotelSortBy.REVIEW_COUNT: "review_count"
+}
+
+FLIGHT_SORT_FIELDS = {
+    FlightSortBy.PRICE: "price",
+    FlightSortBy.DURATION: "duration_minutes",
+    FlightSortBy.STOPS: "stops",
+    FlightSortBy.AIRLINE: "airline",
+    FlightSortBy.DEPARTURE_TIME: "departure_time"
+}
+
+ACTIVITY_SORT_FIELDS = {
+    ActivitySortBy.PRICE: "price",
+    ActivitySortBy.RATING: "rating",
+    ActivitySortBy.DURATION: "duration_hours",
+    ActivitySortBy.POPULARITY: "review_count"
+}
+
+HOTEL_PRICE_BUCKETS = [100, 200, 300, 500]
+
+HOTEL_FACETS = (
+    Facet.multi_field("amenities", "amenities", filters=["amenities"]),
+    Facet.field("star_rating", "star_rating", filters=["star_rating"]),
+    Facet.field("property_type", "property_type"),
+    Facet.buckets("price", "price_per_night", HOTEL_PRICE_BUCKETS, filters=["price_min", "price_max"])
+)
+
+def _price_predicates(price_range: Optional[PriceRange], field: str, currency: str) -> Dict[str, Any]:
+    """Min/max price predicates on the given record field, bounds converted to the result currency"""
+    predicates = {}
+    if price_range:
+        if price_range.min:
+            min_price = fx_rates.convert(price_range.min, price_range.currency, currency)
+            predicates["price_min"] = lambda r: getattr(r, field) >= min_price
+        if price_range.max:
+            max_price = fx_rates.convert(price_range.max, price_range.currency, currency)
+            predicates["price_max"] = lambda r: getattr(r, field) <= max_price
+    return predicates
+
+def build_hotel_pipeline(request: AdvancedHotelSearchRequest) -> SearchPipeline:
+    """Compile hotel filters and sort into a single-pass pipeline"""
+    predicates = _price_predicates(request.price_range, "price_per_night", request.currency)
+    
+    if request.star_rating:
+        star_ratings = frozenset(request.star_rating)
+        predicates["star_rating"] = lambda r: r.star_rating in star_ratings
+    
+    if request.guest_rating:
+        min_guest_rating = request.guest_rating
+        predicates["guest_rating"] = lambda r: r.guest_rating >= min_guest_rating
+    
+    if request.amenities:
+        required_amenities = frozenset(request.amenities)
+        predicates["amenities"] = lambda r: required_amenities.issubset(r.amenities)
+    
+    return SearchPipeline(
+        predicates,
+        sort_field=HOTEL_SORT_FIELDS[request.sort_by],
+        descending=(request.sort_order == SortOrder.DESC),
+        facets=HOTEL_FACETS
+    )
+
+def build_flight_pipeline(request: AdvancedFlightSearchRequest) -> SearchPipeline:
+    """Compile flight filters and sort into a single-pass pipeline"""
+    predicates = {}
+    
+    if request.max_stops is not None:
+        max_stops = request.max_stops
+        predicates["max_stops"] = lambda f: f.stops <= max_stops
+    
+    if request.preferred_airlines:
+        preferred_airlines = frozenset(request.preferred_airlines)
+        predicates["preferred_airlines"] = lambda f: f.airline in preferred_airlines
+    
+    predicates.update(_price_predicates(request.price_range, "price", request.currency))
+    
+    return SearchPipeline(
+        predicates,
+        sort_field=FLIGHT_SORT_FIELDS[request.sort_by],
+        descending=(request.sort_order == SortOrder.DESC)
+    )
+
+def build_activity_pipeline(request: AdvancedActivitySearchRequest) -> SearchPipeline:
+    """Compile activity filters and sort into a single-pass pipeline"""
+    predicates = {}
+    
+    if request.categories:
+        categories = frozenset(request.categories)
+        predicates["categories"] = lambda a: a.category in categories
+    
+    if request.activity_types:
+        activity_types = frozenset(request.activity_types)
+        predicates["activity_types"] = lambda a: a.activity_type in activity_types
+    
+    if request.min_rating:
+        min_rating = request.min_rating
+        predicates["min_rating"] = lambda a: a.rating >= min_rating
+    
+    predicates.update(_price_predicates(request.price_range, "price", request.currency))
+    
+    if request.accessibility is not None:
+        accessibility = request.accessibility
+        predicates["accessibility"] = lambda a: a.accessibility == accessibility
+    
+    return SearchPipeline(
+        predicates,
+        sort_field=ACTIVITY_SORT_FIELDS[request.sort_by],
+        descending=(request.sort_order == SortOrder.DESC)
+    )
+
+# ============================================================================
+# SEARCH SESSIONS
+# ============================================================================
+
+# Request fields that determine the provider fan-out. A session snapshot is
+# only reused when these match; everything else (filters, sort, paging) runs
+# against the snapshot.
+HOTEL_QUERY_FIELDS = {"destination", "checkin", "checkout", "guests", "rooms",
+                      "flexible_dates", "date_flexibility_days", "currency"}
+FLIGHT_QUERY_FIELDS = {"search_type", "origin", "destination", "departure_date", "return_date",
+                       "multi_city_legs", "passengers", "cabin_class",
+                       "flexible_dates", "date_flexibility_days", "currency"}
+ACTIVITY_QUERY_FIELDS = {"destination", "start_date", "end_date", "participants", "currency"}
+
+# Fields that never affect which records match
+NON_FILTER_FIELDS = {"sort_by", "sort_order", "page", "per_page", "use_cache", "search_id", "refresh"}
+
+def _request_key(request: BaseModel, include: set = None, exclude: set = None) -> str:
+    """Stable fingerprint of a subset of request fields"""
+    params = request.dict(include=include, exclude=exclude)
+    return json.dumps(params, sort_keys=True, default=str)
+
+def _run_search(kind: str, request: BaseModel, query_fields: set,
+                fetch_candidates: Callable[[], list], pipeline: SearchPipeline) -> Dict[str, Any]:
+    """
+    Resolve the request's search session and page through it
+
+    Reuses the snapshot named by request.search_id when it is live and was
+    built for the same query, otherwise fetches candidates and opens a new
+    session. Filter results and facets are kept per filter set on the
+    session, so paging and re-sorting never rescan or re-query.
+    """
+    query_key = _request_key(request, include=query_fields)
+    
+    session = None
+    if request.search_id and request.use_cache and not request.refresh:
+        session = search_sessions.get(request.search_id, kind, query_key)
+    from_cache = session is not None
+    
+    if session is None:
+        if request.search_id:
+            search_sessions.discard(request.search_id)
+        session = search_sessions.create(kind, query_key, fetch_candidates())
+    
+    view_key = _request_key(request, exclude=query_fields | NON_FILTER_FIELDS)
+    view = session.get_view(view_key)
+    if view is None:
+        matches, facets = pipeline.scan(session.records)
+        view = session.add_view(view_key, SearchView(matches, facets))
+        search_sessions.enforce_limits()
+    
+    return {
+        "session": session,
+        "records": view.page(pipeline, request.page, request.per_page),
+        "total_results": view.total_results,
+        "facets": view.facets,
+        "from_cache": from_cache
+    }
+
+def _session_info(session: SearchSession) -> Dict[str, Any]:
+    return {
+        "search_id": session.search_id,
+        "expires_at": datetime.utcfromtimestamp(session.expires_at).isoformat(),
+        "candidate_count": len(session.records)
+    }
+
 # ============================================================================
 # SEARCH ENDPOINTS
 # ============================================================================
@@ -259,7 +630,9 @@ async def advanced_hotel_search(request: AdvancedHotelSearchRequest):
     - Distance from center filtering
     - Multiple sort options
     - Pagination support
-    - Result caching
+    - Facet counts (amenity, star rating, property type, price bucket)
+    - Search sessions: pass the returned search_id to page, re-sort or
+      re-filter without re-querying providers (refresh=true to re-query)
     """
     try:
         start_time = datetime.now()
@@ -267,80 +640,28 @@ async def advanced_hotel_search(request: AdvancedHotelSearchRequest):
         # TODO: Integrate with real provider APIs (Expedia, Amadeus, etc.)
         # For now, return enhanced mock data
         
-        # Simulate filtering and sorting
-        mock_results = [
-            HotelResult(
-                hotel_id=f"hotel_{i}",
-                name=f"Hotel {i} - {request.destination}",
-                star_rating=float(4 + (i % 2)),
-                guest_rating=8.5 + (i * 0.1),
-                review_count=500 + (i * 50),
-                price_per_night=100.0 + (i * 20),
-                total_price=300.0 + (i * 60),
-                currency="USD",
-                location={
-                    "address": f"123 Main St, {request.destination}",
-                    "latitude": 40.7128 + (i * 0.01),
-                    "longitude": -74.0060 + (i * 0.01)
-                },
-                amenities=["wifi", "pool", "gym", "restaurant"] if i % 2 == 0 else ["wifi", "breakfast"],
-                property_type="hotel" if i % 3 == 0 else "resort",
-                images=[f"https://example.com/hotel{i}.jpg"],
-                distance_from_center_km=1.5 + (i * 0.5),
-                cancellation_policy="Free cancellation until 24 hours before check-in",
-                provider="Expedia",
-                availability=True
-            )
-            for i in range(1, 21)  # Generate 20 results
-        ]
-        
-        # Apply filters
-        filtered_results = mock_results
-        
-        if request.price_range:
-            if request.price_range.min:
-                filtered_results = [r for r in filtered_results if r.price_per_night >= request.price_range.min]
-            if request.price_range.max:
-                filtered_results = [r for r in filtered_results if r.price_per_night <= request.price_range.max]
-        
-        if request.star_rating:
-            filtered_results = [r for r in filtered_results if r.star_rating in request.star_rating]
-        
-        if request.guest_rating:
-            filtered_results = [r for r in filtered_results if r.guest_rating >= request.guest_rating]
-        
-        if request.amenities:
-            filtered_results = [r for r in filtered_results if all(a in r.amenities for a in request.amenities)]
-        
-        # Sort results
-        sort_key_map = {
-            HotelSortBy.PRICE: lambda x: x.price_per_night,
-            HotelSortBy.RATING: lambda x: x.guest_rating,
-            HotelSortBy.DISTANCE: lambda x: x.distance_from_center_km,
-            HotelSortBy.POPULARITY: lambda x: x.review_count,
-            HotelSortBy.REVIEW_COUNT: lambda x: x.review_count
-        }
-        
-        filtered_results.sort(
-            key=sort_key_map[request.sort_by],
-            reverse=(request.sort_order == SortOrder.DESC)
+        # Resolve the search session (provider results are fetched only on a miss),
+        # then filter, count facets, rank and paginate against its snapshot
+        pipeline = build_hotel_pipeline(request)
+        search = _run_search(
+            "hotels", request, HOTEL_QUERY_FIELDS,
+            lambda: _convert_records(
+                generate_mock_hotels(request.destination), HOTEL_PRICE_FIELDS, request.currency
+            ),
+            pipeline
         )
-        
-        # Pagination
-        start_idx = (request.page - 1) * request.per_page
-        end_idx = start_idx + request.per_page
-        paginated_results = filtered_results[start_idx:end_idx]
+        paginated_results = _to_models(search["records"])
         
         # Calculate metadata
         search_duration = (datetime.now() - start_time).total_seconds() * 1000
         
         metadata = SearchMetadata(
-            total_results=len(filtered_results),
+            total_results=search["total_results"],
             page=request.page,
             per_page=request.per_page,
-            total_pages=(len(filtered_results) + request.per_page - 1) // request.per_page,
+            total_pages=(search["total_results"] + request.per_page - 1) // request.per_page,
             search_duration_ms=search_duration,
-            from_cache=False,
+            from_cache=search["from_cache"],
             filters_applied={
                 "price_range": request.price_range.dict() if request.price_range else None,
                 "star_rating": request.star_rating,
@@ -355,6 +676,8 @@ async def advanced_hotel_search(request: AdvancedHotelSearchRequest):
             "success": True,
             "results": paginated_results,
             "metadata": metadata,
+            "facets": search["facets"],
+            "session": _session_info(search["session"]),
             "flexible_dates_available": request.flexible_dates
         }
         
@@ -385,74 +708,26 @@ async def advanced_flight_search(request: AdvancedFlightSearchRequest):
         if request.search_type in ["one-way", "round-trip"] and (not request.origin or not request.destination):
             raise HTTPException(status_code=400, detail="Origin and destination required")
         
-        # Generate mock results based on search type
-        num_results = 15
-        mock_results = []
-        
-        for i in range(1, num_results + 1):
-            flight = FlightResult(
-                flight_id=f"flight_{i}",
-                airline=["United", "Delta", "American", "Emirates", "Lufthansa"][i % 5],
-                flight_number=f"UA{1000 + i}",
-                origin=request.origin or request.multi_city_legs[0].origin if request.multi_city_legs else "NYC",
-                destination=request.destination or request.multi_city_legs[0].destination if request.multi_city_legs else "LON",
-                departure_time=f"2025-06-{10 + (i % 20):02d}T{8 + (i % 12):02d}:00:00",
-                arrival_time=f"2025-06-{10 + (i % 20):02d}T{20 + (i % 4):02d}:00:00",
-                duration_minutes=360 + (i * 30),
-                stops=i % 3,
-                stop_cities=["ATL"] if i % 3 == 1 else [] if i % 3 == 0 else ["ATL", "FRA"],
-                cabin_class=request.cabin_class,
-                price=500.0 + (i * 50),
-                currency="USD",
-                seats_available=20 + i,
-                baggage_allowance={"checked": "2 bags", "carry_on": "1 bag"},
-                provider="Expedia"
-            )
-            mock_results.append(flight)
-        
-        # Apply filters
-        filtered_results = mock_results
-        
-        if request.max_stops is not None:
-            filtered_results = [f for f in filtered_results if f.stops <= request.max_stops]
-        
-        if request.preferred_airlines:
-            filtered_results = [f for f in filtered_results if f.airline in request.preferred_airlines]
-        
-        if request.price_range:
-            if request.price_range.min:
-                filtered_results = [f for f in filtered_results if f.price >= request.price_range.min]
-            if request.price_range.max:
-                filtered_results = [f for f in filtered_results if f.price <= request.price_range.max]
-        
-        # Sort
-        sort_key_map = {
-            FlightSortBy.PRICE: lambda x: x.price,
-            FlightSortBy.DURATION: lambda x: x.duration_minutes,
-            FlightSortBy.STOPS: lambda x: x.stops,
-            FlightSortBy.AIRLINE: lambda x: x.airline,
-            FlightSortBy.DEPARTURE_TIME: lambda x: x.departure_time
-        }
-        
-        filtered_results.sort(
-            key=sort_key_map[request.sort_by],
-            reverse=(request.sort_order == SortOrder.DESC)
+        # Resolve the search session, then filter, rank and paginate its snapshot
+        pipeline = build_flight_pipeline(request)
+        search = _run_search(
+            "flights", request, FLIGHT_QUERY_FIELDS,
+            lambda: _convert_records(
+                generate_mock_flights(request), FLIGHT_PRICE_FIELDS, request.currency
+            ),
+            pipeline
         )
-        
-        # Pagination
-        start_idx = (request.page - 1) * request.per_page
-        end_idx = start_idx + request.per_page
-        paginated_results = filtered_results[start_idx:end_idx]
+        paginated_results = _to_models(search["records"])
         
         search_duration = (datetime.now() - start_time).total_seconds() * 1000
         
         metadata = SearchMetadata(
-            total_results=len(filtered_results),
+            total_results=search["total_results"],
             page=request.page,
             per_page=request.per_page,
-            total_pages=(len(filtered_results) + request.per_page - 1) // request.per_page,
+            total_pages=(search["total_results"] + request.per_page - 1) // request.per_page,
             search_duration_ms=search_duration,
-            from_cache=False,
+            from_cache=search["from_cache"],
             filters_applied={
                 "search_type": request.search_type,
                 "max_stops": request.max_stops,
@@ -465,6 +740,7 @@ async def advanced_flight_search(request: AdvancedFlightSearchRequest):
             "success": True,
             "results": paginated_results,
             "metadata": metadata,
+            "session": _session_info(search["session"]),
             "search_type": request.search_type
         }
         
@@ -489,80 +765,26 @@ async def advanced_activity_search(request: AdvancedActivitySearchRequest):
     try:
         start_time = datetime.now()
         
-        # Generate mock activity results
-        mock_results = [
-            ActivityResult(
-                activity_id=f"activity_{i}",
-                title=f"Amazing {request.destination} Tour {i}",
-                description=f"Experience the best of {request.destination} with this curated tour",
-                category=["tours", "activities", "attractions"][i % 3],
-                activity_type=["cultural", "adventure", "food", "nature"][i % 4],
-                duration_hours=2.0 + (i * 0.5),
-                price=50.0 + (i * 15),
-                currency="USD",
-                rating=4.0 + (i * 0.1),
-                review_count=100 + (i * 20),
-                location={
-                    "address": f"{request.destination} Center",
-                    "latitude": 40.7128,
-                    "longitude": -74.0060
-                },
-                images=[f"https://example.com/activity{i}.jpg"],
-                languages=["English", "Spanish"] if i % 2 == 0 else ["English"],
-                accessibility=i % 3 == 0,
-                provider="Viator"
-            )
-            for i in range(1, 16)
-        ]
-        
-        # Apply filters
-        filtered_results = mock_results
-        
-        if request.categories:
-            filtered_results = [a for a in filtered_results if a.category in request.categories]
-        
-        if request.activity_types:
-            filtered_results = [a for a in filtered_results if a.activity_type in request.activity_types]
-        
-        if request.min_rating:
-            filtered_results = [a for a in filtered_results if a.rating >= request.min_rating]
-        
-        if request.price_range:
-            if request.price_range.min:
-                filtered_results = [a for a in filtered_results if a.price >= request.price_range.min]
-            if request.price_range.max:
-                filtered_results = [a for a in filtered_results if a.price <= request.price_range.max]
-        
-        if request.accessibility is not None:
-            filtered_results = [a for a in filtered_results if a.accessibility == request.accessibility]
-        
-        # Sort
-        sort_key_map = {
-            ActivitySortBy.PRICE: lambda x: x.price,
-            ActivitySortBy.RATING: lambda x: x.rating,
-            ActivitySortBy.DURATION: lambda x: x.duration_hours,
-            ActivitySortBy.POPULARITY: lambda x: x.review_count
-        }
-        
-        filtered_results.sort(
-            key=sort_key_map[request.sort_by],
-            reverse=(request.sort_order == SortOrder.DESC)
+        # Resolve the search session, then filter, rank and paginate its snapshot
+        pipeline = build_activity_pipeline(request)
+        search = _run_search(
+            "activities", request, ACTIVITY_QUERY_FIELDS,
+            lambda: _convert_records(
+                generate_mock_activities(request.destination), ACTIVITY_PRICE_FIELDS, request.currency
+            ),
+            pipeline
         )
-        
-        # Pagination
-        start_idx = (request.page - 1) * request.per_page
-        end_idx = start_idx + request.per_page
-        paginated_results = filtered_results[start_idx:end_idx]
+        paginated_results = _to_models(search["records"])
         
         search_duration = (datetime.now() - start_time).total_seconds() * 1000
         
         metadata = SearchMetadata(
-            total_results=len(filtered_results),
+            total_results=search["total_results"],
             page=request.page,
             per_page=request.per_page,
-            total_pages=(len(filtered_results) + request.per_page - 1) // request.per_page,
+            total_pages=(search["total_results"] + request.per_page - 1) // request.per_page,
             search_duration_ms=search_duration,
-            from_cache=False,
+            from_cache=search["from_cache"],
             filters_applied={
                 "categories": request.categories,
                 "activity_types": request.activity_types,
@@ -574,13 +796,22 @@ async def advanced_activity_search(request: AdvancedActivitySearchRequest):
         return {
             "success": True,
             "results": paginated_results,
-            "metadata": metadata
+            "metadata": metadata,
+            "session": _session_info(search["session"])
         }
         
     except Exception as e:
         logger.error(f"Advanced activity search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@advanced_search_router.get("/sessions/stats")
+async def get_search_session_stats():
+    """Search session store usage (sessions, memory, hit/miss/eviction counts)"""
+    return {
+        "success": True,
+        "stats": search_sessions.get_stats()
+    }
+
 # ============================================================================
 # SEARCH HISTORY & SUGGESTIONS
 # ============================================================================
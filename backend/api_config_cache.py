@@ -0,0 +1,123 @@
+"""
+API Configuration Cache
+In-process cache of api_configuration rows keyed by (provider, environment)
+
+Provider setup paths (ExpediaService.initialize and friends) look up their
+configuration on every initialisation. Rows change only through
+store_supabase_config or an environment switch, so lookups are served from
+memory for a TTL, concurrent misses share one query, and the cache is
+pre-warmed with every active row at startup. Warmed entries are aged by a
+random share of the TTL (API_CONFIG_WARM_JITTER) so they do not all expire
+and reload at the same moment.
+
+Usage:
+    config = await api_config_cache.get('expedia', 'production')
+    api_config_cache.invalidate('expedia', 'production')
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from supabase_async import run_query
+from supabase_pool import ANON, get_supabase_client, is_configured
+
+logger = logging.getLogger(__name__)
+
+API_CONFIG_TTL_SECONDS = float(os.getenv('API_CONFIG_TTL_SECONDS', '300'))
+API_CONFIG_WARM_JITTER = float(os.getenv('API_CONFIG_WARM_JITTER', '0.2'))
+
+Key = Tuple[str, str]
+
+
+class ApiConfigCache:
+    """TTL cache of provider config_data by (provider, environment)"""
+
+    def __init__(self, ttl_seconds: float = API_CONFIG_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic,
+                 warm_jitter: float = API_CONFIG_WARM_JITTER):
+        self.ttl_seconds = ttl_seconds
+        self.warm_jitter = warm_jitter
+        self._clock = clock
+        # key -> (loaded_at, config_data or None when no row exists)
+        self._entries: Dict[Key, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._loading: Dict[Key, asyncio.Future] = {}
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'invalidations': 0, 'warmed': 0}
+
+    async def get(self, provider: str, environment: str) -> Optional[Dict[str, Any]]:
+        key = (provider, environment)
+        entry = self._entries.get(key)
+        if entry and self._clock() - entry[0] < self.ttl_seconds:
+            self._stats['hits'] += 1
+            return self._copy(entry[1])
+        self._stats['misses'] += 1
+        future = self._loading.get(key)
+        if future is None or future.done():
+            future = asyncio.ensure_future(self._load(key))
+            self._loading[key] = future
+        try:
+            return self._copy(await asyncio.shield(future))
+        finally:
+            if future.done() and self._loading.get(key) is future:
+                del self._loading[key]
+
+    async def _load(self, key: Key) -> Optional[Dict[str, Any]]:
+        provider, environment = key
+        generation = self._generation
+        supabase = get_supabase_client(ANON)
+        result = await run_query(
+            supabase.table('api_configuration').select('*')
+            .eq('provider', provider).eq('environment', environment).eq('is_active', True)
+        )
+        self._stats['loads'] += 1
+        config = result.data[0]['config_data'] if result.data else None
+        # A write that landed while we were reading wins
+        if generation == self._generation:
+            self._entries[key] = (self._clock(), config)
+        return config
+
+    async def warm(self) -> int:
+        """Load every active configuration in one query"""
+        if not is_configured(ANON):
+            return 0
+        generation = self._generation
+        supabase = get_supabase_client(ANON)
+        result = await run_query(supabase.table('api_configuration').select('*').eq('is_active', True))
+        if generation != self._generation:
+            return 0
+        # Keep the first row per key, as _load does
+        configs: Dict[Key, Optional[Dict[str, Any]]] = {}
+        for row in result.data or []:
+            configs.setdefault((row['provider'], row['environment']), row['config_data'])
+        now = self._clock()
+        for key, config in configs.items():
+            self._entries[key] = (now - random.uniform(0, self.warm_jitter) * self.ttl_seconds, config)
+        self._stats['warmed'] += len(configs)
+        return len(configs)
+
+    def invalidate(self, provider: Optional[str] = None, environment: Optional[str] = None):
+        """Drop one (provider, environment) entry, or everything when no key is given"""
+        self._generation += 1
+        self._stats['invalidations'] += 1
+        if provider is None:
+            self._entries.clear()
+            self._loading.clear()
+            return
+        self._entries.pop((provider, environment), None)
+        self._loading.pop((provider, environment), None)
+
+    @staticmethod
+    def _copy(config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        return dict(config) if isinstance(config, dict) else config
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'ttl_seconds': self.ttl_seconds,
+                'warm_jitter': self.warm_jitter, **self._stats}
+
+
+# Global instance
+api_config_cache = ApiConfigCache()
@@ -0,0 +1,130 @@
+"""
+Credential Cache
+Short-lived in-memory cache of decrypted provider credentials
+
+Every credential read used to pay for a Fernet decrypt (server.py) or a
+provider_credentials fetch (UniversalProviderManager). Decrypted values are
+now held here for a TTL so the request path does no crypto: provider
+bootstrap decrypts everything up front, later reads are dictionary hits.
+
+Only decrypts populate the cache, and it holds at most
+CREDENTIAL_CACHE_MAX_ENTRIES values (oldest evicted first). Plaintext is
+kept in bytearrays and overwritten with zeros whenever an entry expires, is
+evicted, is invalidated or is cleared. Values handed to callers are
+ordinary (immutable) strings; only the cache's own copy can be wiped.
+
+Usage:
+    secret = credential_cache.decrypt(token_key(token), token, fernet_decrypt)
+    credential_cache.bulk_decrypt({(provider_id, 'api_key'): token}, fernet_decrypt)
+    credential_cache.invalidate_provider(provider_id)
+"""
+
+import os
+import time
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CREDENTIAL_CACHE_TTL_SECONDS = float(os.getenv('CREDENTIAL_CACHE_TTL_SECONDS', '900'))
+CREDENTIAL_CACHE_MAX_ENTRIES = int(os.getenv('CREDENTIAL_CACHE_MAX_ENTRIES', '1024'))
+
+
+def token_key(token: str) -> Tuple[str, str]:
+    """Cache key for a ciphertext that has no provider context"""
+    return ('token', hashlib.sha256(token.encode()).hexdigest())
+
+
+def _wipe(buffer: bytearray):
+    buffer[:] = bytes(len(buffer))
+
+
+class CredentialCache:
+    """TTL cache of decrypted secrets that zeroes values on eviction"""
+
+    def __init__(self, ttl_seconds: float = CREDENTIAL_CACHE_TTL_SECONDS,
+                 max_entries: int = CREDENTIAL_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        # key -> (expires_at, plaintext bytes), oldest first
+        self._entries: Dict[Hashable, Tuple[float, bytearray]] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'decrypts': 0, 'decrypt_failures': 0, 'evictions': 0}
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._clock() >= entry[0]:
+            self._evict(key)
+            return None
+        return entry[1].decode()
+
+    def put(self, key: Hashable, plaintext: str):
+        self._evict(key, count=False)
+        if len(self._entries) >= self.max_entries:
+            self.purge_expired()
+        while len(self._entries) >= self.max_entries:
+            self._evict(next(iter(self._entries)))
+        self._entries[key] = (self._clock() + self.ttl_seconds, bytearray(plaintext.encode()))
+
+    def decrypt(self, key: Hashable, ciphertext: str, decrypt_fn: Callable[[str], str]) -> str:
+        """Cached plaintext for key, decrypting (and counting it) only on a miss"""
+        value = self.get(key)
+        if value is not None:
+            self._stats['hits'] += 1
+            return value
+        self._stats['misses'] += 1
+        # Misses are rare, so they also sweep out (and wipe) expired entries
+        self.purge_expired()
+        try:
+            value = decrypt_fn(ciphertext)
+        except Exception:
+            self._stats['decrypt_failures'] += 1
+            raise
+        self._stats['decrypts'] += 1
+        self.put(key, value)
+        return value
+
+    def bulk_decrypt(self, items: Dict[Hashable, str], decrypt_fn: Callable[[str], str]) -> Dict[Hashable, str]:
+        """Decrypt many values at once (bootstrap); failures are logged and skipped"""
+        values = {}
+        for key, ciphertext in items.items():
+            try:
+                values[key] = self.decrypt(key, ciphertext, decrypt_fn)
+            except Exception as e:
+                logger.error(f"Failed to decrypt credential {key}: {e}")
+        return values
+
+    def _evict(self, key: Hashable, count: bool = True):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            _wipe(entry[1])
+            if count:
+                self._stats['evictions'] += 1
+
+    def invalidate_provider(self, provider_id: Any):
+        """Drop every credential cached for a provider (keys are (provider_id, ...))"""
+        for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == provider_id]:
+            self._evict(key)
+
+    def purge_expired(self) -> int:
+        now = self._clock()
+        expired = [k for k, (expires_at, _) in self._entries.items() if now >= expires_at]
+        for key in expired:
+            self._evict(key)
+        return len(expired)
+
+    def clear(self):
+        for key in list(self._entries):
+            self._evict(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds, **self._stats}
+
+
+# Global instance
+credential_cache = CredentialCache()
@@ -0,0 +1,176 @@
+"""
+Deal Accept Batcher
+Coalesces concurrent off-season deal accepts into batched ledger updates
+
+Every accept has to take a room from its campaign day in
+offseason_campaign_ledger. Sending one accept_offseason_deal() call per
+request makes a flash promotion queue on that day's row lock. Instead,
+accepts arriving within a few milliseconds of each other are written behind
+in one accept_offseason_deals() call. The database grants each campaign day
+LEAST(requested, remaining) rooms under a single conditional update, so
+overbooking stays impossible across every backend process. Each caller still
+gets its own accepted / sold-out outcome.
+
+Usage:
+    outcome = await deal_accept_batcher.accept(deal_id, stay_date)
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+ACCEPT_BATCH_MAX = int(os.getenv('DEAL_ACCEPT_BATCH_MAX', '500'))
+ACCEPT_BATCH_DELAY_MS = float(os.getenv('DEAL_ACCEPT_BATCH_DELAY_MS', '5'))
+
+# (deal_id, stay_date or None) in arrival order -> one outcome per request
+FlushFn = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+def canonical_deal_id(deal_id: Any) -> Optional[str]:
+    """Lowercase hyphenated UUID as the database returns it, or None if malformed"""
+    try:
+        return str(uuid.UUID(str(deal_id)))
+    except ValueError:
+        return None
+
+
+async def accept_deals_rpc(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Accept a batch of deals with the accept_offseason_deals RPC
+
+    Malformed ids would fail the UUID[] cast for the whole batch, so they are
+    answered not_found here and never sent. Outcomes carry the caller's id.
+    """
+    valid: Dict[str, List[Dict[str, Any]]] = {}
+    outcomes = []
+    for r in requests:
+        canonical = canonical_deal_id(r['deal_id'])
+        if canonical is None:
+            outcomes.append({'deal_id': r['deal_id'], 'accepted': False, 'reason': 'not_found'})
+        else:
+            valid.setdefault(canonical, []).append(r)
+    if valid:
+        supabase = get_supabase_client(allow_anon=True)
+        result = await run_query(supabase.rpc('accept_offseason_deals', {
+            'deal_uuids': list(valid),
+            'stay_days': [same[0]['stay_date'] for same in valid.values()]
+        }))
+        for outcome in result.data or []:
+            for r in valid.get(str(outcome.get('deal_id')), ()):
+                outcomes.append({**outcome, 'deal_id': r['deal_id']})
+    return outcomes
+
+
+class DealAcceptBatcher:
+    """Write-behind queue that flushes deal accepts in batches"""
+
+    def __init__(self, flush_fn: FlushFn = accept_deals_rpc,
+                 max_batch: int = ACCEPT_BATCH_MAX,
+                 max_delay_ms: float = ACCEPT_BATCH_DELAY_MS):
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self._pending: List[Dict[str, Any]] = []
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self._stats = {'accepts': 0, 'accepted': 0, 'rejected': 0, 'failed': 0,
+                       'flushes': 0, 'max_batch_seen': 0, 'flush_ms': 0.0}
+
+    async def accept(self, deal_id: str, stay_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Queue one accept and wait for its batch to be written
+
+        Returns:
+            {'deal_id', 'accepted', 'campaign_id', 'stay_date', 'remaining'}
+            or {'deal_id', 'accepted': False, 'reason'}
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._stats['accepts'] += 1
+
+        # The same deal accepted twice in one window is sent once
+        if deal_id in self._waiters:
+            self._waiters[deal_id].append(future)
+        else:
+            self._waiters[deal_id] = [future]
+            self._pending.append({
+                'deal_id': deal_id,
+                'stay_date': stay_date.isoformat() if stay_date else None
+            })
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_ms / 1000, self._start_flush)
+
+        return await future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        waiters = {r['deal_id']: self._waiters.pop(r['deal_id']) for r in batch}
+        task = asyncio.get_running_loop().create_task(self._flush(batch, waiters))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Dict[str, Any]], waiters: Dict[str, List[asyncio.Future]]):
+        start = time.perf_counter()
+        stats = self._stats
+        stats['flushes'] += 1
+        stats['max_batch_seen'] = max(stats['max_batch_seen'], len(batch))
+        try:
+            outcomes = await self.flush_fn(batch)
+        except Exception as e:
+            stats['failed'] += sum(len(futures) for futures in waiters.values())
+            logger.error(f"⚠️ Deal accept batch of {len(batch)} failed: {str(e)}")
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        finally:
+            stats['flush_ms'] += (time.perf_counter() - start) * 1000
+
+        by_deal = {str(outcome.get('deal_id')): outcome for outcome in outcomes}
+        for deal_id, futures in waiters.items():
+            outcome = by_deal.get(deal_id) or {'deal_id': deal_id, 'accepted': False, 'reason': 'not_processed'}
+            stats['accepted' if outcome.get('accepted') else 'rejected'] += len(futures)
+            for future in futures:
+                if not future.done():
+                    future.set_result(outcome)
+
+    async def drain(self):
+        """Flush anything queued and wait for in-flight batches (shutdown)"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        flushes = self._stats['flushes']
+        return {
+            'max_batch': self.max_batch,
+            'max_delay_ms': self.max_delay_ms,
+            'pending': len(self._pending),
+            **self._stats,
+            'flush_ms': round(self._stats['flush_ms'], 1),
+            'avg_accepts_per_flush': round((self._stats['accepted'] + self._stats['rejected']
+                                            + self._stats['failed']) / flushes, 1) if flushes else 0.0
+        }
+
+
+# Global instance
+deal_accept_batcher = DealAcceptBatcher()
@@ -0,0 +1,468 @@
+"""
+Deal Allocator - Global campaign-capacity-aware matching
+Assigns active dreams to off-season campaigns across all users at once
+
+optimize_yield ranks deals per user, so a popular campaign can be offered
+to far more travellers than it has rooms. The allocator instead:
+
+1. Scores every dream against every active campaign in vectorized blocks
+   (YieldOptimizer.score_matrix) and keeps each dream's best candidates
+2. Runs a greedy assignment over a max-heap of (score, dream, candidate):
+   the highest-scoring remaining pair is placed first; a dream whose
+   candidate has no capacity left falls through to its next candidate
+3. Places each match on a concrete day inside the campaign window (and the
+   dream's preferred dates unless they are flexible), skipping blackout
+   dates, and never before today. Each match consumes one unit of that
+   day's allocation (max_allocation per day)
+
+Capacity already spoken for - accepted rooms in the ledger plus unexpired
+offers from earlier runs - is reserved up front, and dreams still holding
+an unexpired offer are not offered another one.
+
+Runs nightly from the scheduler or on demand via POST /api/yield/allocate;
+results are written to deal_candidates in bulk batches.
+"""
+
+import os
+import time
+import uuid
+import heapq
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from offseason_deal_cache import offseason_deal_cache
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+from yield_optimizer import YieldOptimizer
+
+logger = logging.getLogger(__name__)
+
+ALLOCATION_CANDIDATES_PER_DREAM = int(os.getenv('ALLOCATION_CANDIDATES_PER_DREAM', '10'))
+ALLOCATION_SCORING_CHUNK = int(os.getenv('ALLOCATION_SCORING_CHUNK', '4096'))
+ALLOCATION_HOUR_UTC = int(os.getenv('ALLOCATION_HOUR_UTC', '2'))
+ALLOCATION_INSERT_BATCH = 1000
+FETCH_PAGE_SIZE = 1000
+
+
+class CampaignDays:
+    """
+    Remaining daily allocation for one campaign
+
+    Full and blackout days are linked to the following day (union-find with
+    path halving), so finding the first open day in a window is near O(1)
+    however many days have filled up.
+    """
+
+    def __init__(self, start: date, end: date, daily_capacity: int,
+                 blackout: Iterable[str] = (), reserved: Optional[Dict[str, int]] = None):
+        self.start = start
+        self.start_ordinal = start.toordinal()
+        self.days = max(0, (end - start).days + 1)
+        self.remaining = [daily_capacity] * self.days
+
+        for day in blackout:
+            idx = self._index(day)
+            if idx is not None:
+                self.remaining[idx] = 0
+        for day, count in (reserved or {}).items():
+            idx = self._index(day)
+            if idx is not None:
+                self.remaining[idx] = max(0, self.remaining[idx] - count)
+
+        # _next[i] == i while day i has capacity; index `days` is the sentinel
+        self._next = [i if self.remaining[i] > 0 else i + 1 for i in range(self.days)] + [self.days]
+
+    def _index(self, day: Any) -> Optional[int]:
+        idx = (YieldOptimizer._as_date(day) - self.start).days
+        return idx if 0 <= idx < self.days else None
+
+    def _find(self, idx: int) -> int:
+        nxt = self._next
+        while nxt[idx] != idx:
+            nxt[idx] = nxt[nxt[idx]]
+            idx = nxt[idx]
+        return idx
+
+    def take(self, window_start: Optional[date] = None, window_end: Optional[date] = None) -> Optional[date]:
+        """Consume one unit on the first open day in the window (None if full)"""
+        idx = self.take_ordinal(
+            window_start.toordinal() if window_start else None,
+            window_end.toordinal() if window_end else None
+        )
+        return None if idx is None else date.fromordinal(idx)
+
+    def take_ordinal(self, lo: Optional[int], hi: Optional[int]) -> Optional[int]:
+        """take() on proleptic ordinals, for the allocator's hot loop"""
+        first = self.start_ordinal
+        lo = 0 if lo is None else max(0, lo - first)
+        hi = self.days - 1 if hi is None else min(self.days - 1, hi - first)
+        if lo > hi:
+            return None
+
+        idx = self._find(lo)
+        if idx > hi:
+            return None
+
+        self.remaining[idx] -= 1
+        if self.remaining[idx] == 0:
+            self._next[idx] = idx + 1
+        return first + idx
+
+
+@dataclass
+class Assignment:
+    """One dream placed on one campaign day"""
+    dream_id: str
+    campaign_id: str
+    stay_date: date
+    score: float
+    price: float
+    original_price: float
+    breakdown: Dict[str, float]
+
+
+@dataclass
+class AllocationResult:
+    """Outcome of one allocation run"""
+    assignments: List[Assignment]
+    dreams_considered: int
+    campaigns_considered: int
+    stage_timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_score(self) -> float:
+        return round(sum(a.score for a in self.assignments), 2)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'dreams_considered': self.dreams_considered,
+            'campaigns_considered': self.campaigns_considered,
+            'assigned': len(self.assignments),
+            'unassigned': self.dreams_considered - len(self.assignments),
+            'total_score': self.total_score,
+            'stage_timings_ms': self.stage_timings_ms
+        }
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _dream_window(dream: Dict, today_ordinal: int) -> tuple:
+    """
+    Placement bounds as ordinals: never before today, and within the
+    preferred dates unless the dream is flexible
+    """
+    if dream.get('flexible_dates'):
+        return today_ordinal, None
+    start = dream.get('preferred_start_date')
+    end = dream.get('preferred_end_date')
+    return (
+        max(YieldOptimizer._as_date(start).toordinal(), today_ordinal) if start else today_ordinal,
+        YieldOptimizer._as_date(end).toordinal() if end else None
+    )
+
+
+def allocate_deals(dreams: Sequence[Dict],
+                   campaigns: Sequence[Dict],
+                   wallet_tiers: Optional[Dict[str, str]] = None,
+                   reserved: Optional[Dict[str, Dict[str, int]]] = None,
+                   candidates_per_dream: int = ALLOCATION_CANDIDATES_PER_DREAM,
+                   min_score: float = 0.0,
+                   chunk_size: int = ALLOCATION_SCORING_CHUNK,
+                   today: Optional[date] = None) -> AllocationResult:
+    """
+    Assign each dream to at most one campaign day, maximizing total score
+    greedily under every campaign's daily allocation
+
+    Args:
+        dreams: Active dream_intents rows (id, user_id, tags, budget,
+            optional preferred dates / flexible_dates)
+        campaigns: Active offseason_campaigns rows
+        wallet_tiers: {user_id: tier}; missing users score as bronze
+        reserved: {campaign_id: {date: rooms}} already taken per day
+        candidates_per_dream: Best campaigns kept per dream for assignment
+        min_score: Pairs scoring below this are never assigned
+        chunk_size: Dreams scored per vectorized block
+        today: First day a stay may be placed on (defaults to today, UTC)
+    """
+    timings = {}
+    wallet_tiers = wallet_tiers or {}
+    reserved = reserved or {}
+    n, m = len(dreams), len(campaigns)
+    k = min(candidates_per_dream, m)
+    if n == 0 or k == 0:
+        return AllocationResult([], n, m, timings)
+
+    # Stage 1: best k candidates per dream, scored in bounded blocks
+    start = time.perf_counter()
+    candidate_idx = np.empty((n, k), dtype=np.int32)
+    candidate_score = np.empty((n, k), dtype=np.float64)
+    candidate_match = np.empty((n, k), dtype=np.float64)
+    wallet = np.empty(n, dtype=np.float64)
+    scores = None
+    for lo in range(0, n, chunk_size):
+        block = dreams[lo:lo + chunk_size]
+        rows = slice(lo, lo + len(block))
+        tiers = [wallet_tiers.get(d.get('user_id'), 'bronze') for d in block]
+        scores = YieldOptimizer.score_matrix(block, campaigns, tiers)
+        best = scores.top_k(k)
+        candidate_idx[rows] = best
+        candidate_score[rows] = np.take_along_axis(scores.total, best, axis=1)
+        candidate_match[rows] = np.take_along_axis(scores.dream_match, best, axis=1)
+        wallet[rows] = scores.wallet_tier
+    timings['score'] = _elapsed_ms(start)
+
+    # Stage 2: greedy assignment, highest remaining score first
+    start = time.perf_counter()
+    days = [
+        CampaignDays(
+            YieldOptimizer._as_date(c['start_date']),
+            YieldOptimizer._as_date(c['end_date']),
+            int(c['max_allocation']),
+            c.get('blackout') or [],
+            reserved.get(c['id'])
+        )
+        for c in campaigns
+    ]
+    today_ordinal = (today or datetime.utcnow().date()).toordinal()
+    windows = [_dream_window(d, today_ordinal) for d in dreams]
+
+    # Plain lists: element access in the hot loop is much cheaper than NumPy's
+    idx_rows = candidate_idx.tolist()
+    score_rows = candidate_score.tolist()
+
+    heap = [(-score_rows[i][0], i, 0) for i in range(n)]
+    heapq.heapify(heap)
+    placed = []
+    while heap:
+        neg_score, i, rank = heapq.heappop(heap)
+        if -neg_score < min_score:
+            break
+        lo, hi = windows[i]
+        candidates, scores_i = idx_rows[i], score_rows[i]
+        # Keep trying this dream's next candidates while they still outrank the
+        # rest of the heap; only a lower-ranked fallback goes back on the heap
+        while True:
+            stay_day = days[candidates[rank]].take_ordinal(lo, hi)
+            if stay_day is not None:
+                placed.append((i, rank, stay_day))
+                break
+            rank += 1
+            if rank == k or scores_i[rank] < min_score:
+                break
+            entry = (-scores_i[rank], i, rank)
+            if heap and heap[0] < entry:
+                heapq.heappush(heap, entry)
+                break
+    timings['assign'] = _elapsed_ms(start)
+
+    # Stage 3: price and explain only the assigned pairs
+    # (campaign-side factors are the same in every block's ScoreMatrix)
+    start = time.perf_counter()
+    assignments = []
+    for i, rank, stay_day in placed:
+        j = int(candidate_idx[i, rank])
+        dream, campaign = dreams[i], campaigns[j]
+        assignments.append(Assignment(
+            dream_id=dream['id'],
+            campaign_id=campaign['id'],
+            stay_date=date.fromordinal(stay_day),
+            score=float(candidate_score[i, rank]),
+            price=YieldOptimizer.deal_price(dream, campaign),
+            original_price=float(dream['budget']),
+            breakdown={
+                'seasonality_score': float(scores.seasonality[j]),
+                'discount_score': float(scores.discount[j]),
+                'dream_match_score': float(candidate_match[i, rank]),
+                'wallet_tier_score': float(wallet[i]),
+                'blackout_penalty': float(scores.blackout[j])
+            }
+        ))
+    timings['finalize'] = _elapsed_ms(start)
+
+    return AllocationResult(assignments, n, m, timings)
+
+
+# ============================================================================
+# Allocation job (Supabase I/O)
+# ============================================================================
+
+async def _fetch_all(build_query) -> List[Dict]:
+    """Read every row of a query page by page"""
+    rows = []
+    offset = 0
+    while True:
+        page = await run_query(build_query().range(offset, offset + FETCH_PAGE_SIZE - 1))
+        rows.extend(page.data or [])
+        if len(page.data or []) < FETCH_PAGE_SIZE:
+            return rows
+        offset += FETCH_PAGE_SIZE
+
+
+async def _fetch_wallet_tiers(supabase, user_ids: List[str]) -> Dict[str, str]:
+    tiers = {}
+    for lo in range(0, len(user_ids), FETCH_PAGE_SIZE):
+        result = await run_query(
+            supabase.table('wallet_accounts')
+            .select('owner_id, tier')
+            .in_('owner_id', user_ids[lo:lo + FETCH_PAGE_SIZE])
+        )
+        tiers.update({row['owner_id']: row['tier'] for row in result.data or []})
+    return tiers
+
+
+async def _fetch_reserved(supabase) -> Dict[str, Dict[str, int]]:
+    """Rooms already taken per campaign day, read from offseason_campaign_ledger"""
+    today = datetime.utcnow().date().isoformat()
+    rows = await _fetch_all(
+        lambda: supabase.table('offseason_campaign_ledger')
+        .select('campaign_id, day, allocated')
+        .gt('allocated', 0)
+        .gte('day', today)
+        .order('campaign_id')
+        .order('day')
+    )
+    reserved: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        reserved.setdefault(row['campaign_id'], {})[row['day']] = row['allocated']
+    return reserved
+
+
+async def _fetch_outstanding_offers(supabase) -> tuple:
+    """
+    Unexpired offers from earlier runs
+
+    Returns ({campaign_id: {stay_date: offers}}, dream ids holding an offer)
+    """
+    now = datetime.utcnow()
+    rows = await _fetch_all(
+        lambda: supabase.table('deal_candidates')
+        .select('id, dream_id, campaign_id, stay_date:metadata->>stay_date')
+        .in_('status', ['pending', 'presented'])
+        .gt('expires_at', now.isoformat())
+        .gte('metadata->>stay_date', now.date().isoformat())
+        .order('id')
+    )
+    offered: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        days = offered.setdefault(row['campaign_id'], {})
+        days[row['stay_date']] = days.get(row['stay_date'], 0) + 1
+    return offered, {row['dream_id'] for row in rows}
+
+
+def _merge_reserved(*sources: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    merged: Dict[str, Dict[str, int]] = {}
+    for source in sources:
+        for campaign_id, days in source.items():
+            target = merged.setdefault(campaign_id, {})
+            for day, count in days.items():
+                target[day] = target.get(day, 0) + count
+    return merged
+
+
+async def run_allocation_job(dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Allocate all active dreams across all active campaigns
+
+    Args:
+        dry_run: Compute the allocation without writing deal_candidates
+
+    Returns:
+        Run summary with counts, total score and per-stage timings
+    """
+    run_id = str(uuid.uuid4())
+    start = time.perf_counter()
+    supabase = get_supabase_client(allow_anon=True)
+
+    campaigns, dreams, accepted, (offered, offered_dreams) = await asyncio.gather(
+        _fetch_all(lambda: supabase.table('offseason_campaigns').select('*').eq('status', 'active').order('id')),
+        _fetch_all(lambda: supabase.table('dream_intents').select('*').eq('status', 'active').order('id')),
+        _fetch_reserved(supabase),
+        _fetch_outstanding_offers(supabase)
+    )
+    # Outstanding offers keep both their capacity and their dream
+    reserved = _merge_reserved(accepted, offered)
+    dreams = [d for d in dreams if d['id'] not in offered_dreams]
+    tiers = await _fetch_wallet_tiers(supabase, sorted({d['user_id'] for d in dreams if d.get('user_id')}))
+    fetch_ms = _elapsed_ms(start)
+
+    # CPU-bound; keep the event loop free
+    result = await asyncio.to_thread(allocate_deals, dreams, campaigns, tiers, reserved)
+    result.stage_timings_ms = {'fetch': fetch_ms, **result.stage_timings_ms}
+
+    insert_start = time.perf_counter()
+    written = 0
+    if not dry_run and result.assignments:
+        expires_at = (datetime.utcnow() + timedelta(hours=48)).isoformat()
+        created_at = datetime.utcnow().isoformat()
+        rows = [
+            {
+                'dream_id': a.dream_id,
+                'campaign_id': a.campaign_id,
+                'provider_mix': ['partner_direct'],
+                'score': a.score,
+                'price': round(a.price, 2),
+                'original_price': a.original_price,
+                'discount_amount': round(a.original_price - a.price, 2),
+                'expires_at': expires_at,
+                'status': 'pending',
+                'created_at': created_at,
+                'metadata': {
+                    'scoring_version': 'v1_full',
+                    'allocation_run': run_id,
+                    'stay_date': a.stay_date.isoformat(),
+                    'breakdown': a.breakdown
+                }
+            }
+            for a in result.assignments
+            if a.price > 0
+        ]
+        for lo in range(0, len(rows), ALLOCATION_INSERT_BATCH):
+            await run_query(supabase.table('deal_candidates').insert(rows[lo:lo + ALLOCATION_INSERT_BATCH]))
+        written = len(rows)
+        offseason_deal_cache.clear()
+    result.stage_timings_ms['insert'] = _elapsed_ms(insert_start)
+    result.stage_timings_ms['total'] = _elapsed_ms(start)
+
+    summary = {'run_id': run_id, 'dry_run': dry_run, 'written': written, **result.summary()}
+    logger.info(f"✅ Deal allocation {run_id}: {summary['assigned']}/{summary['dreams_considered']} dreams "
+                f"assigned, total score {summary['total_score']} ({result.stage_timings_ms})")
+    return summary
+
+
+async def _scheduled_allocation():
+    try:
+        await run_allocation_job()
+    except Exception as e:
+        logger.error(f"Scheduled deal allocation failed: {e}")
+
+
+# Scheduler instance
+scheduler = AsyncIOScheduler()
+
+
+def start_allocation_schedule(hour_utc: int = ALLOCATION_HOUR_UTC):
+    """Run the allocator nightly"""
+    scheduler.add_job(
+        _scheduled_allocation,
+        trigger=CronTrigger(hour=hour_utc, minute=0, timezone='UTC'),
+        id='deal_allocation',
+        name='Nightly Deal Allocation',
+        replace_existing=True
+    )
+    if not scheduler.running:
+        scheduler.start()
+    logger.info(f"✅ Deal allocation scheduled nightly at {hour_utc:02d}:00 UTC")
+
+
+def stop_allocation_schedule():
+    if scheduler.running:
+        scheduler.shutdown()
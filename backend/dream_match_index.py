@@ -0,0 +1,496 @@
+"""
+Dream Match Index
+Push-based matching of dream intents and off-season campaigns
+
+Instead of pulling every active campaign when a user asks for deals, matches
+are computed when data is written:
+
+- a new or changed dream is scored against its candidate campaigns
+- a new or changed campaign is scored against the dreams it could rank for
+  and merged into each dream's candidate list
+
+Each dream keeps its best MATCH_CANDIDATES_PER_DREAM campaigns, scored at
+the base (bronze) tier. The wallet tier adds the same bonus to every
+campaign, so it cannot change the ranking. Readers rescore that short list
+with the user's real tier, and get exactly the deals a full scan would.
+
+Candidates are chosen so nothing a full scan would rank is skipped. A
+campaign that shares no tag with a dream scores the same for every dream
+with a budget (its "baseline": no tag points, and budget fit depends only
+on the discount). So a dream's top list can only contain campaigns sharing
+one of its tags (found through an inverted index) or campaigns among the
+best baselines overall. Dreams without tags or budget consider every
+campaign.
+
+The index is rebuilt on startup. After that it follows change events:
+endpoints in this process queue their writes with push_change, and writes
+from other workers are picked up by polling updated_at. Scoring a change
+can touch every dream or campaign, so all updates run on a worker thread
+under the index lock, and readers use lookup() under the same lock.
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+from yield_optimizer import YieldOptimizer
+
+logger = logging.getLogger(__name__)
+
+MATCH_CANDIDATES_PER_DREAM = int(os.getenv('DREAM_MATCH_CANDIDATES_PER_DREAM', '20'))
+MATCH_SYNC_SECONDS = float(os.getenv('DREAM_MATCH_SYNC_SECONDS', '30'))
+# Re-read rows this close to the watermark: updated_at is set at transaction
+# start, so a row can become visible after newer rows were already read
+MATCH_SYNC_OVERLAP_SECONDS = float(os.getenv('DREAM_MATCH_SYNC_OVERLAP_SECONDS', '10'))
+# Baselines within this of the k-th best stay candidates, covering the
+# 0.01 rounding of individual scores
+BASELINE_SLACK = 0.05
+# First watermark when the tables have no rows yet
+SYNC_EPOCH = '1970-01-01T00:00:00+00:00'
+MATCH_BUILD_CHUNK = 1024
+FETCH_PAGE_SIZE = 1000
+
+CAMPAIGNS_TABLE = 'offseason_campaigns'
+DREAMS_TABLE = 'dream_intents'
+
+
+def _norm(value: Any) -> str:
+    return str(value or '').strip().lower()
+
+
+def _tags(values: Optional[Iterable[str]]) -> Set[str]:
+    return {_norm(tag) for tag in values or () if _norm(tag)}
+
+
+def _is_active_campaign(campaign: Dict) -> bool:
+    return (campaign.get('status') == 'active'
+            and str(campaign.get('end_date') or '9999-12-31')[:10] >= datetime.utcnow().date().isoformat())
+
+
+def _is_active_dream(dream: Dict) -> bool:
+    return dream.get('status', 'active') == 'active'
+
+
+def _is_open_dream(dream: Dict) -> bool:
+    """Dreams whose scores do not follow campaign baselines consider every campaign"""
+    return not _tags(dream.get('tags')) or not float(dream.get('budget') or 0)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# Untagged dream with a budget: scores every campaign at its baseline
+_BASELINE_PROBE = {'tags': [], 'budget': 1.0}
+
+
+class DreamMatchIndex:
+    """Inverted indexes of active campaigns and dreams plus per-dream match lists"""
+
+    def __init__(self, candidates_per_dream: int = MATCH_CANDIDATES_PER_DREAM):
+        self.candidates_per_dream = candidates_per_dream
+        self.ready = False
+        self.watermark: Optional[str] = None
+        # (table, id) -> updated_at already applied, for rows re-read in the overlap
+        self._applied: Dict[Tuple[str, str], str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._queue: List[Tuple[str, str, Optional[Dict], Optional[Dict]]] = []
+        self._drain_task: Optional[asyncio.Task] = None
+        self._stats = {'rebuilds': 0, 'events': 0, 'dreams_scored': 0, 'campaigns_scored': 0,
+                       'lookups': 0, 'rebuild_ms': 0.0}
+        self._reset()
+
+    def _reset(self):
+        self.campaigns: Dict[str, Dict] = {}
+        self.dreams: Dict[str, Dict] = {}
+        self._campaigns_by_tag: Dict[str, Set[str]] = defaultdict(set)
+        # [(-baseline score, campaign_id)] best first
+        self._baselines: List[Tuple[float, str]] = []
+        self._baseline_of: Dict[str, float] = {}
+        self._dreams_by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self._open_dreams: Set[str] = set()
+        self._dreams_by_user: Dict[str, Set[str]] = defaultdict(set)
+        # dream_id -> [(-score, campaign_id)] best first
+        self._matches: Dict[str, List[Tuple[float, str]]] = {}
+        self._dreams_by_campaign: Dict[str, Set[str]] = defaultdict(set)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def matches_for_dream(self, dream_id: str) -> List[Tuple[float, Dict]]:
+        """[(base_score, campaign)] best first"""
+        return [(-neg, self.campaigns[cid]) for neg, cid in self._matches.get(dream_id, [])]
+
+    def lookup_user(self, user_id: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Active dreams of a user and the union of their matched campaigns
+
+        Returns:
+            (dreams, campaigns) ready for YieldOptimizer.rank_campaigns
+        """
+        self._stats['lookups'] += 1
+        dream_ids = sorted(self._dreams_by_user.get(user_id, ()))
+        campaign_ids = sorted({cid for did in dream_ids for _, cid in self._matches.get(did, [])})
+        return [self.dreams[did] for did in dream_ids], [self.campaigns[cid] for cid in campaign_ids]
+
+    async def lookup(self, user_id: str) -> Tuple[List[Dict], List[Dict]]:
+        """lookup_user, waiting for any update running on the worker thread"""
+        async with self._lock:
+            return self.lookup_user(user_id)
+
+    # ------------------------------------------------------------------
+    # Change events
+    # ------------------------------------------------------------------
+
+    def apply_change(self, table: str, event_type: str,
+                     new: Optional[Dict] = None, old: Optional[Dict] = None):
+        """
+        Apply one row change (Supabase realtime payload shape)
+
+        Args:
+            table: offseason_campaigns or dream_intents
+            event_type: INSERT, UPDATE or DELETE
+            new: Row after the change
+            old: Row before the change (DELETE)
+        """
+        self._stats['events'] += 1
+        row_id = str((new or old or {}).get('id'))
+        if table == CAMPAIGNS_TABLE:
+            if event_type == 'DELETE' or not _is_active_campaign(new):
+                self.remove_campaign(row_id)
+            else:
+                self.upsert_campaign(new)
+        elif table == DREAMS_TABLE:
+            if event_type == 'DELETE' or not _is_active_dream(new):
+                self.remove_dream(row_id)
+            else:
+                self.upsert_dream(new)
+
+    def push_change(self, table: str, event_type: str,
+                    new: Optional[Dict] = None, old: Optional[Dict] = None):
+        """Queue one row change from a request handler; it is applied off the event loop"""
+        self._queue.append((table, event_type, new, old))
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        while self._queue:
+            batch, self._queue = self._queue, []
+            try:
+                await self._run_locked(self._apply_batch, batch)
+            except Exception as e:
+                logger.error(f"Dream match index failed to apply {len(batch)} changes: {e}")
+
+    def _apply_batch(self, changes: List[Tuple[str, str, Optional[Dict], Optional[Dict]]]):
+        for change in changes:
+            self.apply_change(*change)
+
+    async def _run_locked(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run an index update on a worker thread while holding the index lock"""
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def upsert_campaign(self, campaign: Dict):
+        campaign_id = str(campaign['id'])
+        if campaign_id in self.campaigns:
+            self.remove_campaign(campaign_id)
+        self._index_campaign(campaign)
+        self._offer_campaign(campaign_id)
+
+    def remove_campaign(self, campaign_id: str):
+        campaign = self.campaigns.pop(campaign_id, None)
+        if campaign is None:
+            return
+        self._unindex(campaign_id, _tags(campaign.get('audience_tags')), self._campaigns_by_tag)
+        entry = (-self._baseline_of.pop(campaign_id), campaign_id)
+        del self._baselines[bisect.bisect_left(self._baselines, entry)]
+        # Dreams that listed it may now admit a campaign that was cut off
+        for dream_id in self._dreams_by_campaign.pop(campaign_id, set()):
+            self._match_dream(dream_id)
+
+    def upsert_dream(self, dream: Dict):
+        dream_id = str(dream['id'])
+        if dream_id in self.dreams:
+            self.remove_dream(dream_id)
+        self._index_dream(dream)
+        self._match_dream(dream_id)
+
+    def remove_dream(self, dream_id: str):
+        dream = self.dreams.pop(dream_id, None)
+        if dream is None:
+            return
+        self._unindex(dream_id, _tags(dream.get('tags')), self._dreams_by_tag)
+        self._open_dreams.discard(dream_id)
+        user_dreams = self._dreams_by_user.get(str(dream.get('user_id')))
+        if user_dreams is not None:
+            user_dreams.discard(dream_id)
+        self._set_matches(dream_id, [])
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _index_campaign(self, campaign: Dict, baseline: Optional[float] = None):
+        campaign_id = str(campaign['id'])
+        self.campaigns[campaign_id] = campaign
+        for tag in _tags(campaign.get('audience_tags')):
+            self._campaigns_by_tag[tag].add(campaign_id)
+        if baseline is None:
+            baseline = float(YieldOptimizer.score_matrix([_BASELINE_PROBE], [campaign]).total[0, 0])
+        self._baseline_of[campaign_id] = baseline
+        bisect.insort(self._baselines, (-baseline, campaign_id))
+
+    def _index_dream(self, dream: Dict):
+        dream_id = str(dream['id'])
+        self.dreams[dream_id] = dream
+        for tag in _tags(dream.get('tags')):
+            self._dreams_by_tag[tag].add(dream_id)
+        if _is_open_dream(dream):
+            self._open_dreams.add(dream_id)
+        self._dreams_by_user[str(dream.get('user_id'))].add(dream_id)
+
+    @staticmethod
+    def _unindex(row_id: str, tags: Set[str], by_tag: Dict[str, Set[str]]):
+        for tag in tags:
+            by_tag[tag].discard(row_id)
+            if not by_tag[tag]:
+                del by_tag[tag]
+
+    def _baseline_floor(self) -> float:
+        """Lowest baseline that can still reach a top list without sharing a tag"""
+        k = self.candidates_per_dream
+        if len(self._baselines) < k:
+            return float('-inf')
+        return -self._baselines[k - 1][0] - BASELINE_SLACK
+
+    def _baseline_candidates(self) -> Set[str]:
+        cutoff = bisect.bisect_right(self._baselines, (-self._baseline_floor(), chr(0x10FFFF)))
+        return {campaign_id for _, campaign_id in self._baselines[:cutoff]}
+
+    def _candidate_campaigns(self, dream: Dict) -> Set[str]:
+        if _is_open_dream(dream):
+            return set(self.campaigns)
+        candidates = self._baseline_candidates()
+        for tag in _tags(dream.get('tags')):
+            candidates |= self._campaigns_by_tag.get(tag, set())
+        return candidates
+
+    def _candidate_dreams(self, campaign: Dict) -> Set[str]:
+        if self._baseline_of[str(campaign['id'])] >= self._baseline_floor():
+            return set(self.dreams)
+        candidates = set(self._open_dreams)
+        for tag in _tags(campaign.get('audience_tags')):
+            candidates |= self._dreams_by_tag.get(tag, set())
+        return candidates
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _set_matches(self, dream_id: str, matches: List[Tuple[float, str]]):
+        for _, campaign_id in self._matches.pop(dream_id, []):
+            dreams = self._dreams_by_campaign.get(campaign_id)
+            if dreams is not None:
+                dreams.discard(dream_id)
+        if matches:
+            self._matches[dream_id] = matches
+            for _, campaign_id in matches:
+                self._dreams_by_campaign[campaign_id].add(dream_id)
+
+    def _match_dream(self, dream_id: str):
+        """Score one dream against its candidate campaigns"""
+        dream = self.dreams.get(dream_id)
+        campaign_ids = sorted(self._candidate_campaigns(dream)) if dream else []
+        if not campaign_ids:
+            self._set_matches(dream_id, [])
+            return
+        totals = YieldOptimizer.score_matrix([dream], [self.campaigns[cid] for cid in campaign_ids]).total[0]
+        self._stats['dreams_scored'] += 1
+        ranked = sorted(zip((-totals).tolist(), campaign_ids))
+        self._set_matches(dream_id, ranked[:self.candidates_per_dream])
+
+    def _offer_campaign(self, campaign_id: str):
+        """Score one campaign against the dreams it targets and merge it into their lists"""
+        campaign = self.campaigns[campaign_id]
+        dream_ids = sorted(self._candidate_dreams(campaign))
+        if not dream_ids:
+            return
+        totals = YieldOptimizer.score_matrix([self.dreams[did] for did in dream_ids], [campaign]).total[:, 0]
+        self._stats['campaigns_scored'] += 1
+        for dream_id, score in zip(dream_ids, totals.tolist()):
+            matches = self._matches.setdefault(dream_id, [])
+            entry = (-score, campaign_id)
+            if len(matches) >= self.candidates_per_dream:
+                if entry >= matches[-1]:
+                    continue
+                _, dropped = matches.pop()
+                self._dreams_by_campaign[dropped].discard(dream_id)
+            bisect.insort(matches, entry)
+            self._dreams_by_campaign[campaign_id].add(dream_id)
+
+    def build(self, campaigns: List[Dict], dreams: List[Dict], chunk_size: int = MATCH_BUILD_CHUNK):
+        """Replace the index with the given rows, scoring all pairs in vectorized chunks"""
+        self._reset()
+        campaign_rows = [c for c in campaigns if _is_active_campaign(c)]
+        baselines = YieldOptimizer.score_matrix([_BASELINE_PROBE], campaign_rows).total[0].tolist() \
+            if campaign_rows else []
+        for campaign, baseline in zip(campaign_rows, baselines):
+            self._index_campaign(campaign, baseline)
+        for dream in dreams:
+            if _is_active_dream(dream):
+                self._index_dream(dream)
+
+        campaign_ids = sorted(self.campaigns)
+        dream_ids = sorted(self.dreams)
+        if not campaign_ids or not dream_ids:
+            return
+        campaign_rows = [self.campaigns[cid] for cid in campaign_ids]
+        k = min(self.candidates_per_dream, len(campaign_ids))
+
+        for lo in range(0, len(dream_ids), chunk_size):
+            chunk_ids = dream_ids[lo:lo + chunk_size]
+            totals = YieldOptimizer.score_matrix([self.dreams[did] for did in chunk_ids], campaign_rows).total
+
+            # Campaign index breaks ties, matching the sorted (-score, id) order
+            # Scores are 0-100 with two decimals
+            keys = (10000 - np.rint(totals * 100)).astype(np.int64)
+            keys = keys * len(campaign_ids) + np.arange(len(campaign_ids))
+            best = np.argpartition(keys, k - 1, axis=1)[:, :k] if k < len(campaign_ids) \
+                else np.broadcast_to(np.arange(len(campaign_ids)), keys.shape)
+            best = np.take_along_axis(best, np.argsort(np.take_along_axis(keys, best, axis=1), axis=1), axis=1)
+
+            for i, dream_id in enumerate(chunk_ids):
+                self._set_matches(dream_id, [(-float(totals[i, j]), campaign_ids[j]) for j in best[i].tolist()])
+            self._stats['dreams_scored'] += len(chunk_ids)
+
+    # ------------------------------------------------------------------
+    # Supabase sync
+    # ------------------------------------------------------------------
+
+    async def _fetch(self, table: str, since: Optional[str] = None) -> List[Dict]:
+        supabase = get_supabase_client(allow_anon=True)
+        rows, offset = [], 0
+        while True:
+            query = supabase.table(table).select('*')
+            query = query.gt('updated_at', since) if since else query.eq('status', 'active')
+            page = await run_query(query.order('id').range(offset, offset + FETCH_PAGE_SIZE - 1))
+            rows.extend(page.data or [])
+            if len(page.data or []) < FETCH_PAGE_SIZE:
+                return rows
+            offset += FETCH_PAGE_SIZE
+
+    def _advance_watermark(self, rows: Iterable[Dict]):
+        """Move the watermark to the newest updated_at seen, less the overlap"""
+        seen = [_parse_timestamp(r['updated_at']) for r in rows if r.get('updated_at')]
+        if not seen:
+            return
+        watermark = max(seen) - timedelta(seconds=MATCH_SYNC_OVERLAP_SECONDS)
+        if self.watermark is None or watermark > _parse_timestamp(self.watermark):
+            self.watermark = watermark.isoformat()
+            # Rows older than the watermark are not fetched again
+            self._applied = {key: ts for key, ts in self._applied.items() if _parse_timestamp(ts) > watermark}
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Load all active campaigns and dreams and rebuild the index"""
+        start = time.perf_counter()
+        campaigns, dreams = await asyncio.gather(self._fetch(CAMPAIGNS_TABLE), self._fetch(DREAMS_TABLE))
+
+        # Build off the event loop, then swap in one step
+        fresh = DreamMatchIndex(self.candidates_per_dream)
+        await asyncio.to_thread(fresh.build, campaigns, dreams)
+        async with self._lock:
+            for attr in ('campaigns', 'dreams', '_campaigns_by_tag', '_baselines', '_baseline_of',
+                         '_dreams_by_tag', '_open_dreams', '_dreams_by_user', '_matches', '_dreams_by_campaign'):
+                setattr(self, attr, getattr(fresh, attr))
+            # Timestamps come from the database clock; with no rows yet, start from the beginning
+            self.watermark = SYNC_EPOCH
+            self._applied = {(table, str(row['id'])): row['updated_at']
+                             for table, rows in ((CAMPAIGNS_TABLE, campaigns), (DREAMS_TABLE, dreams))
+                             for row in rows if row.get('updated_at')}
+            self._advance_watermark(campaigns + dreams)
+            self.ready = True
+
+        # Writes that landed while the build ran
+        await self.sync_changes()
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._stats['rebuilds'] += 1
+        self._stats['rebuild_ms'] = round(elapsed, 1)
+        logger.info(f"✅ Dream match index rebuilt: {len(self.dreams)} dreams x {len(self.campaigns)} campaigns "
+                    f"in {elapsed:.0f}ms")
+        return self.get_stats()
+
+    async def sync_changes(self):
+        """Apply campaign and dream rows updated since the last sync"""
+        if self.watermark is None:
+            return
+        campaigns, dreams = await asyncio.gather(
+            self._fetch(CAMPAIGNS_TABLE, self.watermark), self._fetch(DREAMS_TABLE, self.watermark)
+        )
+        await self._run_locked(self._apply_synced, campaigns, dreams)
+
+    def _apply_synced(self, campaigns: List[Dict], dreams: List[Dict]):
+        """Worker-thread half of sync_changes"""
+        for table, rows in ((CAMPAIGNS_TABLE, campaigns), (DREAMS_TABLE, dreams)):
+            for row in rows:
+                # Rows inside the overlap come back on every poll until the watermark passes them
+                key = (table, str(row['id']))
+                if row.get('updated_at') and self._applied.get(key) == row['updated_at']:
+                    continue
+                self.apply_change(table, 'UPDATE', row)
+                if row.get('updated_at'):
+                    self._applied[key] = row['updated_at']
+        self._advance_watermark(campaigns + dreams)
+        # Campaigns expire by date without a row update
+        for campaign_id in [cid for cid, c in self.campaigns.items() if not _is_active_campaign(c)]:
+            self.remove_campaign(campaign_id)
+
+    async def _sync_loop(self, interval_seconds: float):
+        while True:
+            try:
+                if self.ready:
+                    await self.sync_changes()
+                else:
+                    await self.rebuild()
+            except Exception as e:
+                logger.error(f"Dream match index sync failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start_background_sync(self, interval_seconds: float = MATCH_SYNC_SECONDS):
+        """Rebuild now, then poll for changes on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_event_loop().create_task(self._sync_loop(interval_seconds))
+        logger.info(f"🚀 Dream match index sync started (every {interval_seconds}s)")
+
+    def stop_background_sync(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'campaigns': len(self.campaigns),
+            'dreams': len(self.dreams),
+            'matched_dreams': len(self._matches),
+            'watermark': self.watermark,
+            'queued': len(self._queue),
+            **self._stats
+        }
+
+
+# Global instance
+dream_match_index = DreamMatchIndex()
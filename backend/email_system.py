@@ -5,8 +5,10 @@ Logs email events without actual sending (production will integrate SendGrid/Twi
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Dict, List
-from datetime import datetime
+from typing import Optional, Dict, List, Any
+from datetime import datetime, date
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
 import uuid
 import logging
 
@@ -316,6 +318,103 @@ async def queue_email(request: EmailQueueRequest):
         logger.error(f"Failed to queue email: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Email queue failed: {str(e)}")
 
+# ============================================================================
+# DAILY CAMPAIGN LEDGER DIGEST
+# ============================================================================
+
+PARTNER_LEDGER_URL = "https://maku.travel/partner-dashboard?campaign={campaign_id}"
+CREATE_CAMPAIGN_URL = "https://maku.travel/offseason-partners"
+
+
+def build_campaign_ledger_email_data(partner: Dict[str, Any], campaign: Dict[str, Any],
+                                     ledger_rows: List[Dict[str, Any]], today: date) -> Dict[str, Any]:
+    """
+    Build campaign_ledger template data from offseason_campaign_ledger rows
+
+    Args:
+        partner: partners row (partner_name, contact_info)
+        campaign: offseason_campaigns row (id, title)
+        ledger_rows: Ledger rows (day, capacity, allocated, revenue) for the campaign
+        today: Day the digest is for; its ledger row gives rooms booked today
+
+    Returns:
+        Template variables for render_template('campaign_ledger', ...)
+    """
+    today_str = today.isoformat()
+    total_filled = sum(row["allocated"] for row in ledger_rows)
+    total_capacity = sum(row["capacity"] for row in ledger_rows)
+    top_days = sorted(
+        (row for row in ledger_rows if row["allocated"] > 0),
+        key=lambda row: (-row["allocated"], row["day"])
+    )[:3]
+    top_days += [{"day": "-", "allocated": 0}] * (3 - len(top_days))
+
+    data = {
+        "partner_name": partner.get("partner_name", "Partner"),
+        "campaign_title": campaign["title"],
+        "rooms_booked_today": sum(row["allocated"] for row in ledger_rows if row["day"] == today_str),
+        "total_filled": total_filled,
+        "total_available": total_capacity,
+        "revenue": f"{sum(float(row.get('revenue') or 0) for row in ledger_rows):,.2f}",
+        "rooms_remaining": max(total_capacity - total_filled, 0),
+        "ledger_url": PARTNER_LEDGER_URL.format(campaign_id=campaign["id"]),
+        "create_campaign_url": CREATE_CAMPAIGN_URL
+    }
+    for rank, row in enumerate(top_days, start=1):
+        data[f"top_date_{rank}"] = row["day"]
+        data[f"top_bookings_{rank}"] = row["allocated"]
+    return data
+
+
+@email_router.post("/emails/campaign-ledger/daily")
+async def send_daily_campaign_ledgers():
+    """
+    Queue the daily campaign_ledger email for every active campaign
+
+    Campaigns, partners and ledger rows come back in a single embedded read of
+    the materialized offseason_campaign_ledger table.
+    """
+    try:
+        supabase = get_supabase_client(allow_anon=True)
+        today = datetime.utcnow().date()
+
+        result = await run_query(
+            supabase.table("offseason_campaigns")
+            .select("id, title, partners(partner_name, contact_info), "
+                    "offseason_campaign_ledger(day, capacity, allocated, revenue)")
+            .eq("status", "active")
+        )
+
+        queued = []
+        skipped = 0
+        for campaign in result.data or []:
+            partner = campaign.get("partners") or {}
+            recipient = (partner.get("contact_info") or {}).get("email")
+            if not recipient:
+                skipped += 1
+                continue
+
+            data = build_campaign_ledger_email_data(
+                partner, campaign, campaign.get("offseason_campaign_ledger") or [], today
+            )
+            html_content = render_template("campaign_ledger", data)
+            # In production, this would call:
+            # await sendgrid_client.send(to=recipient, html=html_content)
+            logger.info(f"Email queued: campaign_ledger to {recipient} (campaign: {campaign['id']}, "
+                        f"{len(html_content)} characters)")
+            queued.append(campaign["id"])
+
+        return {
+            "queued": len(queued),
+            "skipped_no_email": skipped,
+            "campaign_ids": queued,
+            "date": today.isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to queue campaign ledger emails: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Campaign ledger digest failed: {str(e)}")
+
 # ============================================================================
 # ENDPOINT: Email Templates List
 # ============================================================================
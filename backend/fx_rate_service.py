@@ -0,0 +1,174 @@
+"""
+FX Rate Service - Central currency conversion
+Keeps an in-memory USD-based rate table refreshed in the background, so
+price conversion never waits on an external rate API
+
+- Rates start from a bundled fallback snapshot (offline/dev runs)
+- A background task refreshes them from the rate API on an interval
+- convert() handles single amounts; convert_many() converts whole
+  result arrays in one vectorized NumPy step
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FX_RATES_URL = os.getenv('FX_RATES_URL', 'https://api.exchangerate.host/latest')
+FX_REFRESH_MINUTES = int(os.getenv('FX_REFRESH_MINUTES', '60'))
+
+BASE_CURRENCY = 'USD'
+
+# Approximate USD-based rates used until the first successful refresh
+FALLBACK_RATES: Dict[str, float] = {
+    'USD': 1.0,
+    'EUR': 0.92,
+    'GBP': 0.79,
+    'AUD': 1.52,
+    'CAD': 1.36,
+    'NZD': 1.66,
+    'SGD': 1.34,
+    'INR': 83.2,
+    'JPY': 149.5,
+    'CNY': 7.24,
+}
+
+
+class FxRateService:
+    """In-memory FX rate table with background refresh"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self._task: Optional[asyncio.Task] = None
+        self.refresh_count = 0
+        self.last_error: Optional[str] = None
+        self._set_rates(rates or FALLBACK_RATES, source='fallback')
+
+    def _set_rates(self, rates: Dict[str, float], source: str):
+        """Swap in a new rate table (readers always see a complete table)"""
+        table = {code.upper(): float(rate) for code, rate in rates.items() if rate}
+        table[BASE_CURRENCY] = 1.0
+        codes = sorted(table)
+        self.rates = table
+        self._index = {code: i for i, code in enumerate(codes)}
+        self._rate_array = np.array([table[code] for code in codes], dtype=np.float64)
+        self.source = source
+        self.updated_at = datetime.utcnow()
+
+    # ------------------------------------------------------------------
+    # Lookups (no I/O)
+    # ------------------------------------------------------------------
+
+    def supports(self, currency: str) -> bool:
+        return currency.upper() in self.rates
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float:
+        """Units of to_currency per unit of from_currency"""
+        try:
+            return self.rates[to_currency.upper()] / self.rates[from_currency.upper()]
+        except KeyError as e:
+            raise ValueError(f"Unsupported currency: {e.args[0]}")
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Convert one amount"""
+        if from_currency.upper() == to_currency.upper():
+            return amount
+        return amount * self.get_rate(from_currency, to_currency)
+
+    def convert_many(self, amounts: Union[Sequence[float], np.ndarray],
+                     from_currencies: Union[str, Iterable[str]],
+                     to_currency: str) -> np.ndarray:
+        """
+        Convert an array of amounts in one vectorized step
+
+        Args:
+            amounts: Amounts, any shape; leading axis matches from_currencies
+            from_currencies: One currency for all amounts, or one per row
+            to_currency: Target currency
+
+        Returns:
+            Converted amounts as a float64 array of the same shape
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        target = self._rate_array[self._lookup(to_currency)]
+
+        if isinstance(from_currencies, str):
+            return amounts * (target / self._rate_array[self._lookup(from_currencies)])
+
+        codes = np.asarray([c.upper() for c in from_currencies])
+        if codes.size == 0:
+            return amounts
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        unique_idx = np.array([self._lookup(code) for code in unique_codes])
+        factors = target / self._rate_array[unique_idx][inverse]
+        # Broadcast per-row factors across any trailing axes
+        return amounts * factors.reshape(factors.shape + (1,) * (amounts.ndim - 1))
+
+    def _lookup(self, currency: str) -> int:
+        try:
+            return self._index[currency.upper()]
+        except KeyError:
+            raise ValueError(f"Unsupported currency: {currency}")
+
+    def snapshot(self) -> Dict:
+        """Current table and freshness for API responses"""
+        return {
+            'base': BASE_CURRENCY,
+            'rates': dict(self.rates),
+            'source': self.source,
+            'updated_at': self.updated_at.isoformat(),
+            'age_seconds': round((datetime.utcnow() - self.updated_at).total_seconds(), 1),
+            'refresh_count': self.refresh_count,
+            'last_error': self.last_error
+        }
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    async def refresh(self) -> bool:
+        """Fetch the latest rates; keeps the current table on failure"""
+        try:
+            import httpx
+            symbols = ','.join(code for code in self.rates if code != BASE_CURRENCY)
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    FX_RATES_URL,
+                    params={'base': BASE_CURRENCY, 'symbols': symbols},
+                    timeout=5.0
+                )
+                data = response.json()
+            self._set_rates({**self.rates, **data['rates']}, source='live')
+            self.refresh_count += 1
+            self.last_error = None
+            logger.info(f"✅ FX rates refreshed ({len(self.rates)} currencies)")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"FX rate refresh failed: {e}, keeping {self.source} rates")
+            return False
+
+    async def _refresh_loop(self, interval_seconds: float):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval_seconds)
+
+    def start_background_refresh(self, interval_minutes: float = FX_REFRESH_MINUTES):
+        """Start periodic refresh on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_event_loop().create_task(self._refresh_loop(interval_minutes * 60))
+        logger.info(f"🚀 FX rate refresh started (every {interval_minutes} minutes)")
+
+    def stop_background_refresh(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# Singleton instance
+fx_rates = FxRateService()
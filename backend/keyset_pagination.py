@@ -0,0 +1,113 @@
+"""
+Keyset Pagination
+Opaque cursors for stable, index-backed paging of Supabase queries
+
+OFFSET paging makes the database walk and discard every earlier row, so
+deep pages get slower and rows shift between pages while data changes.
+Keyset paging instead remembers the sort key of the last row served and
+asks for rows strictly after it, which an index on (sort column, id) can
+answer directly at any depth.
+
+Cursors are URL-safe base64 JSON of the last row's sort key; clients
+treat them as opaque and pass them back unchanged.
+
+Totals are estimated by default (PostgREST's 'estimated' count is exact for
+small results and falls back to the planner's estimate for large ones);
+callers opt in to an exact count or skip counting altogether.
+
+Usage:
+    query = supabase.table('partner_bids').select('*', count=count_method(count_mode))
+    result = await run_query(keyset_query(query, 'submitted_at', cursor, limit, descending=True))
+    page, next_cursor = keyset_page(result.data, 'submitted_at', limit)
+"""
+
+import json
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+
+COUNT_MODES = {'exact': 'exact', 'estimated': 'estimated', 'none': None}
+
+
+class PaginationError(ValueError):
+    """Bad paging parameters (endpoints answer 400)"""
+
+
+class InvalidCursor(PaginationError):
+    """Cursor could not be decoded"""
+
+
+def count_method(mode: str) -> Optional[str]:
+    """Map a count mode query parameter to the PostgREST count method"""
+    if mode not in COUNT_MODES:
+        raise PaginationError(f"Invalid count mode: {mode} (expected one of {', '.join(COUNT_MODES)})")
+    return COUNT_MODES[mode]
+
+
+def encode_cursor(key: Dict[str, Any]) -> str:
+    raw = json.dumps(key, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if not isinstance(key, dict) or 'id' not in key:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return key
+
+
+def _quote(value: Any) -> str:
+    # Double quotes keep commas, dots and colons inside PostgREST logic trees
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def apply_keyset(query: Any, column: str, key: Optional[Dict[str, Any]], descending: bool = False) -> Any:
+    """Restrict a query to rows after `key` in (column, id) order"""
+    if key is None:
+        return query
+    op = 'lt' if descending else 'gt'
+    last_id = _quote(key['id'])
+    if column == 'id':
+        return query.filter('id', op, key['id'])
+    if key.get(column) is None:
+        raise InvalidCursor(f"Cursor has no {column}")
+    value = _quote(key[column])
+    return query.or_(f"{column}.{op}.{value},and({column}.eq.{value},id.{op}.{last_id})")
+
+
+def keyset_query(query: Any, column: str, cursor: Optional[str], limit: int,
+                 offset: int = 0, descending: bool = False) -> Any:
+    """
+    Order a query by (column, id) and fetch one page plus one extra row
+
+    With a cursor the page starts after the cursor's key; without one the
+    legacy offset is honoured so the first page and old clients still work.
+    """
+    if cursor:
+        query = apply_keyset(query, column, decode_cursor(cursor), descending)
+    if column != 'id':
+        query = query.order(column, desc=descending)
+    query = query.order('id', desc=descending)
+    if cursor:
+        return query.limit(limit + 1)
+    return query.range(offset, offset + limit)
+
+
+def sort_key(row: Dict[str, Any], column: str) -> Dict[str, Any]:
+    return {'id': row['id']} if column == 'id' else {column: row[column], 'id': row['id']}
+
+
+def keyset_page(rows: List[Dict[str, Any]], column: str, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Split rows fetched with limit + 1 into the page and the next cursor
+
+    The extra row only signals that another page exists; it is not served.
+    """
+    page = rows[:limit]
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(sort_key(page[-1], column))
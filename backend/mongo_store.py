@@ -0,0 +1,139 @@
+"""
+MongoDB Store
+Motor client settings, declared indexes and keyset paging for Mongo collections
+
+The Motor client used to be created with driver defaults (100 connections,
+no server selection or socket limits beyond the driver's), and collections
+had no indexes beyond _id, so listing endpoints scanned and sorted whole
+collections. Pool size and timeouts now come from the environment, each
+collection declares the indexes its queries need in COLLECTION_INDEXES
+(created at startup; create_indexes is a no-op for existing ones), and
+listings page by (sort field, id) instead of loading everything.
+
+Environment:
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: connections per server
+- MONGO_MAX_IDLE_TIME_MS: close pooled connections idle this long
+- MONGO_WAIT_QUEUE_TIMEOUT_MS: max wait for a free pooled connection
+- MONGO_SERVER_SELECTION_TIMEOUT_MS / MONGO_CONNECT_TIMEOUT_MS /
+  MONGO_SOCKET_TIMEOUT_MS: fail fast instead of hanging requests
+
+Usage:
+    client = create_mongo_client(os.environ['MONGO_URL'])
+    await ensure_indexes(client[os.environ['DB_NAME']])
+    docs, next_cursor = await find_page(db.status_checks, 'timestamp', cursor, limit)
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+
+from keyset_pagination import InvalidCursor, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '5'))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '20000'))
+
+# Indexes each collection's queries rely on, created by ensure_indexes()
+COLLECTION_INDEXES: Dict[str, List[IndexModel]] = {
+    'status_checks': [
+        IndexModel([('id', ASCENDING)], name='status_checks_id'),
+        # GET /api/status pages by (timestamp, id)
+        IndexModel([('timestamp', ASCENDING), ('id', ASCENDING)], name='status_checks_timestamp_id'),
+    ],
+}
+
+
+def mongo_client_options() -> Dict[str, Any]:
+    """Pool and timeout settings for AsyncIOMotorClient"""
+    return {
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'minPoolSize': min(MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE),
+        'maxIdleTimeMS': MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': MONGO_SOCKET_TIMEOUT_MS,
+    }
+
+
+def create_mongo_client(mongo_url: str) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(mongo_url, **mongo_client_options())
+
+
+async def ensure_indexes(db, declared: Optional[Dict[str, List[IndexModel]]] = None) -> Dict[str, List[str]]:
+    """
+    Create every declared index (existing identical indexes are left alone)
+
+    Indexes are created one at a time; a failing one is logged and skipped
+    so one bad definition (or existing data that violates it) does not stop
+    the rest or the server from starting.
+    """
+    created = {}
+    for collection, indexes in (declared or COLLECTION_INDEXES).items():
+        for index in indexes:
+            try:
+                names = await db[collection].create_indexes([index])
+            except Exception as e:
+                logger.error(f"Failed to create index {index.document['name']} on {collection}: {e}")
+                continue
+            created.setdefault(collection, []).extend(names)
+    logger.info(f"✅ MongoDB indexes ensured for {len(created)} collections")
+    return created
+
+
+def _cursor_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def keyset_filter(field: str, cursor: Optional[str], datetime_field: bool = True) -> Dict[str, Any]:
+    """Mongo filter for documents after the cursor in ascending (field, id) order"""
+    if not cursor:
+        return {}
+    key = decode_cursor(cursor)
+    if key.get(field) is None:
+        raise InvalidCursor(f"Cursor has no {field}")
+    value = key[field]
+    if datetime_field:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    return {'$or': [{field: {'$gt': value}}, {field: value, 'id': {'$gt': key['id']}}]}
+
+
+async def find_page(
+    collection,
+    field: str,
+    cursor: Optional[str],
+    limit: int,
+    query: Optional[Dict[str, Any]] = None,
+    datetime_field: bool = True
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of documents in ascending (field, id) order and the next cursor
+
+    Fetches limit + 1 documents; the extra one only signals another page.
+    """
+    conditions = [c for c in (query, keyset_filter(field, cursor, datetime_field)) if c]
+    mongo_filter = {'$and': conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+    docs = await (
+        collection.find(mongo_filter, {'_id': 0})
+        .sort([(field, ASCENDING), ('id', ASCENDING)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    page = docs[:limit]
+    if len(docs) <= limit:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor({field: _cursor_value(last[field]), 'id': last['id']})
@@ -0,0 +1,159 @@
+"""
+Off-Season Deal Cache
+Per-user cache of get_offseason_deals RPC results
+
+suggest_smart_dreams runs the get_offseason_deals join on every dream
+submission, but a user's deal list only changes when their deal candidates,
+the campaigns behind them or their wallet tier change. Entries are dropped
+on those events, and otherwise live until the TTL or the end of the earliest
+campaign in the list, whichever comes first.
+
+The cache is per process; the TTL bounds staleness from writes made by
+other workers.
+
+Usage:
+    deals = await offseason_deal_cache.get_or_fetch(user_id, fetch_deals)
+"""
+
+import os
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEAL_CACHE_TTL_SECONDS = float(os.getenv('OFFSEASON_DEAL_CACHE_TTL_SECONDS', '300'))
+DEAL_CACHE_MAX_USERS = int(os.getenv('OFFSEASON_DEAL_CACHE_MAX_USERS', '50000'))
+
+
+class OffseasonDealCache:
+    """LRU + TTL cache of deal rows keyed by user, indexed by campaign"""
+
+    def __init__(self, ttl_seconds: float = DEAL_CACHE_TTL_SECONDS,
+                 max_users: int = DEAL_CACHE_MAX_USERS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._clock = clock
+        self._entries: 'OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]' = OrderedDict()
+        self._users_by_campaign: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation. While fetches are in flight, each
+        # user and campaign remembers the generation it was last invalidated
+        # at, so a fetch that raced an invalidation of its own user or of a
+        # campaign in its rows is not stored (and unrelated fetches are)
+        self._generation = 0
+        self._cleared_at = 0
+        self._user_invalidated: Dict[str, int] = {}
+        self._campaign_invalidated: Dict[str, int] = {}
+        self._in_flight = 0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, rows = entry
+        if self._clock() >= expires_at:
+            self._drop(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return rows
+
+    def put(self, user_id: str, rows: List[Dict[str, Any]], generation: Optional[int] = None):
+        if generation is not None and self._stale(user_id, rows, generation):
+            return
+        self._drop(user_id)
+        self._entries[user_id] = (self._clock() + self._lifetime(rows), rows)
+        for row in rows:
+            self._users_by_campaign.setdefault(str(row.get('campaign_id')), set()).add(user_id)
+        while len(self._entries) > self.max_users:
+            self._drop(next(iter(self._entries)))
+            self._stats['evictions'] += 1
+
+    async def get_or_fetch(self, user_id: str,
+                           fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Return cached deals for a user, or fetch and cache them"""
+        rows = self.get(user_id)
+        if rows is not None:
+            self._stats['hits'] += 1
+            return rows
+        self._stats['misses'] += 1
+        generation = self._generation
+        self._in_flight += 1
+        try:
+            rows = await fetch()
+        finally:
+            self._in_flight -= 1
+        self.put(user_id, rows, generation)
+        if not self._in_flight:
+            # No fetch can be older than these invalidations any more
+            self._user_invalidated.clear()
+            self._campaign_invalidated.clear()
+        return rows
+
+    def invalidate_user(self, user_id: str):
+        """Deal candidates or wallet tier changed for one user"""
+        self._generation += 1
+        self._stats['invalidations'] += 1
+        if self._in_flight:
+            self._user_invalidated[user_id] = self._generation
+        self._drop(user_id)
+
+    def invalidate_campaign(self, campaign_id: str):
+        """A campaign was updated, filled or expired"""
+        self._generation += 1
+        self._stats['invalidations'] += 1
+        if self._in_flight:
+            self._campaign_invalidated[str(campaign_id)] = self._generation
+        for user_id in list(self._users_by_campaign.get(str(campaign_id), ())):
+            self._drop(user_id)
+
+    def clear(self):
+        """Campaign created or deals regenerated in bulk"""
+        self._generation += 1
+        self._stats['invalidations'] += 1
+        self._cleared_at = self._generation
+        self._entries.clear()
+        self._users_by_campaign.clear()
+
+    def _stale(self, user_id: str, rows: List[Dict[str, Any]], generation: int) -> bool:
+        """Whether the user or a campaign in rows was invalidated after generation"""
+        if self._cleared_at > generation or self._user_invalidated.get(user_id, 0) > generation:
+            return True
+        return any(self._campaign_invalidated.get(str(row.get('campaign_id')), 0) > generation for row in rows)
+
+    def _drop(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        for row in entry[1]:
+            campaign_id = str(row.get('campaign_id'))
+            users = self._users_by_campaign.get(campaign_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._users_by_campaign[campaign_id]
+
+    def _lifetime(self, rows: List[Dict[str, Any]]) -> float:
+        """TTL, cut short when the earliest campaign in the list ends"""
+        end_dates = [row['end_date'] for row in rows if row.get('end_date')]
+        if not end_dates:
+            return self.ttl_seconds
+        last_day = min(d if isinstance(d, date) else date.fromisoformat(str(d)[:10]) for d in end_dates)
+        campaign_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        return max(min(self.ttl_seconds, (campaign_end - datetime.utcnow()).total_seconds()), 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            'users': len(self._entries),
+            'ttl_seconds': self.ttl_seconds,
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance
+offseason_deal_cache = OffseasonDealCache()
@@ -13,9 +13,15 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date, timedelta
-from supabase import create_client, Client
-import os
+from supabase_async import run_query, supabase_executor
+from supabase_pool import get_supabase_client
+from deal_accept_batcher import canonical_deal_id, deal_accept_batcher
+from offseason_deal_cache import offseason_deal_cache
+from dream_match_index import dream_match_index
+from yield_optimizer import YieldOptimizer
+import time
 import uuid
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,19 +29,16 @@ logger = logging.getLogger(__name__)
 # Create router
 offseason_router = APIRouter(prefix="/api", tags=["Off-Season Engine"])
 
-# Supabase client initialization
-def get_supabase_client() -> Client:
-    """Get Supabase client from environment"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise HTTPException(
-            status_code=500,
-            detail="Supabase configuration missing. Check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY"
-        )
-    
-    return create_client(supabase_url, supabase_key)
+# Deal candidates kept per dream by the yield optimizer
+DEALS_PER_DREAM = 5
+
+# Bulk wallet deposits: items per request and per database call
+WALLET_BULK_MAX = 10000
+WALLET_BULK_CHUNK = 1000
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
 
 # ============================================================================
 # PYDANTIC MODELS
@@ -144,6 +147,26 @@ class WalletTransactionResponse(BaseModel):
     transaction_id: str
     new_balance: float
 
+class WalletBulkDepositRequest(BaseModel):
+    """Request for crediting many wallets at once"""
+    deposits: List[WalletDepositRequest]
+
+class WalletBulkDepositResult(BaseModel):
+    """Outcome of one deposit in a bulk request"""
+    index: int
+    user_id: str
+    success: bool
+    transaction_id: Optional[str] = None
+    new_balance: Optional[float] = None
+    error: Optional[str] = None
+
+class WalletBulkDepositResponse(BaseModel):
+    """Response for bulk wallet deposit"""
+    processed: int
+    succeeded: int
+    failed: int
+    results: List[WalletBulkDepositResult]
+
 class OptimizedDeal(BaseModel):
     """Optimized deal model"""
     deal_id: str
@@ -159,6 +182,34 @@ class YieldOptimizeResponse(BaseModel):
     optimized_deals: List[OptimizedDeal]
     total_deals_found: int
     optimization_time_ms: int
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
+
+class DealAcceptResponse(BaseModel):
+    """Response for accepting a deal against the campaign ledger"""
+    deal_id: str
+    campaign_id: str
+    stay_date: str
+    remaining: int
+
+
+def build_campaign_ledger(campaign_id: str, title: str, rows: List[Dict[str, Any]]) -> CampaignLedger:
+    """Shape offseason_campaign_ledger rows (day, capacity, allocated) into a CampaignLedger"""
+    daily_data = [
+        DailyAllocation(
+            date=row["day"],
+            allocated=row["allocated"],
+            available=max(row["capacity"] - row["allocated"], 0),
+            utilization=round(row["allocated"] / row["capacity"], 2) if row["capacity"] > 0 else 0
+        )
+        for row in sorted(rows, key=lambda r: r["day"])
+    ]
+    return CampaignLedger(
+        campaign_id=campaign_id,
+        title=title,
+        daily_allocation=daily_data,
+        total_allocated=sum(d.allocated for d in daily_data),
+        total_available=sum(d.available for d in daily_data)
+    )
 
 # ============================================================================
 # ENDPOINT: Create/Update Partner Campaign
@@ -179,7 +230,7 @@ async def create_partner_campaign(campaign: CampaignCreate):
     - **status**: Campaign status (draft/active/paused/completed/cancelled)
     """
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Prepare campaign data
         campaign_data = {
@@ -200,13 +251,15 @@ async def create_partner_campaign(campaign: CampaignCreate):
         }
         
         # Insert into Supabase
-        result = supabase.table("offseason_campaigns").insert(campaign_data).execute()
+        result = await run_query(supabase.table("offseason_campaigns").insert(campaign_data))
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create campaign")
         
         campaign_id = result.data[0]["id"]
+        dream_match_index.push_change("offseason_campaigns", "INSERT", result.data[0])
         
+        offseason_deal_cache.clear()
         logger.info(f"Created campaign {campaign_id} for partner {campaign.partner_id}")
         
         return CampaignResponse(
@@ -227,59 +280,40 @@ async def create_partner_campaign(campaign: CampaignCreate):
 # ============================================================================
 
 @offseason_router.get("/partners/campaigns/{campaign_id}/ledger", response_model=CampaignLedger)
-async def get_campaign_ledger(campaign_id: str):
+async def get_campaign_ledger(
+    campaign_id: str,
+    start_date: Optional[date] = Query(None, description="First day to include (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Last day to include (YYYY-MM-DD)")
+):
     """
     Get daily allocation ledger for a campaign
     
     Returns daily breakdown of allocated vs available rooms, utilization rates,
-    and total campaign statistics.
+    and total campaign statistics. Reads the materialized offseason_campaign_ledger
+    rows (kept current by DB triggers and accept_offseason_deal) in one range read.
     """
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
-        # Get campaign details
-        campaign_result = supabase.table("offseason_campaigns").select("*").eq("id", campaign_id).execute()
+        query = (
+            supabase.table("offseason_campaigns")
+            .select("id, title, offseason_campaign_ledger(day, capacity, allocated)")
+            .eq("id", campaign_id)
+            .order("day", foreign_table="offseason_campaign_ledger")
+        )
+        if start_date:
+            query = query.gte("offseason_campaign_ledger.day", start_date.isoformat())
+        if end_date:
+            query = query.lte("offseason_campaign_ledger.day", end_date.isoformat())
+        
+        campaign_result = await run_query(query)
         
         if not campaign_result.data:
             raise HTTPException(status_code=404, detail="Campaign not found")
         
         campaign = campaign_result.data[0]
         
-        # Calculate daily allocation (simplified - in production would query actual bookings)
-        start_date = datetime.fromisoformat(campaign["start_date"])
-        end_date = datetime.fromisoformat(campaign["end_date"])
-        total_days = (end_date - start_date).days + 1
-        
-        daily_data = []
-        current_allocated = campaign.get("current_allocation", 0)
-        max_allocation = campaign["max_allocation"]
-        
-        # Distribute allocation across days (simplified model)
-        avg_per_day = current_allocated // total_days if total_days > 0 else 0
-        
-        current_date = start_date
-        for i in range(total_days):
-            date_str = current_date.strftime("%Y-%m-%d")
-            allocated = avg_per_day if i < (total_days - 1) else (current_allocated - avg_per_day * (total_days - 1))
-            available = max_allocation - allocated
-            utilization = allocated / max_allocation if max_allocation > 0 else 0
-            
-            daily_data.append(DailyAllocation(
-                date=date_str,
-                allocated=allocated,
-                available=available,
-                utilization=round(utilization, 2)
-            ))
-            
-            current_date += timedelta(days=1)
-        
-        return CampaignLedger(
-            campaign_id=campaign_id,
-            title=campaign["title"],
-            daily_allocation=daily_data,
-            total_allocated=current_allocated,
-            total_available=max_allocation
-        )
+        return build_campaign_ledger(campaign_id, campaign["title"], campaign.get("offseason_campaign_ledger") or [])
     
     except HTTPException:
         raise
@@ -299,7 +333,7 @@ async def suggest_smart_dreams(dream: DreamIntentCreate, user_id: str = Query(..
     Creates a dream_intents entry and returns top scored deals from active campaigns.
     """
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Create dream intent
         dream_data = {
@@ -317,18 +351,23 @@ async def suggest_smart_dreams(dream: DreamIntentCreate, user_id: str = Query(..
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        dream_result = supabase.table("dream_intents").insert(dream_data).execute()
+        dream_result = await run_query(supabase.table("dream_intents").insert(dream_data))
         
         if not dream_result.data:
             raise HTTPException(status_code=500, detail="Failed to create dream intent")
         
         dream_id = dream_result.data[0]["id"]
+        dream_match_index.push_change("dream_intents", "INSERT", dream_result.data[0])
         
-        # Call RPC function to get deals
-        deals_result = supabase.rpc("get_offseason_deals", {"user_uuid": user_id}).execute()
+        # Call RPC function to get deals (cached per user until their deals change)
+        async def fetch_deals():
+            deals_result = await run_query(supabase.rpc("get_offseason_deals", {"user_uuid": user_id}))
+            return deals_result.data or []
+        
+        deal_rows = await offseason_deal_cache.get_or_fetch(user_id, fetch_deals)
         
         suggested_deals = []
-        for deal_data in deals_result.data[:10]:  # Top 10 deals
+        for deal_data in deal_rows[:10]:  # Top 10 deals
             # Calculate pricing
             original_price = dream.budget  # Simplified
             discount_pct = deal_data.get("discount", 0)
@@ -369,49 +408,24 @@ async def activate_wallet(user_id: str = Query(..., description="User UUID")):
     """
     Activate LAXMI wallet for user (creates if doesn't exist)
     
-    Returns wallet details including balance, tier, and status.
+    Returns wallet details including balance, tier, and status. Lookup and
+    creation happen in one wallet_activate database call.
     """
     try:
-        supabase = get_supabase_client()
-        
-        # Check if wallet already exists
-        existing = supabase.table("wallet_accounts").select("*").eq("owner_id", user_id).execute()
-        
-        if existing.data:
-            wallet = existing.data[0]
-            return WalletActivateResponse(
-                wallet_id=wallet["id"],
-                balance=float(wallet["balance"]),
-                tier=wallet["tier"],
-                status=wallet["status"]
-            )
+        supabase = get_supabase_client(allow_anon=True)
         
-        # Create new wallet
-        wallet_data = {
-            "owner_id": user_id,
-            "balance": 0.00,
-            "tier": "bronze",
-            "status": "active",
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "metadata": {
-                "total_earned": 0,
-                "total_spent": 0,
-                "bookings_count": 0
-            }
-        }
+        result = await run_query(supabase.rpc("wallet_activate", {"owner": user_id}))
+        wallet = result.data or {}
         
-        result = supabase.table("wallet_accounts").insert(wallet_data).execute()
-        
-        if not result.data:
+        if not wallet.get("wallet_id"):
             raise HTTPException(status_code=500, detail="Failed to create wallet")
         
-        wallet = result.data[0]
-        
-        logger.info(f"Activated wallet for user {user_id}")
+        if wallet.get("created"):
+            offseason_deal_cache.invalidate_user(user_id)
+            logger.info(f"Activated wallet for user {user_id}")
         
         return WalletActivateResponse(
-            wallet_id=wallet["id"],
+            wallet_id=wallet["wallet_id"],
             balance=float(wallet["balance"]),
             tier=wallet["tier"],
             status=wallet["status"]
@@ -433,53 +447,38 @@ async def deposit_to_wallet(request: WalletDepositRequest):
     Credit wallet (admin/system use - typically for cashback)
     
     Requires: user_id, amount, type (cashback/credit/refund)
+    
+    Balance update and transaction insert run atomically in one
+    wallet_deposit database call.
     """
     try:
-        supabase = get_supabase_client()
-        
-        # Get wallet
-        wallet_result = supabase.table("wallet_accounts").select("*").eq("owner_id", request.user_id).execute()
+        supabase = get_supabase_client(allow_anon=True)
         
-        if not wallet_result.data:
-            raise HTTPException(status_code=404, detail="Wallet not found. Please activate first.")
-        
-        wallet = wallet_result.data[0]
-        wallet_id = wallet["id"]
-        current_balance = float(wallet["balance"])
-        new_balance = current_balance + request.amount
-        
-        # Create transaction
-        txn_data = {
-            "wallet_id": wallet_id,
-            "type": request.type,
+        result = await run_query(supabase.rpc("wallet_deposit", {
+            "owner": request.user_id,
             "amount": request.amount,
-            "balance_before": current_balance,
-            "balance_after": new_balance,
-            "booking_id": request.booking_id,
-            "description": request.description or f"{request.type.capitalize()} deposit",
-            "created_at": datetime.utcnow().isoformat(),
-            "meta": {}
-        }
-        
-        txn_result = supabase.table("wallet_txns").insert(txn_data).execute()
-        
-        if not txn_result.data:
+            "txn_type": request.type,
+            "booking": request.booking_id,
+            "txn_description": request.description
+        }))
+        outcome = result.data or {}
+        
+        if not outcome.get("success"):
+            reason = outcome.get("reason")
+            if reason == "wallet_not_found":
+                raise HTTPException(status_code=404, detail="Wallet not found. Please activate first.")
+            if reason == "invalid_deposit":
+                raise HTTPException(status_code=400, detail=f"Invalid deposit type: {request.type}")
             raise HTTPException(status_code=500, detail="Failed to create transaction")
         
-        # Update wallet balance
-        supabase.table("wallet_accounts").update({
-            "balance": new_balance,
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", wallet_id).execute()
-        
-        transaction_id = txn_result.data[0]["id"]
-        
-        logger.info(f"Deposited {request.amount} to wallet {wallet_id} (user {request.user_id})")
+        # Wallet tier feeds deal scoring
+        offseason_deal_cache.invalidate_user(request.user_id)
+        logger.info(f"Deposited {request.amount} to wallet {outcome['wallet_id']} (user {request.user_id})")
         
         return WalletTransactionResponse(
             success=True,
-            transaction_id=transaction_id,
-            new_balance=round(new_balance, 2)
+            transaction_id=outcome["transaction_id"],
+            new_balance=round(float(outcome["new_balance"]), 2)
         )
     
     except HTTPException:
@@ -489,70 +488,115 @@ async def deposit_to_wallet(request: WalletDepositRequest):
         raise HTTPException(status_code=500, detail=f"Wallet deposit failed: {str(e)}")
 
 # ============================================================================
-# ENDPOINT: Redeem from Wallet
+# ENDPOINT: Bulk Deposit to Wallets
 # ============================================================================
 
-@offseason_router.post("/wallets/redeem", response_model=WalletTransactionResponse)
-async def redeem_from_wallet(request: WalletRedeemRequest, user_id: str = Query(..., description="User UUID")):
+@offseason_router.post("/wallets/deposit/bulk", response_model=WalletBulkDepositResponse)
+async def bulk_deposit_to_wallets(request: WalletBulkDepositRequest):
     """
-    Deduct from wallet for booking payment
+    Credit many wallets in one call (e.g. nightly cashback)
     
-    Requires: amount, booking_id
+    Deposits are sent to wallet_bulk_deposit in chunks of WALLET_BULK_CHUNK.
+    Each chunk is one set-based transaction. One result is returned per
+    deposit, in request order; a missing wallet or invalid item fails only
+    that item.
     """
     try:
-        supabase = get_supabase_client()
-        
-        # Get wallet
-        wallet_result = supabase.table("wallet_accounts").select("*").eq("owner_id", user_id).execute()
-        
-        if not wallet_result.data:
-            raise HTTPException(status_code=404, detail="Wallet not found")
-        
-        wallet = wallet_result.data[0]
-        wallet_id = wallet["id"]
-        current_balance = float(wallet["balance"])
-        
-        # Check sufficient balance
-        if current_balance < request.amount:
+        if len(request.deposits) > WALLET_BULK_MAX:
             raise HTTPException(
                 status_code=400,
-                detail=f"Insufficient balance. Available: {current_balance}, Required: {request.amount}"
+                detail=f"Too many deposits: {len(request.deposits)} (max {WALLET_BULK_MAX})"
             )
         
-        new_balance = current_balance - request.amount
-        
-        # Create transaction
-        txn_data = {
-            "wallet_id": wallet_id,
-            "type": "debit",
-            "amount": -request.amount,  # Negative for debit
-            "balance_before": current_balance,
-            "balance_after": new_balance,
-            "booking_id": request.booking_id,
-            "description": f"Redemption for booking {request.booking_id}",
-            "created_at": datetime.utcnow().isoformat(),
-            "meta": {}
-        }
+        supabase = get_supabase_client(allow_anon=True)
+        
+        results = []
+        for lo in range(0, len(request.deposits), WALLET_BULK_CHUNK):
+            chunk = request.deposits[lo:lo + WALLET_BULK_CHUNK]
+            chunk_result = await run_query(supabase.rpc("wallet_bulk_deposit", {"items": [
+                {
+                    "user_id": deposit.user_id,
+                    "amount": deposit.amount,
+                    "type": deposit.type,
+                    "booking_id": deposit.booking_id,
+                    "description": deposit.description
+                }
+                for deposit in chunk
+            ]}))
+            results.extend(
+                WalletBulkDepositResult(
+                    index=lo + item["index"],
+                    user_id=item["user_id"],
+                    success=item["success"],
+                    transaction_id=item.get("transaction_id"),
+                    new_balance=round(float(item["new_balance"]), 2) if item.get("success") else None,
+                    error=item.get("reason")
+                )
+                for item in chunk_result.data or []
+            )
         
-        txn_result = supabase.table("wallet_txns").insert(txn_data).execute()
+        credited = {r.user_id for r in results if r.success}
+        for user_id in credited:
+            offseason_deal_cache.invalidate_user(user_id)
         
-        if not txn_result.data:
-            raise HTTPException(status_code=500, detail="Failed to create transaction")
+        succeeded = sum(1 for r in results if r.success)
+        logger.info(f"Bulk deposit: {succeeded}/{len(request.deposits)} deposits to {len(credited)} wallets")
         
-        # Update wallet balance
-        supabase.table("wallet_accounts").update({
-            "balance": new_balance,
-            "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", wallet_id).execute()
+        return WalletBulkDepositResponse(
+            processed=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            results=results
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to bulk deposit: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Bulk wallet deposit failed: {str(e)}")
+
+# ============================================================================
+# ENDPOINT: Redeem from Wallet
+# ============================================================================
+
+@offseason_router.post("/wallets/redeem", response_model=WalletTransactionResponse)
+async def redeem_from_wallet(request: WalletRedeemRequest, user_id: str = Query(..., description="User UUID")):
+    """
+    Deduct from wallet for booking payment
+    
+    Requires: amount, booking_id
+    
+    The wallet_redeem database call only debits while the balance covers
+    the amount, so concurrent redemptions cannot overdraw a wallet.
+    """
+    try:
+        supabase = get_supabase_client(allow_anon=True)
         
-        transaction_id = txn_result.data[0]["id"]
+        result = await run_query(supabase.rpc("wallet_redeem", {
+            "owner": user_id,
+            "amount": request.amount,
+            "booking": request.booking_id
+        }))
+        outcome = result.data or {}
+        
+        if not outcome.get("success"):
+            reason = outcome.get("reason")
+            if reason == "wallet_not_found":
+                raise HTTPException(status_code=404, detail="Wallet not found")
+            if reason == "insufficient_balance":
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Insufficient balance. Available: {float(outcome['available'])}, Required: {request.amount}"
+                )
+            raise HTTPException(status_code=500, detail="Failed to create transaction")
         
-        logger.info(f"Redeemed {request.amount} from wallet {wallet_id} (user {user_id})")
+        offseason_deal_cache.invalidate_user(user_id)
+        logger.info(f"Redeemed {request.amount} from wallet {outcome['wallet_id']} (user {user_id})")
         
         return WalletTransactionResponse(
             success=True,
-            transaction_id=transaction_id,
-            new_balance=round(new_balance, 2)
+            transaction_id=outcome["transaction_id"],
+            new_balance=round(float(outcome["new_balance"]), 2)
         )
     
     except HTTPException:
@@ -566,90 +610,121 @@ async def redeem_from_wallet(request: WalletRedeemRequest, user_id: str = Query(
 # ============================================================================
 
 @offseason_router.post("/yield/optimize/{user_id}", response_model=YieldOptimizeResponse)
-async def optimize_yield(user_id: str):
+async def optimize_yield(
+    user_id: str,
+    top_k: int = Query(DEALS_PER_DREAM, ge=1, le=20, description="Deal candidates kept per dream")
+):
     """
     Run yield optimizer for user's active dreams
     
-    Fetches active dreams, matches with campaigns, scores deals, and creates deal_candidates.
-    Returns top 5 optimized deals.
+    Scores the user's active dreams with the full YieldOptimizer algorithm,
+    keeps the best top_k per dream and writes them to deal_candidates in one
+    bulk insert. Returns the top 5 deals overall with per-stage timings.
     
-    **Note**: This is a simplified v1 implementation. Full scoring algorithm to be added in Phase 4.
+    Once the dream match index is warm, dreams and their precomputed
+    candidate campaigns come from memory and only the wallet tier is read;
+    until then every running campaign is fetched and scored. Both paths
+    return the same deals.
     """
     try:
-        start_time = datetime.utcnow()
-        supabase = get_supabase_client()
-        
-        # Get user's active dreams
-        dreams_result = supabase.table("dream_intents").select("*").eq("user_id", user_id).eq("status", "active").execute()
+        start = time.perf_counter()
+        timings = {}
+        supabase = get_supabase_client(allow_anon=True)
+        wallet_query = supabase.table("wallet_accounts").select("tier").eq("owner_id", user_id)
+        
+        # Stage 1: look up matches, or fetch dreams, campaigns and wallet tier concurrently
+        if dream_match_index.ready:
+            dreams, campaigns = await dream_match_index.lookup(user_id)
+            wallet_result = await run_query(wallet_query)
+        else:
+            dreams_result, campaigns_result, wallet_result = await asyncio.gather(
+                run_query(supabase.table("dream_intents").select("*").eq("user_id", user_id).eq("status", "active")),
+                run_query(
+                    supabase.table("offseason_campaigns").select("*").eq("status", "active")
+                    .gte("end_date", datetime.utcnow().date().isoformat()).order("id")
+                ),
+                run_query(wallet_query)
+            )
+            dreams, campaigns = dreams_result.data, campaigns_result.data
+        timings["fetch"] = _elapsed_ms(start)
         
-        if not dreams_result.data:
+        if not dreams or not campaigns:
             return YieldOptimizeResponse(
                 user_id=user_id,
                 optimized_deals=[],
                 total_deals_found=0,
-                optimization_time_ms=0
+                optimization_time_ms=int(timings["fetch"]),
+                stage_timings_ms=timings
             )
         
-        # Get active campaigns
-        campaigns_result = supabase.table("offseason_campaigns").select("*").eq("status", "active").execute()
-        
-        optimized_deals = []
-        
-        # Simple matching (full scoring algorithm in Phase 4)
-        for dream in dreams_result.data:
-            for campaign in campaigns_result.data[:5]:  # Limit to 5 campaigns
-                # Simple score calculation (placeholder for Phase 4)
-                base_score = 75.0
-                discount_bonus = campaign["discount"] * 0.2  # Up to 20 points from discount
-                score = min(base_score + discount_bonus, 100.0)
-                
-                original_price = dream["budget"]
-                discount_pct = campaign["discount"]
-                price = original_price * (1 - discount_pct / 100)
-                savings = original_price - price
-                
-                # Create deal candidate
-                deal_data = {
+        wallet_tier = wallet_result.data[0]["tier"] if wallet_result.data else "bronze"
+        
+        # Stage 2: score all dream x campaign pairs, keep top_k per dream
+        stage_start = time.perf_counter()
+        ranked = YieldOptimizer.rank_campaigns(dreams, campaigns, wallet_tier, top_k)
+        
+        expires_at = (datetime.utcnow() + timedelta(hours=48)).isoformat()
+        created_at = datetime.utcnow().isoformat()
+        deal_rows = []
+        for dream in dreams:
+            original_price = float(dream["budget"])
+            for match in ranked[dream["id"]]:
+                if match["price"] <= 0:
+                    continue
+                deal_rows.append({
                     "dream_id": dream["id"],
-                    "campaign_id": campaign["id"],
+                    "campaign_id": match["campaign"]["id"],
                     "provider_mix": ["partner_direct"],
-                    "score": score,
-                    "price": price,
+                    "score": match["total_score"],
+                    "price": round(match["price"], 2),
                     "original_price": original_price,
-                    "discount_amount": savings,
-                    "expires_at": (datetime.utcnow() + timedelta(hours=48)).isoformat(),
+                    "discount_amount": round(original_price - match["price"], 2),
+                    "expires_at": expires_at,
                     "status": "pending",
-                    "created_at": datetime.utcnow().isoformat(),
-                    "metadata": {"scoring_version": "v1_simplified"}
-                }
-                
-                deal_result = supabase.table("deal_candidates").insert(deal_data).execute()
-                
-                if deal_result.data:
-                    deal_id = deal_result.data[0]["id"]
-                    optimized_deals.append(OptimizedDeal(
-                        deal_id=deal_id,
-                        campaign_id=campaign["id"],
-                        dream_id=dream["id"],
-                        score=round(score, 2),
-                        price=round(price, 2),
-                        savings=round(savings, 2)
-                    ))
+                    "created_at": created_at,
+                    "metadata": {"scoring_version": "v1_full", "breakdown": match["breakdown"]}
+                })
+        timings["score"] = _elapsed_ms(stage_start)
+        
+        # Stage 3: single bulk insert
+        stage_start = time.perf_counter()
+        inserted = []
+        if deal_rows:
+            deal_result = await run_query(supabase.table("deal_candidates").insert(deal_rows))
+            inserted = deal_result.data or []
+        if inserted:
+            offseason_deal_cache.invalidate_user(user_id)
+        timings["insert"] = _elapsed_ms(stage_start)
+        
+        optimized_deals = [
+            OptimizedDeal(
+                deal_id=row["id"],
+                campaign_id=row["campaign_id"],
+                dream_id=row["dream_id"],
+                score=round(float(row["score"]), 2),
+                price=round(float(row["price"]), 2),
+                savings=round(float(row["discount_amount"]), 2)
+            )
+            for row in inserted
+        ]
         
         # Sort by score and take top 5
-        optimized_deals.sort(key=lambda x: x.score, reverse=True)
-        top_deals = optimized_deals[:5]
+        top_deals = sorted(optimized_deals, key=lambda x: x.score, reverse=True)[:5]
         
-        end_time = datetime.utcnow()
-        optimization_time = int((end_time - start_time).total_seconds() * 1000)
+        timings["total"] = _elapsed_ms(start)
+        optimization_time = int(timings["total"])
         
-        logger.info(f"Optimized {len(top_deals)} deals for user {user_id} in {optimization_time}ms")
+        logger.info(
+            f"Optimized {len(top_deals)} deals for user {user_id} in {optimization_time}ms "
+            f"({len(dreams)} dreams x {len(campaigns)} campaigns, stages: {timings})"
+        )
         
         return YieldOptimizeResponse(
             user_id=user_id,
             optimized_deals=top_deals,
             total_deals_found=len(optimized_deals),
-            optimization_time_ms=optimization_time
+            optimization_time_ms=optimization_time,
+            stage_timings_ms=timings
         )
     
     except HTTPException:
@@ -658,6 +733,75 @@ async def optimize_yield(user_id: str):
         logger.error(f"Failed to optimize yield: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Yield optimization failed: {str(e)}")
 
+# ============================================================================
+# ENDPOINT: Global Deal Allocation
+# ============================================================================
+
+@offseason_router.post("/yield/allocate")
+async def allocate_deals_globally(dry_run: bool = Query(False, description="Compute without writing deal_candidates")):
+    """
+    Allocate all active dreams across all active campaigns at once
+    
+    Unlike /yield/optimize (one user, no capacity limits), every campaign's
+    daily allocation and blackout dates are respected across all users.
+    Also runs nightly from the scheduler.
+    """
+    try:
+        from deal_allocator import run_allocation_job
+        return await run_allocation_job(dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"Failed to allocate deals: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Deal allocation failed: {str(e)}")
+
+# ============================================================================
+# ENDPOINT: Accept Deal
+# ============================================================================
+
+@offseason_router.post("/deals/{deal_id}/accept", response_model=DealAcceptResponse)
+async def accept_deal(
+    deal_id: str,
+    stay_date: Optional[date] = Query(None, description="Night to book; defaults to the deal's allocated stay date")
+):
+    """
+    Accept a deal candidate and take one room from its campaign's ledger
+
+    Concurrent accepts are batched into one accept_offseason_deals RPC call,
+    which grants each campaign day at most its remaining capacity, so a day
+    can never be overbooked and hot days are locked once per batch.
+    """
+    # A malformed id cannot exist; keep it out of the shared batch
+    canonical_id = canonical_deal_id(deal_id)
+    if canonical_id is None:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    deal_id = canonical_id
+
+    try:
+        outcome = await deal_accept_batcher.accept(deal_id, stay_date)
+
+        if outcome.get("campaign_id"):
+            offseason_deal_cache.invalidate_campaign(outcome["campaign_id"])
+
+        if not outcome.get("accepted"):
+            reason = outcome.get("reason", "unknown")
+            if reason == "not_found":
+                raise HTTPException(status_code=404, detail="Deal not found")
+            raise HTTPException(status_code=409, detail=f"Deal cannot be accepted: {reason}")
+
+        logger.info(f"Accepted deal {deal_id} for {outcome['stay_date']} ({outcome['remaining']} rooms left)")
+
+        return DealAcceptResponse(
+            deal_id=deal_id,
+            campaign_id=outcome["campaign_id"],
+            stay_date=outcome["stay_date"],
+            remaining=outcome["remaining"]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to accept deal: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Deal acceptance failed: {str(e)}")
+
 # ============================================================================
 # ENDPOINT: Health Check with Off-Season Version
 # ============================================================================
@@ -671,8 +815,8 @@ async def health_check_offseason():
     """
     try:
         # Test Supabase connection
-        supabase = get_supabase_client()
-        _ = supabase.table("partners").select("id").limit(1).execute()
+        supabase = get_supabase_client(allow_anon=True)
+        _ = await run_query(supabase.table("partners").select("id").limit(1))
         db_status = "up"
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -682,6 +826,10 @@ async def health_check_offseason():
         "ok": db_status == "up",
         "version": "0.1.0-offseason",
         "db": db_status,
+        "db_executor": supabase_executor.get_stats(),
+        "deal_accepts": deal_accept_batcher.get_stats(),
+        "deal_cache": offseason_deal_cache.get_stats(),
+        "match_index": dream_match_index.get_stats(),
         "timestamp": datetime.utcnow().isoformat(),
         "features": ["partner_campaigns", "smart_dreams", "laxmi_wallet", "yield_optimizer"]
     }
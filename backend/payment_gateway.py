@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import logging
 
+from fx_rate_service import fx_rates
+
 logger = logging.getLogger(__name__)
 
 # Create router
@@ -62,6 +64,10 @@ class PaymentIntentRequest(BaseModel):
         [PaymentMethod.CREDIT_CARD],
         description="Allowed payment methods"
     )
+    price_currency: Optional[Currency] = Field(
+        None,
+        description="Currency the booking was priced in; amount is converted to currency when they differ"
+    )
     booking_id: str
     user_id: str
     metadata: Optional[Dict[str, Any]] = None
@@ -111,6 +117,9 @@ class PaymentIntent(BaseModel):
     status: PaymentStatus
     payment_methods: List[str]
     created_at: str
+    original_amount: Optional[float] = None
+    original_currency: Optional[str] = None
+    exchange_rate: Optional[float] = None
 
 class PaymentConfirmation(BaseModel):
     """Payment confirmation response"""
@@ -167,7 +176,7 @@ async def create_payment_intent(request: PaymentIntentRequest):
     Create a payment intent for checkout
     
     Features:
-    - Multi-currency support
+    - Multi-currency support (price_currency -> currency conversion)
     - Multiple payment method types
     - Secure client secret generation
     - Metadata tracking
@@ -175,14 +184,27 @@ async def create_payment_intent(request: PaymentIntentRequest):
     try:
         import uuid
         
+        # Convert from the booking's pricing currency with the in-memory FX table
+        amount = request.amount
+        conversion = {}
+        if request.price_currency and request.price_currency != request.currency:
+            rate = fx_rates.get_rate(request.price_currency.value, request.currency.value)
+            amount = round(request.amount * rate, 2)
+            conversion = {
+                "original_amount": request.amount,
+                "original_currency": request.price_currency.value,
+                "exchange_rate": round(rate, 6)
+            }
+        
         payment_intent = PaymentIntent(
             payment_intent_id=f"pi_{uuid.uuid4().hex[:24]}",
             client_secret=f"pi_{uuid.uuid4().hex[:24]}_secret_{uuid.uuid4().hex[:16]}",
-            amount=request.amount,
+            amount=amount,
             currency=request.currency.value,
             status=PaymentStatus.PENDING,
             payment_methods=[pm.value for pm in request.payment_method_types],
-            created_at=datetime.now().isoformat()
+            created_at=datetime.now().isoformat(),
+            **conversion
         )
         
         logger.info(f"Created payment intent {payment_intent.payment_intent_id} for booking {request.booking_id}")
@@ -3,24 +3,18 @@ Provider Analytics Dashboard API
 Real-time provider performance metrics and insights
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from supabase import create_client, Client
-import os
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+from provider_registry_cache import provider_registry_cache
+from keyset_pagination import PaginationError, count_method, keyset_page, keyset_query
+from provider_log_retention import PROVIDER_LOG_RAW_DAYS
 
 router = APIRouter(prefix="/api/admin/providers", tags=["Provider Analytics"])
 
-def get_supabase_client() -> Client:
-    """Get Supabase client"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise HTTPException(status_code=500, detail="Supabase not configured")
-    
-    return create_client(supabase_url, supabase_key)
-
 
 @router.get("/analytics/overview")
 async def provider_analytics_overview():
@@ -35,27 +29,25 @@ async def provider_analytics_overview():
         - Top performers
     """
     try:
-        supabase = get_supabase_client()
-        
         # Get all providers
-        providers = supabase.table('provider_registry').select('*').execute()
+        providers = await provider_registry_cache.get_all()
         
-        total_providers = len(providers.data)
-        active_providers = len([p for p in providers.data if p.get('is_active')])
+        total_providers = len(providers)
+        active_providers = len([p for p in providers if p.get('is_active')])
         
         # Health status distribution
         health_distribution = {}
-        for provider in providers.data:
+        for provider in providers:
             status = provider.get('health_status', 'unknown')
             health_distribution[status] = health_distribution.get(status, 0) + 1
         
         # Calculate averages (handle None values)
-        avg_response_time = sum([p.get('avg_response_time_ms') or 0 for p in providers.data]) / total_providers if total_providers > 0 else 0
-        avg_success_rate = sum([p.get('success_rate_percent') or 0 for p in providers.data]) / total_providers if total_providers > 0 else 0
+        avg_response_time = sum([p.get('avg_response_time_ms') or 0 for p in providers]) / total_providers if total_providers > 0 else 0
+        avg_success_rate = sum([p.get('success_rate_percent') or 0 for p in providers]) / total_providers if total_providers > 0 else 0
         
         # Top performers (by success rate, handle None values)
         top_performers = sorted(
-            providers.data,
+            providers,
             key=lambda x: (x.get('success_rate_percent') or 0, -(x.get('avg_response_time_ms') or 9999)),
             reverse=True
         )[:5]
@@ -105,39 +97,67 @@ async def provider_detailed_analytics(
         supabase = get_supabase_client()
         
         # Get provider info
-        provider_result = supabase.table('provider_registry').select('*').eq('id', provider_id).execute()
+        provider = await provider_registry_cache.get_by_id(provider_id)
         
-        if not provider_result.data:
+        if not provider:
             raise HTTPException(status_code=404, detail="Provider not found")
         
-        provider = provider_result.data[0]
-        
-        # Get health logs for specified period
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        health_logs = supabase.table('provider_health_logs')\
-            .select('*')\
-            .eq('provider_id', provider_id)\
-            .gte('check_time', since_date)\
-            .order('check_time')\
-            .execute()
+        # Get health logs for specified period. Both bounds are on the
+        # partition key so only the months in range are scanned. Compaction
+        # moves rows older than its cutoff into hourly rollups in one
+        # transaction, so raw rows and rollups over the same window cover it
+        # exactly once, whenever the job last ran.
+        until = datetime.now()
+        since = until - timedelta(days=days)
+        since_date = since.isoformat()
+        
+        health_logs, rollups = await asyncio.gather(
+            run_query(
+                supabase.table('provider_health_logs')
+                .select('check_time, status, response_time_ms, error_message')
+                .eq('provider_id', provider_id)
+                .gte('check_time', since_date)
+                .lt('check_time', until.isoformat())
+                .order('check_time')
+            ),
+            run_query(
+                supabase.table('provider_health_rollups')
+                .select('*')
+                .eq('provider_id', provider_id)
+                .gte('bucket_start', since_date)
+                .lt('bucket_start', until.isoformat())
+                .order('bucket_start')
+            )
+        )
+        # A compaction committing between the two reads could show rows in
+        # both; buckets from the earliest raw row on are already counted
+        earliest_raw = health_logs.data[0]['check_time'] if health_logs.data else None
+        rollups = [r for r in rollups.data or [] if earliest_raw is None or r['bucket_start'] < earliest_raw]
         
         # Analyze health logs
-        total_checks = len(health_logs.data)
-        healthy_checks = len([log for log in health_logs.data if log.get('status') == 'healthy'])
-        degraded_checks = len([log for log in health_logs.data if log.get('status') == 'degraded'])
-        down_checks = len([log for log in health_logs.data if log.get('status') == 'down'])
+        total_checks = len(health_logs.data) + sum(r.get('total_checks') or 0 for r in rollups)
+        healthy_checks = len([log for log in health_logs.data if log.get('status') == 'healthy']) + sum(r.get('healthy_checks') or 0 for r in rollups)
+        degraded_checks = len([log for log in health_logs.data if log.get('status') == 'degraded']) + sum(r.get('degraded_checks') or 0 for r in rollups)
+        down_checks = len([log for log in health_logs.data if log.get('status') == 'down']) + sum(r.get('down_checks') or 0 for r in rollups)
         
-        # Response time trend
+        # Response time trend (hourly averages before raw retention)
         response_times = [
+            {
+                "timestamp": r.get('bucket_start'),
+                "response_time_ms": round((r.get('total_response_time_ms') or 0) / r['total_checks']) if r.get('total_checks') else 0,
+                "resolution": "hour"
+            }
+            for r in rollups
+        ] + [
             {
                 "timestamp": log.get('check_time'),
-                "response_time_ms": log.get('response_time_ms', 0)
+                "response_time_ms": log.get('response_time_ms', 0),
+                "resolution": "raw"
             }
             for log in health_logs.data
         ]
         
-        # Error analysis
+        # Error analysis (raw rows only; rollups keep no messages)
         errors = {}
         for log in health_logs.data:
             if log.get('error_message'):
@@ -159,7 +179,8 @@ async def provider_detailed_analytics(
             "period": {
                 "days": days,
                 "from": since_date,
-                "to": datetime.now().isoformat()
+                "to": until.isoformat(),
+                "raw_from": earliest_raw
             },
             "health_summary": {
                 "total_checks": total_checks,
@@ -188,27 +209,40 @@ async def provider_detailed_analytics(
 @router.get("/rotation/logs")
 async def provider_rotation_logs(
     service_type: Optional[str] = Query(None, description="Filter by service type"),
+    days: int = Query(
+        min(7, PROVIDER_LOG_RAW_DAYS), ge=1, le=PROVIDER_LOG_RAW_DAYS,
+        description="Number of days of logs to search (raw rotation logs are kept for PROVIDER_LOG_RAW_DAYS)"
+    ),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    count_mode: str = Query("estimated", description="Total count: exact, estimated or none"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0)
 ):
     """
     Provider rotation logs
     
-    Shows how providers are being rotated for searches
+    Shows how providers are being rotated for searches. Only raw logs are
+    listed; older attempts are compacted and served by /rotation/history.
     """
     try:
         supabase = get_supabase_client()
         
-        query = supabase.table('provider_rotation_logs').select('*', count='exact')
+        # Bounded on the partition key so only the months in range are scanned
+        query = (
+            supabase.table('provider_rotation_logs')
+            .select('*', count=count_method(count_mode))
+            .gte('created_at', (datetime.now() - timedelta(days=days)).isoformat())
+        )
         
         if service_type:
             query = query.eq('service_type', service_type)
         
-        result = query.order('created_at', desc=True).range(offset, offset + limit - 1).execute()
+        result = await run_query(keyset_query(query, 'created_at', cursor, limit, offset, descending=True))
+        logs, next_cursor = keyset_page(result.data or [], 'created_at', limit)
         
         # Calculate rotation statistics
         rotation_stats = {}
-        for log in result.data:
+        for log in logs:
             provider_id = log.get('provider_id')
             if provider_id:
                 if provider_id not in rotation_stats:
@@ -227,19 +261,106 @@ async def provider_rotation_logs(
         return {
             "success": True,
             "count": result.count,
-            "logs": result.data,
+            "logs": logs,
             "rotation_statistics": rotation_stats,
             "pagination": {
                 "limit": limit,
-                "offset": offset,
-                "total": result.count
+                "offset": offset if not cursor else None,
+                "total": result.count,
+                "count_mode": count_mode,
+                "next_cursor": next_cursor
             }
         }
         
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch rotation logs: {str(e)}")
 
 
+@router.get("/rotation/history")
+async def provider_rotation_history(
+    service_type: Optional[str] = Query(None, description="Filter by service type"),
+    provider_id: Optional[str] = Query(None, description="Filter by provider"),
+    days: int = Query(90, ge=1, le=365, description="Number of days of history")
+):
+    """
+    Hourly provider rotation history
+    
+    Rotation logs older than PROVIDER_LOG_RAW_DAYS are compacted into hourly
+    rollups; this serves those buckets. Hours from raw_from on are still raw
+    and are served by /rotation/logs, so buckets stop there.
+    """
+    try:
+        supabase = get_supabase_client()
+        until = datetime.now()
+        since = until - timedelta(days=days)
+        
+        raw_query = (
+            supabase.table('provider_rotation_logs')
+            .select('created_at')
+            .gte('created_at', since.isoformat())
+            .lt('created_at', until.isoformat())
+            .order('created_at')
+            .limit(1)
+        )
+        rollup_query = (
+            supabase.table('provider_rotation_rollups')
+            .select('*')
+            .gte('bucket_start', since.isoformat())
+            .lt('bucket_start', until.isoformat())
+            .order('bucket_start')
+        )
+        if service_type:
+            raw_query = raw_query.eq('service_type', service_type)
+            rollup_query = rollup_query.eq('service_type', service_type)
+        if provider_id:
+            raw_query = raw_query.eq('provider_id', provider_id)
+            rollup_query = rollup_query.eq('provider_id', provider_id)
+        
+        earliest_raw, rollups = await asyncio.gather(run_query(raw_query), run_query(rollup_query))
+        # A compaction committing between the two reads could show hours in both
+        raw_from = earliest_raw.data[0]['created_at'] if earliest_raw.data else None
+        buckets = [r for r in rollups.data or [] if raw_from is None or r['bucket_start'] < raw_from]
+        
+        rotation_stats = {}
+        for bucket in buckets:
+            stats = rotation_stats.setdefault(bucket['provider_id'], {
+                'total_attempts': 0,
+                'successful': 0,
+                'failed': 0
+            })
+            stats['total_attempts'] += bucket.get('attempts') or 0
+            stats['successful'] += bucket.get('successes') or 0
+            stats['failed'] += (bucket.get('attempts') or 0) - (bucket.get('successes') or 0)
+        
+        return {
+            "success": True,
+            "buckets": [
+                {
+                    "provider_id": b['provider_id'],
+                    "service_type": b['service_type'],
+                    "bucket_start": b['bucket_start'],
+                    "attempts": b.get('attempts') or 0,
+                    "successes": b.get('successes') or 0,
+                    "avg_response_time_ms": round((b.get('total_response_time_ms') or 0) / b['attempts']) if b.get('attempts') else 0,
+                    "total_results": b.get('total_results') or 0
+                }
+                for b in buckets
+            ],
+            "rotation_statistics": rotation_stats,
+            "period": {
+                "days": days,
+                "from": since.isoformat(),
+                "to": until.isoformat(),
+                "raw_from": raw_from
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rotation history: {str(e)}")
+
+
 @router.post("/analytics/{provider_id}/toggle-active")
 async def toggle_provider_active(provider_id: str):
     """
@@ -251,7 +372,7 @@ async def toggle_provider_active(provider_id: str):
         supabase = get_supabase_client()
         
         # Get current status
-        provider_result = supabase.table('provider_registry').select('is_active').eq('id', provider_id).execute()
+        provider_result = await run_query(supabase.table('provider_registry').select('is_active').eq('id', provider_id))
         
         if not provider_result.data:
             raise HTTPException(status_code=404, detail="Provider not found")
@@ -260,10 +381,12 @@ async def toggle_provider_active(provider_id: str):
         new_status = not current_status
         
         # Update status
-        update_result = supabase.table('provider_registry')\
-            .update({'is_active': new_status, 'updated_at': datetime.now().isoformat()})\
-            .eq('id', provider_id)\
-            .execute()
+        update_result = await run_query(
+            supabase.table('provider_registry')
+            .update({'is_active': new_status, 'updated_at': datetime.now().isoformat()})
+            .eq('id', provider_id)
+        )
+        provider_registry_cache.invalidate()
         
         return {
             "success": True,
@@ -293,10 +416,12 @@ async def update_provider_priority(
         supabase = get_supabase_client()
         
         # Update priority
-        update_result = supabase.table('provider_registry')\
-            .update({'priority': priority, 'updated_at': datetime.now().isoformat()})\
-            .eq('id', provider_id)\
-            .execute()
+        update_result = await run_query(
+            supabase.table('provider_registry')
+            .update({'priority': priority, 'updated_at': datetime.now().isoformat()})
+            .eq('id', provider_id)
+        )
+        provider_registry_cache.invalidate()
         
         if not update_result.data:
             raise HTTPException(status_code=404, detail="Provider not found")
@@ -322,13 +447,11 @@ async def provider_health_summary():
     Quick overview of all provider health statuses
     """
     try:
-        supabase = get_supabase_client()
-        
-        providers = supabase.table('provider_registry').select('*').eq('is_active', True).execute()
+        providers = await provider_registry_cache.get_active()
         
         health_summary = []
         
-        for provider in providers.data:
+        for provider in providers:
             health_summary.append({
                 "provider_name": provider.get('provider_name'),
                 "display_name": provider.get('display_name'),
@@ -5,27 +5,18 @@ Scheduled health checks every 5 minutes with Supabase logging
 
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 from providers.universal_provider_manager import universal_provider_manager
-from supabase import create_client, Client
-import os
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+from provider_registry_cache import provider_registry_cache
+from provider_log_retention import compact_provider_logs
 
 logger = logging.getLogger(__name__)
 
-# Supabase client
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-
-def get_supabase_client() -> Client:
-    """Get Supabase client"""
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise Exception("Supabase credentials not configured")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
-
-
 async def run_health_checks():
     """
     Run health checks on all providers
@@ -44,16 +35,13 @@ async def run_health_checks():
         for provider_name, result in health_results.items():
             try:
                 # Get provider ID from registry
-                provider_response = supabase.table('provider_registry')\
-                    .select('id')\
-                    .eq('provider_name', provider_name)\
-                    .execute()
+                provider = await provider_registry_cache.get_by_name(provider_name)
                 
-                if not provider_response.data:
+                if not provider:
                     logger.warning(f"Provider {provider_name} not found in registry")
                     continue
                 
-                provider_id = provider_response.data[0]['id']
+                provider_id = provider['id']
                 
                 # Insert health log
                 log_data = {
@@ -65,7 +53,7 @@ async def run_health_checks():
                     'metadata': result.get('details', {})
                 }
                 
-                supabase.table('provider_health_logs').insert(log_data).execute()
+                await run_query(supabase.table('provider_health_logs').insert(log_data))
                 
                 # Update provider_registry with latest health
                 update_data = {
@@ -74,10 +62,11 @@ async def run_health_checks():
                     'avg_response_time_ms': result.get('response_time_ms', 0)
                 }
                 
-                supabase.table('provider_registry')\
-                    .update(update_data)\
-                    .eq('id', provider_id)\
-                    .execute()
+                await run_query(
+                    supabase.table('provider_registry')
+                    .update(update_data)
+                    .eq('id', provider_id)
+                )
                 
                 status_icon = "✅" if result.get('status') == 'healthy' else "⚠️" if result.get('status') == 'degraded' else "❌"
                 logger.info(f"   {status_icon} {provider_name}: {result.get('status')} ({result.get('response_time_ms', 0)}ms)")
@@ -85,6 +74,8 @@ async def run_health_checks():
             except Exception as e:
                 logger.error(f"Failed to log health check for {provider_name}: {e}")
         
+        # Registry rows now carry new health fields
+        provider_registry_cache.invalidate()
         logger.info(f"✅ Health check complete for {len(health_results)} providers")
         
     except Exception as e:
@@ -102,21 +93,19 @@ async def calculate_provider_metrics():
         supabase = get_supabase_client()
         
         # Get all active providers
-        providers = supabase.table('provider_registry')\
-            .select('id, provider_name')\
-            .eq('is_active', True)\
-            .execute()
+        providers = await provider_registry_cache.get_active()
         
-        for provider in providers.data:
+        for provider in providers:
             provider_id = provider['id']
             provider_name = provider['provider_name']
             
             # Calculate metrics from logs (last 24 hours)
-            logs = supabase.table('provider_health_logs')\
-                .select('*')\
-                .eq('provider_id', provider_id)\
-                .gte('check_time', (datetime.now() - timedelta(hours=24)).isoformat())\
-                .execute()
+            logs = await run_query(
+                supabase.table('provider_health_logs')
+                .select('*')
+                .eq('provider_id', provider_id)
+                .gte('check_time', (datetime.now() - timedelta(hours=24)).isoformat())
+            )
             
             if logs.data:
                 total_checks = len(logs.data)
@@ -134,13 +123,15 @@ async def calculate_provider_metrics():
                     'error_rate_percent': round(error_rate, 2)
                 }
                 
-                supabase.table('provider_registry')\
-                    .update(update_data)\
-                    .eq('id', provider_id)\
-                    .execute()
+                await run_query(
+                    supabase.table('provider_registry')
+                    .update(update_data)
+                    .eq('id', provider_id)
+                )
                 
                 logger.info(f"   📈 {provider_name}: {success_rate:.1f}% success, {avg_response_time:.0f}ms avg")
         
+        provider_registry_cache.invalidate()
         logger.info("✅ Metrics calculation complete")
         
     except Exception as e:
@@ -173,6 +164,15 @@ def start_health_monitoring():
         replace_existing=True
     )
     
+    # Log rollup/retention and partition creation once a day
+    scheduler.add_job(
+        compact_provider_logs,
+        trigger=CronTrigger(hour=3, minute=30),
+        id='provider_log_compaction',
+        name='Provider Log Compaction',
+        replace_existing=True
+    )
+    
     # Start scheduler
     scheduler.start()
     logger.info("✅ Health monitoring scheduler started")
@@ -188,7 +188,6 @@ def stop_health_monitoring():
 # Run immediately on module import if configured
 if __name__ == "__main__":
     import asyncio
-    from datetime import timedelta
     
     # Run health check once
     asyncio.run(run_health_checks())
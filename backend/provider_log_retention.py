@@ -0,0 +1,46 @@
+"""
+Provider Log Retention
+Retention settings and the daily compaction job for provider logs
+
+provider_health_logs and provider_rotation_logs are partitioned by month
+(see supabase/migrations/20251026000000_provider_log_partitioning.sql).
+Raw rows are kept for PROVIDER_LOG_RAW_DAYS; compact_provider_logs() folds
+older rows into hourly rollups (provider_health_rollups,
+provider_rotation_rollups), drops expired partitions and creates the next
+months' partitions.
+
+Readers should always bound log queries on both ends of the partition key
+so PostgreSQL only scans the months involved. Compaction moves rows into
+rollups atomically, so reading raw rows and rollups over the same window
+counts every check once regardless of when the job last ran.
+
+Usage:
+    await compact_provider_logs()
+"""
+
+import os
+import logging
+from typing import Any, Dict, List
+
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_LOG_RAW_DAYS = int(os.getenv('PROVIDER_LOG_RAW_DAYS', '30'))
+
+
+async def compact_provider_logs(raw_days: int = PROVIDER_LOG_RAW_DAYS) -> List[Dict[str, Any]]:
+    """Roll up and drop expired provider log rows, and create upcoming partitions"""
+    try:
+        supabase = get_supabase_client()
+        result = await run_query(supabase.rpc('compact_provider_logs', {'p_raw_days': raw_days}))
+        for row in result.data or []:
+            logger.info(
+                f"🧹 {row['log_table']}: {row['rollup_buckets']} rollup buckets, "
+                f"{row['dropped_partitions']} partitions dropped, {row['deleted_rows']} rows deleted"
+            )
+        return result.data or []
+    except Exception as e:
+        logger.error(f"❌ Provider log compaction failed: {e}")
+        return []
@@ -4,28 +4,25 @@ REST endpoints for provider registry, partner management, inventory, and bidding
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime
-from supabase import create_client, Client
+from supabase_async import count_query, run_counts, run_query
+from supabase_pool import get_supabase_client
+from provider_registry_cache import provider_registry_cache, filter_providers, SERVICE_SUPPORT_FLAGS
+from keyset_pagination import PaginationError, apply_keyset, count_method, decode_cursor, keyset_page, keyset_query
 import os
+import json
+import asyncio
+import time
 import random
 
 router = APIRouter(prefix="/api", tags=["Provider & Partner Marketplace"])
 
-# Supabase client initialization
-def get_supabase_client() -> Client:
-    """Get Supabase client from environment"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise HTTPException(
-            status_code=500,
-            detail="Supabase configuration missing. Check SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY"
-        )
-    
-    return create_client(supabase_url, supabase_key)
+# Marketplace health counts are cached briefly; dashboards poll this endpoint
+MARKETPLACE_HEALTH_TTL_SECONDS = float(os.getenv('MARKETPLACE_HEALTH_TTL_SECONDS', '15'))
+_health_cache: Dict[str, Any] = {'data': None, 'at': 0.0}
 
 # ============================================================================
 # Pydantic Models
@@ -112,33 +109,43 @@ class BidDetail(BidCreate):
 async def list_providers(
     provider_type: Optional[str] = Query(None, description="Filter by provider type: hotel, flight, activity"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0)
 ):
     """List all providers in the registry with optional filtering"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table('provider_registry').select('*', count='exact')
-        
-        # Apply filters
-        if provider_type:
-            query = query.eq('provider_type', provider_type)
-        if is_active is not None:
-            query = query.eq('is_active', is_active)
+        # Served from the shared registry cache, in (priority, id) keyset order
+        providers = sorted(
+            filter_providers(
+                await provider_registry_cache.get_all(),
+                provider_type=provider_type or None,
+                is_active=is_active
+            ),
+            key=lambda p: (p.get('priority') or 0, str(p['id']))
+        )
         
-        # Apply pagination and ordering
-        result = query.order('priority').range(offset, offset + limit - 1).execute()
+        if cursor:
+            key = decode_cursor(cursor)
+            after = (key.get('priority') or 0, str(key['id']))
+            remaining = [p for p in providers if (p.get('priority') or 0, str(p['id'])) > after]
+        else:
+            remaining = providers[offset:]
+        page, next_cursor = keyset_page(remaining[:limit + 1], 'priority', limit)
         
         return {
             "success": True,
-            "count": result.count,
-            "providers": result.data,
+            "count": len(providers),
+            "providers": page,
             "pagination": {
                 "limit": limit,
-                "offset": offset,
-                "total": result.count
+                "offset": offset if not cursor else None,
+                "total": len(providers),
+                "next_cursor": next_cursor
             }
         }
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch providers: {str(e)}")
 
@@ -149,23 +156,15 @@ async def list_active_providers(
 ):
     """List only active providers, optionally filtered by type and region"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table('provider_registry')\
-            .select('*', count='exact')\
-            .eq('is_active', True)
-        
-        if provider_type:
-            query = query.eq('provider_type', provider_type)
-        
-        if supported_region:
-            query = query.contains('supported_regions', [supported_region])
-        
-        result = query.order('priority').execute()
+        providers = await provider_registry_cache.get_active(
+            provider_type=provider_type or None,
+            region=supported_region or None
+        )
         
         return {
             "success": True,
-            "count": result.count,
-            "providers": result.data,
+            "count": len(providers),
+            "providers": providers,
             "filters_applied": {
                 "active_only": True,
                 "provider_type": provider_type,
@@ -179,21 +178,20 @@ async def list_active_providers(
 async def get_provider_details(provider_id: str):
     """Get detailed information about a specific provider"""
     try:
-        supabase = get_supabase_client()
-        result = supabase.table('provider_registry').select('*').eq('id', provider_id).execute()
+        provider = await provider_registry_cache.get_by_id(provider_id)
         
-        if not result.data:
+        if not provider:
             raise HTTPException(status_code=404, detail=f"Provider {provider_id} not found")
         
-        provider = result.data[0]
-        
         # Get recent health logs
-        health_logs = supabase.table('provider_health_logs')\
-            .select('*')\
-            .eq('provider_id', provider_id)\
-            .order('check_time', desc=True)\
-            .limit(10)\
-            .execute()
+        supabase = get_supabase_client(allow_anon=True)
+        health_logs = await run_query(
+            supabase.table('provider_health_logs')
+            .select('*')
+            .eq('provider_id', provider_id)
+            .order('check_time', desc=True)
+            .limit(10)
+        )
         
         return {
             "success": True,
@@ -212,32 +210,17 @@ async def get_provider_rotation(
 ):
     """Get provider rotation order for a specific service type (hotel, flight, activity)"""
     try:
-        supabase = get_supabase_client()
-        
-        # Build query based on service type
-        query = supabase.table('provider_registry')\
-            .select('*')\
-            .eq('is_active', True)
-        
-        # Apply service type filter
-        if service_type == 'hotel':
-            query = query.eq('supports_hotels', True)
-        elif service_type == 'flight':
-            query = query.eq('supports_flights', True)
-        elif service_type == 'activity':
-            query = query.eq('supports_activities', True)
-        else:
+        if service_type not in SERVICE_SUPPORT_FLAGS:
             raise HTTPException(status_code=400, detail=f"Invalid service type: {service_type}")
         
-        # Apply region filter if specified
-        if region:
-            query = query.contains('supported_regions', [region])
-        
-        result = query.order('priority').execute()
+        providers = await provider_registry_cache.get_active(
+            service_type=service_type,
+            region=region or None
+        )
         
         # Calculate rotation order
         providers_with_scores = []
-        for idx, provider in enumerate(result.data):
+        for idx, provider in enumerate(providers):
             # Score based on priority (lower is better), health status, and eco rating
             base_score = provider['priority']
             health_bonus = 0 if provider.get('health_status') == 'healthy' else 10
@@ -272,13 +255,15 @@ async def list_partners(
     partner_type: Optional[str] = Query(None, description="Filter by partner type: hotel, airline, activity_provider"),
     onboarding_status: Optional[str] = Query(None, description="Filter by onboarding status"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    count_mode: str = Query("estimated", description="Total count: exact, estimated or none"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0)
 ):
-    """List all partners in the registry"""
+    """List all partners in the registry (newest first)"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table('partner_registry').select('*', count='exact')
+        supabase = get_supabase_client(allow_anon=True)
+        query = supabase.table('partner_registry').select('*', count=count_method(count_mode))
         
         # Apply filters
         if partner_type:
@@ -288,18 +273,23 @@ async def list_partners(
         if is_active is not None:
             query = query.eq('is_active', is_active)
         
-        result = query.order('created_at', desc=True).range(offset, offset + limit - 1).execute()
+        result = await run_query(keyset_query(query, 'created_at', cursor, limit, offset, descending=True))
+        page, next_cursor = keyset_page(result.data or [], 'created_at', limit)
         
         return {
             "success": True,
             "count": result.count,
-            "partners": result.data,
+            "partners": page,
             "pagination": {
                 "limit": limit,
-                "offset": offset,
-                "total": result.count
+                "offset": offset if not cursor else None,
+                "total": result.count,
+                "count_mode": count_mode,
+                "next_cursor": next_cursor
             }
         }
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch partners: {str(e)}")
 
@@ -307,10 +297,10 @@ async def list_partners(
 async def get_partner_details(partner_id: str):
     """Get detailed information about a specific partner"""
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Get partner details
-        result = supabase.table('partner_registry').select('*').eq('id', partner_id).execute()
+        result = await run_query(supabase.table('partner_registry').select('*').eq('id', partner_id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail=f"Partner {partner_id} not found")
@@ -318,17 +308,19 @@ async def get_partner_details(partner_id: str):
         partner = result.data[0]
         
         # Get inventory summary
-        inventory_result = supabase.table('partner_inventory')\
-            .select('*', count='exact')\
-            .eq('partner_id', partner_id)\
-            .execute()
+        inventory_result = await run_query(
+            supabase.table('partner_inventory')
+            .select('*', count='exact')
+            .eq('partner_id', partner_id)
+        )
         
         # Get active bids
-        bids_result = supabase.table('partner_bids')\
-            .select('*', count='exact')\
-            .eq('partner_id', partner_id)\
-            .eq('bid_status', 'submitted')\
-            .execute()
+        bids_result = await run_query(
+            supabase.table('partner_bids')
+            .select('*', count='exact')
+            .eq('partner_id', partner_id)
+            .eq('bid_status', 'submitted')
+        )
         
         return {
             "success": True,
@@ -350,6 +342,32 @@ async def get_partner_details(partner_id: str):
 # Partner Inventory Endpoints
 # ============================================================================
 
+INVENTORY_BUCKETS = ('day', 'week', 'month')
+INVENTORY_EXPORT_PAGE_SIZE = 1000
+
+
+def _inventory_rows_query(supabase, partner_id: str, start_date: Optional[date], end_date: Optional[date],
+                          room_type: Optional[str], min_available_rooms: Optional[int]):
+    """Filtered partner_inventory row query in (date, id) keyset order"""
+    query = supabase.table('partner_inventory')\
+        .select('*')\
+        .eq('partner_id', partner_id)
+    
+    # Apply date filters
+    if start_date:
+        query = query.gte('date', start_date.isoformat())
+    if end_date:
+        query = query.lte('date', end_date.isoformat())
+    
+    # Apply other filters
+    if room_type:
+        query = query.eq('room_type', room_type)
+    if min_available_rooms:
+        query = query.gte('available_rooms', min_available_rooms)
+    
+    return query
+
+
 @router.get("/partners/{partner_id}/inventory", response_model=Dict[str, Any])
 async def get_partner_inventory(
     partner_id: str,
@@ -357,56 +375,112 @@ async def get_partner_inventory(
     end_date: Optional[date] = Query(None, description="Filter by end date"),
     room_type: Optional[str] = Query(None, description="Filter by room type"),
     min_available_rooms: Optional[int] = Query(None, description="Minimum available rooms"),
+    bucket: Optional[str] = Query(None, description="Summary buckets: day, week, month"),
+    include_rows: bool = Query(True, description="Include row-level inventory"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0)
 ):
     """Get inventory for a specific partner with date range filtering"""
     try:
-        supabase = get_supabase_client()
-        query = supabase.table('partner_inventory')\
-            .select('*', count='exact')\
-            .eq('partner_id', partner_id)
-        
-        # Apply date filters
-        if start_date:
-            query = query.gte('date', start_date.isoformat())
-        if end_date:
-            query = query.lte('date', end_date.isoformat())
-        
-        # Apply other filters
-        if room_type:
-            query = query.eq('room_type', room_type)
-        if min_available_rooms:
-            query = query.gte('available_rooms', min_available_rooms)
-        
-        result = query.order('date').range(offset, offset + limit - 1).execute()
-        
-        # Calculate summary statistics
-        total_rooms = sum(r['available_rooms'] for r in result.data)
-        avg_price = sum(r['base_price'] for r in result.data) / len(result.data) if result.data else 0
+        if bucket and bucket not in INVENTORY_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"Invalid bucket: {bucket}")
+        
+        supabase = get_supabase_client(allow_anon=True)
+        
+        # Summary statistics are aggregated in the database
+        summary_query = supabase.rpc('partner_inventory_summary', {
+            'p_partner_id': partner_id,
+            'p_start': start_date.isoformat() if start_date else None,
+            'p_end': end_date.isoformat() if end_date else None,
+            'p_room_type': room_type,
+            'p_min_available': min_available_rooms or None,
+            'p_bucket': bucket
+        })
+        
+        page, next_cursor = [], None
+        if include_rows:
+            query = _inventory_rows_query(supabase, partner_id, start_date, end_date, room_type, min_available_rooms)
+            # One extra row tells whether there is a next page
+            query = keyset_query(query, 'date', cursor, limit, offset)
+            rows_result, summary_result = await asyncio.gather(run_query(query), run_query(summary_query))
+            page, next_cursor = keyset_page(rows_result.data or [], 'date', limit)
+        else:
+            summary_result = await run_query(summary_query)
+        
+        summary_rows = summary_result.data or []
+        overall = next((r for r in summary_rows if r.get('bucket_start') is None), {})
+        total = overall.get('row_count', 0)
+        
+        summary = {
+            "total_available_rooms": overall.get('total_available_rooms', 0),
+            "average_price": float(overall.get('average_price') or 0),
+            "date_range": {
+                "start": start_date.isoformat() if start_date else "all",
+                "end": end_date.isoformat() if end_date else "all"
+            }
+        }
+        if bucket:
+            summary["bucket"] = bucket
+            summary["buckets"] = [
+                {
+                    "start": r['bucket_start'],
+                    "count": r['row_count'],
+                    "total_available_rooms": r['total_available_rooms'],
+                    "average_price": float(r['average_price'] or 0),
+                    "min_price": r.get('min_price'),
+                    "max_price": r.get('max_price'),
+                    "blackout_days": r.get('blackout_days', 0)
+                }
+                for r in summary_rows if r.get('bucket_start') is not None
+            ]
         
         return {
             "success": True,
             "partner_id": partner_id,
-            "count": result.count,
-            "inventory": result.data,
-            "summary": {
-                "total_available_rooms": total_rooms,
-                "average_price": round(avg_price, 2),
-                "date_range": {
-                    "start": start_date.isoformat() if start_date else "all",
-                    "end": end_date.isoformat() if end_date else "all"
-                }
-            },
+            "count": total,
+            "inventory": page,
+            "summary": summary,
             "pagination": {
                 "limit": limit,
-                "offset": offset,
-                "total": result.count
+                "offset": offset if not cursor else None,
+                "total": total,
+                "next_cursor": next_cursor
             }
         }
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch inventory: {str(e)}")
 
+@router.get("/partners/{partner_id}/inventory/export")
+async def export_partner_inventory(
+    partner_id: str,
+    start_date: Optional[date] = Query(None, description="Filter by start date"),
+    end_date: Optional[date] = Query(None, description="Filter by end date"),
+    room_type: Optional[str] = Query(None, description="Filter by room type"),
+    min_available_rooms: Optional[int] = Query(None, description="Minimum available rooms")
+):
+    """Stream every matching inventory row as NDJSON, fetched page by page with a keyset cursor"""
+    supabase = get_supabase_client(allow_anon=True)
+    
+    async def rows():
+        key = None
+        while True:
+            query = _inventory_rows_query(supabase, partner_id, start_date, end_date, room_type, min_available_rooms)
+            query = apply_keyset(query, 'date', key)
+            result = await run_query(query.order('date').order('id').limit(INVENTORY_EXPORT_PAGE_SIZE))
+            batch = result.data or []
+            if batch:
+                yield ''.join(json.dumps(r, default=str) + '\n' for r in batch)
+            if len(batch) < INVENTORY_EXPORT_PAGE_SIZE:
+                return
+            key = {'date': batch[-1]['date'], 'id': batch[-1]['id']}
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
 # ============================================================================
 # Partner Bidding Endpoints
 # ============================================================================
@@ -415,10 +489,10 @@ async def get_partner_inventory(
 async def create_bid(partner_id: str, bid: BidCreate):
     """Create a new bid for a user's dream"""
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Verify partner exists
-        partner_result = supabase.table('partner_registry').select('id').eq('id', partner_id).execute()
+        partner_result = await run_query(supabase.table('partner_registry').select('id').eq('id', partner_id))
         if not partner_result.data:
             raise HTTPException(status_code=404, detail=f"Partner {partner_id} not found")
         
@@ -442,7 +516,7 @@ async def create_bid(partner_id: str, bid: BidCreate):
             "submitted_at": datetime.utcnow().isoformat()
         }
         
-        result = supabase.table('partner_bids').insert(bid_data).execute()
+        result = await run_query(supabase.table('partner_bids').insert(bid_data))
         
         return {
             "success": True,
@@ -459,14 +533,16 @@ async def list_partner_bids(
     partner_id: str,
     bid_status: Optional[str] = Query(None, description="Filter by status: submitted, accepted, rejected, expired"),
     user_dream_id: Optional[str] = Query(None, description="Filter by user dream ID"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    count_mode: str = Query("estimated", description="Total count: exact, estimated or none"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0)
 ):
-    """List all bids for a specific partner"""
+    """List all bids for a specific partner (newest first)"""
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         query = supabase.table('partner_bids')\
-            .select('*', count='exact')\
+            .select('*', count=count_method(count_mode))\
             .eq('partner_id', partner_id)
         
         # Apply filters
@@ -475,11 +551,12 @@ async def list_partner_bids(
         if user_dream_id:
             query = query.eq('user_dream_id', user_dream_id)
         
-        result = query.order('submitted_at', desc=True).range(offset, offset + limit - 1).execute()
+        result = await run_query(keyset_query(query, 'submitted_at', cursor, limit, offset, descending=True))
+        page, next_cursor = keyset_page(result.data or [], 'submitted_at', limit)
         
         # Calculate statistics
         status_counts = {}
-        for bid in result.data:
+        for bid in page:
             status = bid['bid_status']
             status_counts[status] = status_counts.get(status, 0) + 1
         
@@ -487,17 +564,21 @@ async def list_partner_bids(
             "success": True,
             "partner_id": partner_id,
             "count": result.count,
-            "bids": result.data,
+            "bids": page,
             "statistics": {
                 "by_status": status_counts,
                 "total_bids": result.count
             },
             "pagination": {
                 "limit": limit,
-                "offset": offset,
-                "total": result.count
+                "offset": offset if not cursor else None,
+                "total": result.count,
+                "count_mode": count_mode,
+                "next_cursor": next_cursor
             }
         }
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bids: {str(e)}")
 
@@ -513,14 +594,15 @@ async def update_bid_status(
         if status not in valid_statuses:
             raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
         
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Verify bid belongs to partner
-        bid_result = supabase.table('partner_bids')\
-            .select('*')\
-            .eq('id', bid_id)\
-            .eq('partner_id', partner_id)\
-            .execute()
+        bid_result = await run_query(
+            supabase.table('partner_bids')
+            .select('*')
+            .eq('id', bid_id)
+            .eq('partner_id', partner_id)
+        )
         
         if not bid_result.data:
             raise HTTPException(status_code=404, detail=f"Bid {bid_id} not found for partner {partner_id}")
@@ -530,10 +612,11 @@ async def update_bid_status(
         if status == 'accepted':
             update_data['accepted_at'] = datetime.utcnow().isoformat()
         
-        result = supabase.table('partner_bids')\
-            .update(update_data)\
-            .eq('id', bid_id)\
-            .execute()
+        result = await run_query(
+            supabase.table('partner_bids')
+            .update(update_data)
+            .eq('id', bid_id)
+        )
         
         return {
             "success": True,
@@ -553,37 +636,44 @@ async def update_bid_status(
 async def marketplace_health():
     """Get health status of the marketplace system"""
     try:
-        supabase = get_supabase_client()
-        
-        # Get counts
-        providers = supabase.table('provider_registry').select('*', count='exact').execute()
-        active_providers = supabase.table('provider_registry').select('*', count='exact').eq('is_active', True).execute()
-        partners = supabase.table('partner_registry').select('*', count='exact').execute()
-        active_partners = supabase.table('partner_registry').select('*', count='exact').eq('is_active', True).execute()
-        inventory = supabase.table('partner_inventory').select('*', count='exact').execute()
-        bids = supabase.table('partner_bids').select('*', count='exact').execute()
-        
-        return {
+        now = time.monotonic()
+        if _health_cache['data'] is not None and now - _health_cache['at'] < MARKETPLACE_HEALTH_TTL_SECONDS:
+            return {**_health_cache['data'], "registry_cache": provider_registry_cache.get_stats()}
+        
+        supabase = get_supabase_client(allow_anon=True)
+        
+        # Get counts (head-only, concurrently; provider counts come from the registry cache)
+        providers = await provider_registry_cache.get_all()
+        counts = await run_counts({
+            'partners': count_query(supabase, 'partner_registry'),
+            'active_partners': count_query(supabase, 'partner_registry').eq('is_active', True),
+            'inventory': count_query(supabase, 'partner_inventory'),
+            'bids': count_query(supabase, 'partner_bids')
+        })
+        
+        health = {
             "success": True,
             "status": "healthy",
             "timestamp": datetime.utcnow().isoformat(),
             "statistics": {
                 "providers": {
-                    "total": providers.count,
-                    "active": active_providers.count
+                    "total": len(providers),
+                    "active": len(filter_providers(providers, is_active=True))
                 },
                 "partners": {
-                    "total": partners.count,
-                    "active": active_partners.count
+                    "total": counts['partners'],
+                    "active": counts['active_partners']
                 },
                 "inventory": {
-                    "total_records": inventory.count
+                    "total_records": counts['inventory']
                 },
                 "bids": {
-                    "total": bids.count
+                    "total": counts['bids']
                 }
             }
         }
+        _health_cache.update(data=health, at=now)
+        return {**health, "registry_cache": provider_registry_cache.get_stats()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
@@ -591,17 +681,17 @@ async def marketplace_health():
 async def marketplace_stats():
     """Get comprehensive marketplace statistics"""
     try:
-        supabase = get_supabase_client()
+        supabase = get_supabase_client(allow_anon=True)
         
         # Provider statistics
-        providers = supabase.table('provider_registry').select('provider_type').execute()
         provider_types = {}
-        for p in providers.data:
+        providers = await provider_registry_cache.get_all()
+        for p in providers:
             ptype = p['provider_type']
             provider_types[ptype] = provider_types.get(ptype, 0) + 1
         
         # Partner statistics
-        partners = supabase.table('partner_registry').select('partner_type, total_revenue, total_bookings').execute()
+        partners = await run_query(supabase.table('partner_registry').select('partner_type, total_revenue, total_bookings'))
         partner_types = {}
         total_revenue = 0
         total_bookings = 0
@@ -612,12 +702,12 @@ async def marketplace_stats():
             total_bookings += p.get('total_bookings', 0) or 0
         
         # Inventory statistics
-        inventory = supabase.table('partner_inventory').select('available_rooms, base_price').execute()
+        inventory = await run_query(supabase.table('partner_inventory').select('available_rooms, base_price'))
         total_rooms = sum(i['available_rooms'] for i in inventory.data)
         avg_price = sum(i['base_price'] for i in inventory.data) / len(inventory.data) if inventory.data else 0
         
         # Bid statistics
-        bids = supabase.table('partner_bids').select('bid_status, offer_price').execute()
+        bids = await run_query(supabase.table('partner_bids').select('bid_status, offer_price'))
         bid_statuses = {}
         total_bid_value = 0
         for b in bids.data:
@@ -630,7 +720,7 @@ async def marketplace_stats():
             "timestamp": datetime.utcnow().isoformat(),
             "providers": {
                 "by_type": provider_types,
-                "total": len(providers.data)
+                "total": len(providers)
             },
             "partners": {
                 "by_type": partner_types,
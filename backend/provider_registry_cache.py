@@ -0,0 +1,141 @@
+"""
+Provider Registry Cache
+Shared read-through cache of provider_registry rows
+
+The registry is a few dozen rows that change only on admin actions, health
+checks and registry loads, but the marketplace, analytics, health scheduler
+and provider manager each re-read the whole table per request. They now
+share one in-memory copy, reloaded at most once per TTL and dropped
+explicitly whenever the backend writes to the registry.
+
+Usage:
+    providers = await provider_registry_cache.get_all()
+    provider = await provider_registry_cache.get_by_id(provider_id)
+    provider_registry_cache.invalidate()   # after any registry write
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_REGISTRY_TTL_SECONDS = float(os.getenv('PROVIDER_REGISTRY_TTL_SECONDS', '30'))
+
+SERVICE_SUPPORT_FLAGS = {
+    'hotel': 'supports_hotels',
+    'flight': 'supports_flights',
+    'activity': 'supports_activities'
+}
+
+
+def filter_providers(providers: List[Dict[str, Any]],
+                     provider_type: Optional[str] = None,
+                     is_active: Optional[bool] = None,
+                     service_type: Optional[str] = None,
+                     region: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Apply the registry filters the endpoints used to push into the query"""
+    support_flag = SERVICE_SUPPORT_FLAGS.get(service_type) if service_type else None
+    return [
+        p for p in providers
+        if (provider_type is None or p.get('provider_type') == provider_type)
+        and (is_active is None or bool(p.get('is_active')) == is_active)
+        and (support_flag is None or p.get(support_flag))
+        and (region is None or region in (p.get('supported_regions') or []))
+    ]
+
+
+class ProviderRegistryCache:
+    """TTL cache of all provider_registry rows, ordered by priority"""
+
+    def __init__(self, ttl_seconds: float = PROVIDER_REGISTRY_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = 0.0
+        self._loading: Optional[asyncio.Future] = None
+        # Bumped on invalidation so a load that raced a write is not kept
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'invalidations': 0}
+
+    def _fresh(self) -> bool:
+        return self._rows is not None and self._clock() - self._loaded_at < self.ttl_seconds
+
+    async def get_all(self) -> List[Dict[str, Any]]:
+        """All registry rows ordered by priority (rows are shared; do not mutate)"""
+        if self._fresh():
+            self._stats['hits'] += 1
+            return list(self._rows)
+        self._stats['misses'] += 1
+        # Concurrent misses wait on the same load
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(self._load())
+        return list(await asyncio.shield(self._loading))
+
+    async def get_active(self, **filters: Any) -> List[Dict[str, Any]]:
+        return filter_providers(await self.get_all(), is_active=True, **filters)
+
+    async def get_by_id(self, provider_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self.get_all()
+        if self._rows is None:
+            # Invalidated during the load: the rows were returned but not cached
+            return next((p for p in rows if str(p.get('id')) == str(provider_id)), None)
+        return self._by_id.get(str(provider_id))
+
+    async def get_by_name(self, provider_name: str) -> Optional[Dict[str, Any]]:
+        rows = await self.get_all()
+        if self._rows is None:
+            return next((p for p in rows if p.get('provider_name') == provider_name), None)
+        return self._by_name.get(provider_name)
+
+    async def _load(self) -> List[Dict[str, Any]]:
+        generation = self._generation
+        supabase = get_supabase_client(allow_anon=True)
+        result = await run_query(supabase.table('provider_registry').select('*').order('priority'))
+        rows = sorted(result.data or [], key=lambda p: p.get('priority') or 0)
+        self._stats['loads'] += 1
+        if generation == self._generation:
+            self.load(rows)
+        return rows
+
+    def load(self, rows: List[Dict[str, Any]]):
+        """Replace the cached rows (full registry, any order)"""
+        self._rows = sorted(rows, key=lambda p: p.get('priority') or 0)
+        self._by_id = {str(p.get('id')): p for p in self._rows}
+        self._by_name = {p.get('provider_name'): p for p in self._rows}
+        self._loaded_at = self._clock()
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """Drop the cached rows and reload them now (registry loads)"""
+        self.invalidate()
+        return await self.get_all()
+
+    def invalidate(self):
+        self._generation += 1
+        self._stats['invalidations'] += 1
+        self._rows = None
+        self._by_id = {}
+        self._by_name = {}
+        self._loading = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            'providers': len(self._rows or []),
+            'ttl_seconds': self.ttl_seconds,
+            'age_seconds': round(self._clock() - self._loaded_at, 1) if self._rows is not None else None,
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global instance
+provider_registry_cache = ProviderRegistryCache()
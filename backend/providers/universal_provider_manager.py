@@ -8,6 +8,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import importlib
 import asyncio
+from supabase_async import run_query
+from provider_registry_cache import provider_registry_cache
+from credential_cache import credential_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,7 @@ class UniversalProviderManager:
         self.providers = {}  # Loaded provider instances
         self.registry = []  # Provider configurations from DB
         self.provider_adapters = {}  # Provider class mappings
+        self.credential_keys = {}  # provider_id -> credential keys held in credential_cache
         
         # Register available provider adapters
         self._register_default_adapters()
@@ -43,10 +47,15 @@ class UniversalProviderManager:
         This allows adding providers without code changes
         """
         try:
-            # Fetch active providers ordered by priority
-            response = await supabase_client.table('provider_registry').select('*').eq('is_active', True).order('priority').execute()
+            # Fetch the whole registry; it also replaces the shared registry cache
+            response = await run_query(supabase_client.table('provider_registry').select('*').order('priority'))
+            provider_registry_cache.invalidate()
+            provider_registry_cache.load(response.data or [])
             
-            self.registry = response.data if response.data else []
+            self.registry = await provider_registry_cache.get_active()
+            
+            # Decrypt every provider's credentials up front
+            await self._bootstrap_credentials([p['id'] for p in self.registry], supabase_client)
             
             # Load each provider
             for provider_config in self.registry:
@@ -96,20 +105,64 @@ class UniversalProviderManager:
         except Exception as e:
             logger.error(f"Failed to load provider {config.get('provider_name')}: {e}")
     
+    @staticmethod
+    def _decrypt_vault_secret(vault_id: str) -> str:
+        # TODO: Decrypt from Supabase Vault
+        # For now, return placeholder
+        return 'VAULT_SECRET_' + vault_id
+    
+    def _cache_credentials(self, rows: List[Dict[str, Any]]):
+        """Decrypt credential rows into credential_cache, remembering each provider's keys"""
+        keys = {}
+        for cred in rows:
+            keys.setdefault(cred['provider_id'], []).append(cred['credential_key'])
+        credential_cache.bulk_decrypt(
+            {(cred['provider_id'], cred['credential_key']): cred['credential_value_vault_id'] for cred in rows},
+            self._decrypt_vault_secret
+        )
+        self.credential_keys.update(keys)
+    
+    async def _bootstrap_credentials(self, provider_ids: List[str], supabase_client):
+        """Fetch and decrypt credentials for all providers in one query"""
+        if not provider_ids:
+            return
+        try:
+            response = await run_query(
+                supabase_client.table('provider_credentials').select('*')
+                .in_('provider_id', provider_ids).eq('is_active', True)
+            )
+            for provider_id in provider_ids:
+                credential_cache.invalidate_provider(provider_id)
+                self.credential_keys[provider_id] = []
+            self._cache_credentials(response.data or [])
+            logger.info(f"🔐 Decrypted {len(response.data or [])} provider credentials")
+        except Exception as e:
+            logger.error(f"Failed to bootstrap credentials: {e}")
+    
     async def _get_provider_credentials(self, provider_id: str, supabase_client) -> Dict[str, str]:
         """
         Retrieve provider credentials from Supabase Vault
+        Served from credential_cache; fetched and decrypted only when not cached
         """
+        # No known keys (e.g. none existed at bootstrap) is a miss, so
+        # credentials added later are picked up
+        keys = self.credential_keys.get(provider_id)
+        if keys:
+            credentials = {key: credential_cache.get((provider_id, key)) for key in keys}
+            if all(value is not None for value in credentials.values()):
+                return credentials
+        
         try:
-            response = await supabase_client.table('provider_credentials').select('*').eq('provider_id', provider_id).eq('is_active', True).execute()
+            response = await run_query(supabase_client.table('provider_credentials').select('*').eq('provider_id', provider_id).eq('is_active', True))
             
-            credentials = {}
-            for cred in response.data:
-                # TODO: Decrypt from Supabase Vault
-                # For now, return placeholder
-                credentials[cred['credential_key']] = 'VAULT_SECRET_' + cred['credential_value_vault_id']
+            credential_cache.invalidate_provider(provider_id)
+            self.credential_keys[provider_id] = []
+            self._cache_credentials(response.data or [])
             
-            return credentials
+            return {
+                cred['credential_key']: credential_cache.get((provider_id, cred['credential_key']))
+                for cred in response.data or []
+            }
             
         except Exception as e:
             logger.error(f"Failed to retrieve credentials: {e}")
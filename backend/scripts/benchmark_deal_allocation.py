@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Deal Allocation Benchmark
+Runs the global capacity-aware allocator over synthetic dreams and
+campaigns and checks that no campaign day is overbooked
+
+Usage:
+    python scripts/benchmark_deal_allocation.py [dreams] [campaigns]
+"""
+
+import sys
+import time
+import random
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deal_allocator import allocate_deals  # noqa: E402
+
+TAGS = ["family", "beach", "spiritual", "pet-friendly", "concerts", "adventure",
+        "luxury", "culture", "food", "wellness", "nightlife", "ski"]
+TIERS = ["bronze", "silver", "gold", "platinum"]
+
+
+def generate(rng, dream_count, campaign_count):
+    campaigns = []
+    for j in range(campaign_count):
+        start = date(2025, 6, 1) + timedelta(days=rng.randint(0, 120))
+        campaigns.append({
+            "id": f"campaign_{j}",
+            "discount": round(rng.uniform(5, 70), 2),
+            "audience_tags": rng.sample(TAGS, rng.randint(1, 3)),
+            "blackout": [str(start + timedelta(days=rng.randint(0, 30))) for _ in range(rng.randint(0, 4))],
+            "start_date": str(start),
+            "end_date": str(start + timedelta(days=rng.randint(14, 60))),
+            "max_allocation": rng.randint(1, 8),
+            "metadata": {"occupancy_rate": rng.uniform(5, 90)}
+        })
+    dreams = []
+    for i in range(dream_count):
+        dream = {"id": f"dream_{i}", "user_id": f"user_{i % (dream_count // 2 or 1)}",
+                 "budget": rng.uniform(300, 6000), "tags": rng.sample(TAGS, rng.randint(0, 4))}
+        if rng.random() < 0.5:
+            start = date(2025, 6, 1) + timedelta(days=rng.randint(0, 150))
+            dream["preferred_start_date"] = str(start)
+            dream["preferred_end_date"] = str(start + timedelta(days=rng.randint(3, 21)))
+        else:
+            dream["flexible_dates"] = True
+        dreams.append(dream)
+    tiers = {f"user_{u}": rng.choice(TIERS) for u in range(dream_count // 2 or 1)}
+    return dreams, campaigns, tiers
+
+
+def main():
+    dream_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    campaign_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    print("=" * 70)
+    print(f"DEAL ALLOCATION - {dream_count:,} dreams x {campaign_count:,} campaigns")
+    print("=" * 70)
+
+    dreams, campaigns, tiers = generate(random.Random(42), dream_count, campaign_count)
+
+    start = time.perf_counter()
+    result = allocate_deals(dreams, campaigns, tiers, today=date(2025, 6, 1))
+    elapsed = time.perf_counter() - start
+
+    capacity = {c["id"]: c["max_allocation"] for c in campaigns}
+    per_day = Counter((a.campaign_id, a.stay_date) for a in result.assignments)
+    assert all(count <= capacity[cid] for (cid, _), count in per_day.items())
+
+    summary = result.summary()
+    print(f"assigned:     {summary['assigned']:,} / {dream_count:,}")
+    print(f"total score:  {summary['total_score']:,.2f}")
+    print(f"stages (ms):  {summary['stage_timings_ms']}")
+    print(f"elapsed:      {elapsed:.2f}s (no campaign day over its allocation)")
+
+
+if __name__ == "__main__":
+    main()
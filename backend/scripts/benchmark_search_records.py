@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Advanced Search Record Benchmark
+Compares validating every candidate as a Pydantic model against keeping
+compact slot records through filter/sort and converting only the page
+
+Usage:
+    python scripts/benchmark_search_records.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from advanced_search import HotelResult, generate_mock_hotels  # noqa: E402
+
+SIZES = [1_000, 10_000]
+PER_PAGE = 20
+ROUNDS = 5
+
+
+def run_model_path(records):
+    """Legacy path: one validated model per candidate"""
+    models = [record.to_model() for record in records]
+    filtered = [m for m in models if m.guest_rating >= 8.0 and "wifi" in m.amenities]
+    filtered.sort(key=lambda m: m.price_per_night)
+    return filtered[:PER_PAGE]
+
+
+def run_record_path(records):
+    """Compact path: records through the pipeline, models for the page only"""
+    filtered = [r for r in records if r.guest_rating >= 8.0 and "wifi" in r.amenities]
+    filtered.sort(key=lambda r: r.price_per_night)
+    return [r.to_model() for r in filtered[:PER_PAGE]]
+
+
+def best_of(fn, records) -> float:
+    """Best wall time in milliseconds over ROUNDS runs"""
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(records)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    print("=" * 70)
+    print("ADVANCED SEARCH - MODEL VS COMPACT RECORD PIPELINE")
+    print("=" * 70)
+
+    for size in SIZES:
+        records = generate_mock_hotels("Benchmark City", size)
+        assert run_model_path(records) == run_record_path(records)
+        assert all(isinstance(m, HotelResult) for m in run_record_path(records))
+
+        model_ms = best_of(run_model_path, records)
+        record_ms = best_of(run_record_path, records)
+
+        print(f"{size:>6} results | models: {model_ms:8.2f}ms | records: {record_ms:8.2f}ms | "
+              f"speedup: {model_ms / max(record_ms, 1e-6):5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
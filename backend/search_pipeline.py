@@ -0,0 +1,206 @@
+"""
+Search Pipeline
+Single-pass filter evaluation with heap-based top-k pagination
+
+A pipeline is compiled once per search request from the request's filters
+and sort options, then executed over compact result records. Filtering is a
+single scan with one combined predicate; pagination selects only the
+records up to the requested page with heapq instead of sorting everything,
+so page 1 of n results costs O(n log k) rather than O(n log n).
+
+Facet counts are gathered in the same scan. A facet counts a record when it
+passes every filter except the ones on the facet's own attribute, so the UI
+can show how many results each alternative value would give.
+"""
+
+import heapq
+from bisect import bisect_right
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+Predicate = Callable[[Any], bool]
+
+
+def compile_predicate(predicates: Sequence[Predicate]) -> Optional[Predicate]:
+    """Combine filter predicates into one callable (None when nothing filters)"""
+    predicates = tuple(predicates)
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def combined(record) -> bool:
+        for predicate in predicates:
+            if not predicate(record):
+                return False
+        return True
+
+    return combined
+
+
+class Facet:
+    """
+    Count of records per value of one attribute
+
+    Args:
+        name: Facet name in the response
+        values: Maps a record to the facet values it contributes to
+        filters: Names of the pipeline filters on this attribute, which are
+            ignored when counting this facet
+        seed: Values reported even when their count is zero, in display order
+    """
+
+    def __init__(self, name: str, values: Callable[[Any], Iterable[Hashable]],
+                 filters: Sequence[str] = (), seed: Sequence[Hashable] = ()):
+        self.name = name
+        self.values = values
+        self.filters = frozenset(filters)
+        self.seed = tuple(seed)
+
+    @classmethod
+    def field(cls, name: str, attribute: str, filters: Sequence[str] = ()) -> "Facet":
+        """Facet over a single-valued record attribute"""
+        getter = attrgetter(attribute)
+        return cls(name, lambda record: (getter(record),), filters)
+
+    @classmethod
+    def multi_field(cls, name: str, attribute: str, filters: Sequence[str] = ()) -> "Facet":
+        """Facet over a list-valued record attribute (e.g. amenities)"""
+        return cls(name, attrgetter(attribute), filters)
+
+    @classmethod
+    def buckets(cls, name: str, attribute: str, bounds: Sequence[float],
+                filters: Sequence[str] = ()) -> "Facet":
+        """Facet over numeric ranges split at the given ascending bounds"""
+        bounds = tuple(bounds)
+        labels = [f"{int(lo)}-{int(hi)}" for lo, hi in zip((0,) + bounds, bounds)]
+        labels.append(f"{int(bounds[-1])}+")
+        getter = attrgetter(attribute)
+        return cls(
+            name,
+            lambda record: (labels[bisect_right(bounds, getter(record))],),
+            filters,
+            seed=labels
+        )
+
+    def new_counts(self) -> Dict[Hashable, int]:
+        return {value: 0 for value in self.seed}
+
+    def finalize(self, counts: Dict[Hashable, int]) -> Dict[Hashable, int]:
+        """Seeded facets keep their order; others are ordered by count"""
+        if self.seed:
+            return counts
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+@dataclass
+class SearchPage:
+    """One page of pipeline output"""
+    records: List[Any]
+    total_results: int
+    page: int
+    per_page: int
+    facets: Optional[Dict[str, Dict[Hashable, int]]] = None
+
+    @property
+    def total_pages(self) -> int:
+        return (self.total_results + self.per_page - 1) // self.per_page
+
+
+class SearchPipeline:
+    """Filter/sort/paginate plan compiled once per search request"""
+
+    def __init__(self, predicates: Dict[str, Predicate], sort_field: str, descending: bool = False,
+                 facets: Sequence[Facet] = ()):
+        self.predicates = dict(predicates)
+        self.predicate = compile_predicate(self.predicates.values())
+        self.sort_field = sort_field
+        self.sort_key = attrgetter(sort_field)
+        self.descending = descending
+        self.facets = tuple(facets)
+
+    def filter(self, records: Sequence[Any]) -> List[Any]:
+        """Single pass over the candidates with the combined predicate"""
+        if self.predicate is None:
+            return list(records)
+        return [record for record in records if self.predicate(record)]
+
+    def filter_with_facets(self, records: Sequence[Any]) -> Tuple[List[Any], Dict[str, Dict[Hashable, int]]]:
+        """
+        Single pass that filters and counts facets together
+
+        Each record is checked against the filters until a second one fails.
+        Records that pass everything count towards every facet; records that
+        fail exactly one filter count only towards facets owning that filter.
+        """
+        checks = tuple(self.predicates.items())
+        facets = self.facets
+        counts = [facet.new_counts() for facet in facets]
+        matches = []
+
+        for record in records:
+            failed = None
+            failures = 0
+            for name, predicate in checks:
+                if not predicate(record):
+                    failures += 1
+                    if failures > 1:
+                        break
+                    failed = name
+
+            if failures > 1:
+                continue
+            if failures == 0:
+                matches.append(record)
+
+            for facet, facet_counts in zip(facets, counts):
+                if failed is not None and failed not in facet.filters:
+                    continue
+                for value in facet.values(record):
+                    facet_counts[value] = facet_counts.get(value, 0) + 1
+
+        return matches, {
+            facet.name: facet.finalize(facet_counts)
+            for facet, facet_counts in zip(facets, counts)
+        }
+
+    def top_k(self, records: Sequence[Any], k: int) -> List[Any]:
+        """
+        First k records in sort order
+
+        Uses heap selection when k is smaller than the candidate set. Ties keep
+        their input order, matching a stable full sort.
+        """
+        if k >= len(records):
+            return sorted(records, key=self.sort_key, reverse=self.descending)
+        select = heapq.nlargest if self.descending else heapq.nsmallest
+        return select(k, records, key=self.sort_key)
+
+    def scan(self, records: Sequence[Any], with_facets: bool = True
+             ) -> Tuple[List[Any], Optional[Dict[str, Dict[Hashable, int]]]]:
+        """Filter the candidates, counting facets in the same pass when configured"""
+        if self.facets and with_facets:
+            return self.filter_with_facets(records)
+        return self.filter(records), None
+
+    def paginate(self, matches: Sequence[Any], page: int, per_page: int) -> List[Any]:
+        """Records on the requested page of already-filtered matches"""
+        start_idx = (page - 1) * per_page
+        end_idx = start_idx + per_page
+        if start_idx >= len(matches):
+            return []
+        return self.top_k(matches, end_idx)[start_idx:end_idx]
+
+    def execute(self, records: Sequence[Any], page: int, per_page: int,
+                with_facets: bool = True) -> SearchPage:
+        """Filter, select and slice the requested page"""
+        matches, facet_counts = self.scan(records, with_facets)
+
+        return SearchPage(
+            records=self.paginate(matches, page, per_page),
+            total_results=len(matches),
+            page=page,
+            per_page=per_page,
+            facets=facet_counts
+        )
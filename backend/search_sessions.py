@@ -0,0 +1,189 @@
+"""
+Search Sessions
+Snapshots of provider result sets so paging never re-queries providers
+
+The first request for a search stores the merged candidate set under a
+search_id. Later pages, re-sorts and re-filters for the same search run
+against that snapshot until it expires or the caller asks for a refresh.
+Snapshots live in a bounded in-process store with approximate memory
+accounting and least-recently-used eviction.
+"""
+
+import os
+import sys
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from search_pipeline import SearchPipeline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = int(os.getenv('SEARCH_SESSION_TTL_SECONDS', '900'))
+DEFAULT_MAX_BYTES = int(os.getenv('SEARCH_SESSION_MAX_MB', '64')) * 1024 * 1024
+DEFAULT_MAX_SESSIONS = int(os.getenv('SEARCH_SESSION_MAX_COUNT', '1000'))
+
+POINTER_BYTES = 8  # one list slot referencing a shared record
+MAX_VIEWS_PER_SESSION = 16
+
+
+def estimate_record_bytes(record: Any) -> int:
+    """Shallow size of a slot record plus its field values"""
+    size = sys.getsizeof(record)
+    for name in getattr(record, '__slots__', ()):
+        size += sys.getsizeof(getattr(record, name, None))
+    return size
+
+
+class SearchView:
+    """Filtered (and lazily ranked) subset of a session for one filter set"""
+
+    __slots__ = ('matches', 'facets', 'ranked', 'rank_signature')
+
+    def __init__(self, matches: List[Any], facets: Optional[Dict[str, Any]]):
+        self.matches = matches
+        self.facets = facets
+        self.ranked: Optional[List[Any]] = None
+        self.rank_signature = None
+
+    @property
+    def total_results(self) -> int:
+        return len(self.matches)
+
+    @property
+    def size_bytes(self) -> int:
+        ranked = len(self.ranked) if self.ranked is not None else 0
+        return (len(self.matches) + ranked) * POINTER_BYTES
+
+    def page(self, pipeline: SearchPipeline, page: int, per_page: int) -> List[Any]:
+        """
+        Records for one page in the pipeline's sort order
+
+        The first page uses heap selection. Deeper pages fully rank the view
+        once per sort order so further paging is a slice.
+        """
+        signature = (pipeline.sort_field, pipeline.descending)
+        if self.rank_signature != signature:
+            if page == 1:
+                return pipeline.paginate(self.matches, page, per_page)
+            self.ranked = pipeline.top_k(self.matches, len(self.matches))
+            self.rank_signature = signature
+
+        start_idx = (page - 1) * per_page
+        return self.ranked[start_idx:start_idx + per_page]
+
+
+class SearchSession:
+    """Snapshot of one search's merged provider results"""
+
+    def __init__(self, search_id: str, kind: str, query_key: str, records: List[Any], ttl_seconds: int):
+        self.search_id = search_id
+        self.kind = kind
+        self.query_key = query_key
+        self.records = records
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl_seconds
+        self.views: Dict[str, SearchView] = {}
+        self.records_bytes = sum(estimate_record_bytes(r) for r in records) + len(records) * POINTER_BYTES
+
+    @property
+    def size_bytes(self) -> int:
+        return self.records_bytes + sum(view.size_bytes for view in self.views.values())
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+    def matches(self, kind: str, query_key: str) -> bool:
+        return self.kind == kind and self.query_key == query_key
+
+    def get_view(self, view_key: str) -> Optional[SearchView]:
+        view = self.views.pop(view_key, None)
+        if view is not None:
+            # Re-insert to keep views in least-recently-used order
+            self.views[view_key] = view
+        return view
+
+    def add_view(self, view_key: str, view: SearchView) -> SearchView:
+        self.views[view_key] = view
+        while len(self.views) > MAX_VIEWS_PER_SESSION:
+            del self.views[next(iter(self.views))]
+        return view
+
+
+class SearchSessionStore:
+    """Bounded LRU store of search sessions with memory accounting"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, SearchSession]" = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(session.size_bytes for session in self._sessions.values())
+
+    def create(self, kind: str, query_key: str, records: List[Any]) -> SearchSession:
+        """Store a new snapshot and evict older sessions to stay within budget"""
+        session = SearchSession(str(uuid.uuid4()), kind, query_key, records, self.ttl_seconds)
+        self._sessions[session.search_id] = session
+        self.enforce_limits()
+        return session
+
+    def get(self, search_id: Optional[str], kind: str, query_key: str) -> Optional[SearchSession]:
+        """Live session for this search, refreshed in LRU order"""
+        session = self._sessions.get(search_id) if search_id else None
+        if session is None:
+            self._stats['misses'] += 1
+            return None
+
+        if session.is_expired():
+            self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            del self._sessions[search_id]
+            return None
+
+        if not session.matches(kind, query_key):
+            self._stats['misses'] += 1
+            return None
+
+        self._sessions.move_to_end(search_id)
+        self._stats['hits'] += 1
+        return session
+
+    def discard(self, search_id: Optional[str]):
+        self._sessions.pop(search_id, None)
+
+    def enforce_limits(self):
+        """Drop expired sessions, then least recently used ones over budget"""
+        now = time.time()
+        for search_id in [sid for sid, s in self._sessions.items() if s.is_expired(now)]:
+            del self._sessions[search_id]
+            self._stats['expirations'] += 1
+
+        used = self.used_bytes
+        # Never evict the most recent session, even if it alone exceeds the budget
+        while len(self._sessions) > 1 and (used > self.max_bytes or len(self._sessions) > self.max_sessions):
+            search_id, session = self._sessions.popitem(last=False)
+            used -= session.size_bytes
+            self._stats['evictions'] += 1
+            logger.info(f"Evicted search session {search_id} ({session.size_bytes} bytes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'sessions': len(self._sessions),
+            'used_bytes': self.used_bytes,
+            'max_bytes': self.max_bytes,
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            **self._stats
+        }
+
+
+# Global instance
+search_sessions = SearchSessionStore()
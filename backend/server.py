@@ -1,8 +1,8 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Security
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Security, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import asyncio
 import json
@@ -27,9 +27,11 @@ load_dotenv(ROOT_DIR / '.env')
 from sentry_config import init_sentry
 init_sentry()
 
-# MongoDB connection
+# MongoDB connection (pool size and timeouts from MONGO_* env, see mongo_store)
+from mongo_store import create_mongo_client, ensure_indexes, find_page
+from keyset_pagination import PaginationError
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = create_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # Configure logging
@@ -95,6 +97,10 @@ except ImportError as e:
 
 # Import centralized configuration
 from supabase_config import get_config_instance, get_secret, get_provider_config, validate_configuration
+from supabase_async import run_query, supabase_executor
+from api_config_cache import api_config_cache
+from credential_cache import credential_cache, token_key
+from supabase_pool import ANON, get_supabase_client, is_configured as is_supabase_configured
 
 # Import enhanced provider system
 from provider_orchestrator import get_orchestrator
@@ -177,14 +183,31 @@ async def root():
 async def health():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@api_router.get("/health/supabase")
+async def supabase_health():
+    """Shared Supabase client pools: health per key role and usage metrics"""
+    from supabase_pool import check_health, get_pool_stats
+    checks = await check_health()
+    return {
+        "status": "healthy" if checks and all(c["status"] == "up" for c in checks.values()) else "degraded",
+        "checks": checks,
+        "pools": get_pool_stats(),
+        "executor": supabase_executor.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @api_router.get("/metrics/platform")
 async def get_platform_metrics(force_refresh: bool = False):
     """
     Platform-wide metrics - SINGLE SOURCE OF TRUTH
     Used by homepage, Travel Fund page, admin dashboard
     
+    Served from a snapshot refreshed in the background (see
+    "snapshot" in the response for its age and compute time).
+    
     Query params:
-    - force_refresh: bool (default False) - bypass cache
+    - force_refresh: bool (default False) - recompute the snapshot now
+      (concurrent force refreshes share one recomputation)
     """
     try:
         from unified_metrics_service import unified_metrics
@@ -197,6 +220,15 @@ async def get_platform_metrics(force_refresh: bool = False):
         logger.error(f"Platform metrics error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/fx/rates")
+async def get_fx_rates():
+    """Current in-memory FX rate table (USD base) and its freshness"""
+    from fx_rate_service import fx_rates
+    return {
+        "success": True,
+        **fx_rates.snapshot()
+    }
+
 @api_router.get("/placeholder/{width}/{height}")
 async def placeholder_image(width: int, height: int, text: str = "Placeholder"):
     """Simple placeholder image endpoint - returns SVG"""
@@ -217,11 +249,37 @@ async def create_status_check(input: StatusCheckCreate):
     _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
+STATUS_EXPORT_BATCH_SIZE = 500
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+async def get_status_checks(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    limit: int = Query(1000, ge=1, le=1000)
+):
+    """Status checks oldest first, one page at a time; X-Next-Cursor points at the next page"""
+    try:
+        status_checks, next_cursor = await find_page(db.status_checks, 'timestamp', cursor, limit)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+@api_router.get("/status/export")
+async def export_status_checks():
+    """Stream every status check as NDJSON straight off a batched Mongo cursor"""
+    async def rows():
+        cursor = (
+            db.status_checks.find({}, {'_id': 0})
+            .sort([('timestamp', 1), ('id', 1)])
+            .batch_size(STATUS_EXPORT_BATCH_SIZE)
+        )
+        async for status_check in cursor:
+            yield StatusCheck(**status_check).json() + '\n'
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
 @api_router.get("/environment/config")
 async def get_environment_config():
     """Get current environment configuration"""
@@ -253,6 +311,8 @@ async def switch_environment(env_switch: EnvironmentSwitch):
         )
         
         if result.returncode == 0:
+            # Provider configuration may differ per environment
+            api_config_cache.invalidate()
             return {
                 "success": True,
                 "message": f"Successfully switched to {target_env} environment",
@@ -1636,27 +1696,15 @@ class ExpediaActivitySearchRequest(BaseModel):
 # ==================================================
 
 async def get_supabase_config(provider: str, environment: str = "production"):
-    """Get provider configuration from Supabase"""
+    """Get provider configuration from Supabase (served from api_config_cache)"""
     try:
-        from supabase import create_client, Client
-        
-        # Initialize Supabase client with environment variables
-        supabase_url = os.environ.get('SUPABASE_URL')
-        supabase_key = os.environ.get('SUPABASE_ANON_KEY')
-        
-        if not supabase_url or not supabase_key:
+        if not is_supabase_configured(ANON):
             logger.error("Supabase credentials not found in environment variables")
             return None
-            
-        logger.info(f"Connecting to Supabase: {supabase_url}")
-        supabase: Client = create_client(supabase_url, supabase_key)
         
-        # Query api_configuration table
-        result = supabase.table('api_configuration').select('*').eq('provider', provider).eq('environment', environment).eq('is_active', True).execute()
+        config_data = await api_config_cache.get(provider, environment)
         
-        if result.data and len(result.data) > 0:
-            config_data = result.data[0]['config_data']
-            logger.info(f"Retrieved configuration for provider {provider}")
+        if config_data:
             return config_data
         
         logger.warning(f"No configuration found for provider {provider} in environment {environment}")
@@ -1669,25 +1717,23 @@ async def get_supabase_config(provider: str, environment: str = "production"):
 async def store_supabase_config(provider: str, config_data: dict, environment: str = "production"):
     """Store provider configuration in Supabase"""
     try:
-        from supabase import create_client, Client
-        
-        supabase_url = os.environ.get('SUPABASE_URL')
-        supabase_key = os.environ.get('SUPABASE_ANON_KEY')
-        
-        if not supabase_url or not supabase_key:
+        if not is_supabase_configured(ANON):
             logger.error("Supabase credentials not found in environment variables")
             return False
             
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = get_supabase_client(ANON)
         
         # Insert or update configuration
-        result = supabase.table('api_configuration').upsert({
-            'provider': provider,
-            'environment': environment,
-            'config_data': config_data,
-            'is_active': True
-        }).execute()
+        result = await run_query(
+            supabase.table('api_configuration').upsert({
+                'provider': provider,
+                'environment': environment,
+                'config_data': config_data,
+                'is_active': True
+            })
+        )
         
+        api_config_cache.invalidate(provider, environment)
         logger.info(f"Successfully stored configuration for provider {provider}")
         return True
         
@@ -2841,6 +2887,9 @@ async def discover_new_providers():
 
 # Security and Audit Trail Helper Functions
 
+def _fernet_decrypt(encrypted_data: str) -> str:
+    return cipher_suite.decrypt(encrypted_data.encode()).decode()
+
 def encrypt_credential(data: str) -> str:
     """Encrypt sensitive credential data"""
     try:
@@ -2850,9 +2899,9 @@ def encrypt_credential(data: str) -> str:
         raise HTTPException(status_code=500, detail="Encryption failed")
 
 def decrypt_credential(encrypted_data: str) -> str:
-    """Decrypt sensitive credential data"""
+    """Decrypt sensitive credential data (served from credential_cache when possible)"""
     try:
-        return cipher_suite.decrypt(encrypted_data.encode()).decode()
+        return credential_cache.decrypt(token_key(encrypted_data), encrypted_data, _fernet_decrypt)
     except Exception as e:
         logger.error(f"Decryption failed: {e}")
         raise HTTPException(status_code=500, detail="Decryption failed")
@@ -3047,6 +3096,11 @@ async def encrypt_provider_credentials(
         logger.error(f"Credential encryption failed: {e}")
         return {"error": f"Credential encryption failed: {str(e)}"}
 
+@api_router.get("/security/credentials/cache")
+async def get_credential_cache_stats(user_credentials = Depends(verify_access_credentials)):
+    """Decrypted-credential cache usage, including how many decrypts have run"""
+    return credential_cache.get_stats()
+
 @api_router.get("/security/audit/logs")
 async def get_audit_logs(
     limit: int = 50,
@@ -3259,6 +3313,7 @@ async def update_provider_credentials(provider_id: str, credentials: ProviderCre
     """Update provider credentials in Supabase (secure storage)"""
     try:
         logger.info(f"Updating credentials for provider: {provider_id}")
+        credential_cache.invalidate_provider(provider_id)
         
         # In production, this would securely store in Supabase
         update_result = {
@@ -3396,24 +3451,18 @@ async def get_provider_analytics():
 async def setup_expedia_credentials(credentials: dict = None):
     """Setup Expedia API credentials from Supabase or validate existing ones"""
     try:
-        from supabase import create_client, Client
-        
-        # Initialize Supabase client
-        supabase_url = os.environ.get('SUPABASE_URL')
-        supabase_key = os.environ.get('SUPABASE_ANON_KEY')
-        
-        if not supabase_url or not supabase_key:
+        if not is_supabase_configured(ANON):
             raise HTTPException(status_code=500, detail="Supabase not configured")
         
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = get_supabase_client(ANON)
         
         # Try to retrieve existing credentials from Supabase
         logger.info("Retrieving Expedia credentials from Supabase...")
         
         try:
             # Query for Maku.Travel Test Expedia credentials
-            api_key_result = supabase.table('api_configuration').select('*').eq('provider', 'Maku.Travel Test Expedia').eq('is_active', True).execute()
-            secret_key_result = supabase.table('api_configuration').select('*').eq('provider', 'Maku.Travel Test Expedia_SECRET').eq('is_active', True).execute()
+            api_key_result = await run_query(supabase.table('api_configuration').select('*').eq('provider', 'Maku.Travel Test Expedia').eq('is_active', True))
+            secret_key_result = await run_query(supabase.table('api_configuration').select('*').eq('provider', 'Maku.Travel Test Expedia_SECRET').eq('is_active', True))
             
             if api_key_result.data and secret_key_result.data:
                 # Extract credentials from config_data
@@ -3449,12 +3498,14 @@ async def setup_expedia_credentials(credentials: dict = None):
                 }
                 
                 # Store unified configuration
-                unified_config_result = supabase.table('api_configuration').upsert({
-                    'provider': 'expedia',
-                    'environment': 'production',
-                    'config_data': config_data,
-                    'is_active': True
-                }).execute()
+                unified_config_result = await run_query(
+                    supabase.table('api_configuration').upsert({
+                        'provider': 'expedia',
+                        'environment': 'production',
+                        'config_data': config_data,
+                        'is_active': True
+                    })
+                )
                 
                 # Test the credentials
                 test_auth = ExpediaAuthClient(config_data)
@@ -3585,18 +3636,13 @@ async def create_expedia_hotel_booking(booking_request: ExpediaBookingRequest):
 async def debug_supabase_providers():
     """Debug endpoint to check what providers are available in Supabase"""
     try:
-        from supabase import create_client, Client
-        
-        supabase_url = os.environ.get('SUPABASE_URL')
-        supabase_key = os.environ.get('SUPABASE_ANON_KEY')
-        
-        if not supabase_url or not supabase_key:
+        if not is_supabase_configured(ANON):
             return {"error": "Supabase not configured"}
         
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = get_supabase_client(ANON)
         
         # Get all providers in api_configuration table
-        result = supabase.table('api_configuration').select('*').execute()
+        result = await run_query(supabase.table('api_configuration').select('*'))
         
         providers_info = []
         for item in result.data:
@@ -5473,6 +5519,8 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only let scripts read listed response headers
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -5491,6 +5539,51 @@ async def shutdown_db_client():
         stop_health_monitoring()
     except Exception as e:
         logger.warning(f"Could not stop health monitoring: {e}")
+    # Stop FX rate refresh
+    try:
+        from fx_rate_service import fx_rates
+        fx_rates.stop_background_refresh()
+    except Exception as e:
+        logger.warning(f"Could not stop FX rate refresh: {e}")
+    # Stop Supabase config refresh
+    try:
+        get_config_instance().stop_background_refresh()
+    except Exception as e:
+        logger.warning(f"Could not stop Supabase config refresh: {e}")
+    # Stop platform metrics refresh
+    try:
+        from unified_metrics_service import unified_metrics
+        unified_metrics.stop_background_refresh()
+    except Exception as e:
+        logger.warning(f"Could not stop platform metrics refresh: {e}")
+    # Stop nightly deal allocation
+    try:
+        from deal_allocator import stop_allocation_schedule
+        stop_allocation_schedule()
+    except Exception as e:
+        logger.warning(f"Could not stop deal allocation schedule: {e}")
+    # Stop dream match index sync
+    try:
+        from dream_match_index import dream_match_index
+        dream_match_index.stop_background_sync()
+    except Exception as e:
+        logger.warning(f"Could not stop dream match index sync: {e}")
+    # Write out any deal accepts still queued
+    try:
+        from deal_accept_batcher import deal_accept_batcher
+        await deal_accept_batcher.drain()
+    except Exception as e:
+        logger.warning(f"Could not drain deal accepts: {e}")
+    # Release Supabase worker threads
+    supabase_executor.shutdown()
+
+@app.on_event("startup")
+async def startup_mongo_indexes():
+    """Create the indexes each MongoDB collection declares in mongo_store"""
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not ensure MongoDB indexes: {e}")
 
 @app.on_event("startup")
 async def startup_provider_monitoring():
@@ -5501,3 +5594,56 @@ async def startup_provider_monitoring():
         logger.info("✅ Provider health monitoring started")
     except Exception as e:
         logger.warning(f"⚠️  Could not start health monitoring: {e}")
+
+@app.on_event("startup")
+async def startup_fx_rates():
+    """Start background FX rate refresh so conversions never fetch in-request"""
+    try:
+        from fx_rate_service import fx_rates
+        fx_rates.start_background_refresh()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not start FX rate refresh: {e}")
+
+@app.on_event("startup")
+async def startup_supabase_config():
+    """Load the Supabase config snapshot and keep it fresh in the background"""
+    try:
+        get_config_instance().start_background_refresh()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not start Supabase config refresh: {e}")
+
+@app.on_event("startup")
+async def startup_api_config_cache():
+    """Pre-warm provider configurations so setup paths never query Supabase"""
+    try:
+        warmed = await api_config_cache.warm()
+        logger.info(f"✅ Pre-warmed {warmed} provider configurations")
+    except Exception as e:
+        logger.warning(f"⚠️  Could not pre-warm provider configurations: {e}")
+
+@app.on_event("startup")
+async def startup_platform_metrics():
+    """Keep the platform metrics snapshot fresh in the background"""
+    try:
+        from unified_metrics_service import unified_metrics
+        unified_metrics.start_background_refresh()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not start platform metrics refresh: {e}")
+
+@app.on_event("startup")
+async def startup_deal_allocation():
+    """Schedule the nightly global deal allocation"""
+    try:
+        from deal_allocator import start_allocation_schedule
+        start_allocation_schedule()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not schedule deal allocation: {e}")
+
+@app.on_event("startup")
+async def startup_dream_match_index():
+    """Build the in-memory dream/campaign match index and keep it in sync"""
+    try:
+        from dream_match_index import dream_match_index
+        dream_match_index.start_background_sync()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not start dream match index: {e}")
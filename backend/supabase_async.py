@@ -0,0 +1,120 @@
+"""
+Supabase Async Access
+Runs blocking Supabase queries off the event loop
+
+The supabase-py client is synchronous: every .execute() does HTTP I/O on
+the calling thread. Called directly inside an async handler it stalls the
+event loop for every other request. All async code goes through
+run_query() instead, which executes the query on a bounded worker pool
+and awaits the result.
+
+Usage:
+    result = await run_query(supabase.table('partners').select('id').limit(1))
+    counts = await run_counts({'partners': count_query(supabase, 'partners')})
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_EXECUTOR_WORKERS = int(os.getenv('SUPABASE_EXECUTOR_WORKERS', '16'))
+
+
+class SupabaseExecutor:
+    """Bounded thread pool for blocking Supabase calls"""
+
+    def __init__(self, max_workers: int = SUPABASE_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {'completed': 0, 'failed': 0, 'in_flight': 0, 'max_in_flight': 0, 'total_ms': 0.0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='supabase'
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run any blocking callable on the pool"""
+        loop = asyncio.get_running_loop()
+        stats = self._stats
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self.executor, fn, *args)
+            stats['completed'] += 1
+            return result
+        except Exception:
+            stats['failed'] += 1
+            raise
+        finally:
+            stats['in_flight'] -= 1
+            stats['total_ms'] += (time.perf_counter() - start) * 1000
+
+    async def execute(self, query: Any) -> Any:
+        """Execute a built Supabase query (table/rpc builder) on the pool"""
+        return await self.run(query.execute)
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self._stats['completed'] + self._stats['failed']
+        return {
+            'max_workers': self.max_workers,
+            **self._stats,
+            'total_ms': round(self._stats['total_ms'], 1),
+            'avg_ms': round(self._stats['total_ms'] / calls, 2) if calls else 0.0
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Global instance
+supabase_executor = SupabaseExecutor()
+
+
+async def run_query(query: Any) -> Any:
+    """Await a Supabase query without blocking the event loop"""
+    return await supabase_executor.execute(query)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    """Await any other blocking Supabase call (e.g. storage, auth)"""
+    return await supabase_executor.run(fn, *args)
+
+
+def count_query(supabase: Any, table: str) -> Any:
+    """Head-only exact count of a table; chain filters onto the result"""
+    return supabase.table(table).select('*', count='exact', head=True)
+
+
+async def run_counts(queries: Dict[str, Any], optional: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Run several count queries concurrently and return {name: count}
+
+    Failures of queries named in `optional` (e.g. tables that may not
+    exist yet) count as 0; any other failure is raised.
+    """
+    names = list(queries)
+    results = await asyncio.gather(*(run_query(queries[name]) for name in names), return_exceptions=True)
+    optional = set(optional)
+    counts = {}
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            if name not in optional:
+                raise result
+            logger.debug(f"Optional count {name} failed: {result}")
+            counts[name] = 0
+        else:
+            counts[name] = result.count or 0
+    return counts
@@ -5,6 +5,10 @@ This module provides centralized configuration management for the Maku.Travel pl
 It reads from both environment tables and environment_configs tables in Supabase,
 providing a unified interface for both Emergent and Lovable backends.
 
+Values are served from an in-memory snapshot. A single background refresh
+fetches only rows whose updated_at moved past the last watermark and swaps
+in new dicts, so readers never wait on Supabase after the first load.
+
 Usage:
     config = SupabaseConfig()
     
@@ -20,13 +24,66 @@ Usage:
 
 import os
 import json
+import time
 import asyncio
-from typing import Dict, Any, Optional, List
-from supabase import create_client, Client
+from typing import Dict, Any, Optional, List, Tuple
+from supabase import Client
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
 import logging
 
 logger = logging.getLogger(__name__)
 
+# How often the snapshot is refreshed, and how often a refresh re-reads
+# everything (incremental fetches cannot see hard-deleted rows)
+CONFIG_REFRESH_SECONDS = float(os.getenv('SUPABASE_CONFIG_REFRESH_SECONDS', '300'))
+CONFIG_FULL_RELOAD_SECONDS = float(os.getenv('SUPABASE_CONFIG_FULL_RELOAD_SECONDS', '3600'))
+
+# provider -> field -> ('secret' | 'config', key, default) or a literal value.
+# Defaults that depend on the environment are (development, other).
+PROVIDER_CONFIG_SPEC: Dict[str, Dict[str, Any]] = {
+    'amadeus': {
+        'client_id': ('secret', 'AMADEUS_CLIENT_ID', None),
+        'client_secret': ('secret', 'AMADEUS_CLIENT_SECRET', None),
+        'base_url': ('config', 'amadeus_base_url', ('https://test.api.amadeus.com', 'https://api.amadeus.com'))
+    },
+    'sabre': {
+        'client_id': ('secret', 'SABRE_CLIENT_ID', None),
+        'client_secret': ('secret', 'SABRE_CLIENT_SECRET', None),
+        'base_url': ('config', 'sabre_base_url',
+                     ('https://api-crt.cert.havail.sabre.com', 'https://api.havail.sabre.com'))
+    },
+    'viator': {
+        'api_key': ('secret', 'VIATOR_API_KEY', None),
+        'base_url': ('https://api.sandbox-viatorapi.com', 'https://api.viatorapi.com')
+    },
+    'duffle': {
+        'api_key': ('secret', 'DUFFLE_API_KEY', None),
+        'base_url': 'https://api.duffel.com'
+    },
+    'ratehawk': {
+        'api_key': ('secret', 'RATEHAWK_API_KEY', None),
+        'base_url': 'https://api.ratehawk.com'
+    },
+    'expedia': {
+        'api_key': ('secret', 'EXPEDIA_API_KEY', None),
+        'base_url': 'https://api.ean.com'
+    },
+    'stripe': {
+        'publishable_key': ('secret', 'STRIPE_PUBLISHABLE_KEY', None),
+        'secret_key': ('secret', 'STRIPE_SECRET_KEY', None),
+        'mode': ('config', 'stripe_mode', 'test')
+    }
+}
+
+
+def _parse_config_value(value: Any) -> Any:
+    # Handle JSON values
+    if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+        return json.loads(value)
+    return value
+
+
 class SupabaseConfig:
     """Centralized configuration manager using Supabase"""
     
@@ -44,76 +101,156 @@ class SupabaseConfig:
         if not key:
             raise ValueError("Either SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY is required")
         
-        self.client: Client = create_client(self.supabase_url, key)
+        self.client: Client = get_supabase_client(allow_anon=True)
         
-        # Cache for configurations
+        # Snapshot of configurations; each refresh swaps in new dicts, so
+        # readers always see a complete snapshot and never wait on a refresh
         self._config_cache: Dict[str, Any] = {}
         self._secret_cache: Dict[str, str] = {}
-        self._cache_ttl = 300  # 5 minutes cache TTL
+        self._provider_configs: Dict[str, Dict[str, Any]] = {}
+        self._cache_ttl = CONFIG_REFRESH_SECONDS
         self._cache_timestamp = 0
+        self._full_reload_timestamp = 0
+        self._loaded = False
+        
+        # Highest updated_at seen per table (incremental refresh watermark)
+        self._watermarks: Dict[str, Optional[str]] = {'environment_configs': None, 'environment': None}
+        self._refresh_task: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {'refreshes': 0, 'full_reloads': 0, 'rows_fetched': 0, 'failures': 0}
         
         logger.info(f"SupabaseConfig initialized for environment: {self.environment}")
     
     async def _is_cache_valid(self) -> bool:
         """Check if cache is still valid"""
-        import time
         return (time.time() - self._cache_timestamp) < self._cache_ttl
     
-    async def _update_cache(self):
+    async def _ensure_loaded(self):
+        """Block only for the very first load; afterwards refresh in the background"""
+        if not self._loaded:
+            await self.refresh()
+        elif not await self._is_cache_valid():
+            self._start_refresh()
+    
+    def _start_refresh(self, full: bool = False) -> asyncio.Future:
+        # Single flight: every caller joins the refresh already running
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._update_cache(full))
+        return self._refresh_task
+    
+    async def refresh(self, full: bool = False):
+        """Refresh the snapshot now (joins a refresh already in progress)"""
+        await asyncio.shield(self._start_refresh(full))
+    
+    async def _update_cache(self, full: bool = False):
         """Update configuration cache"""
-        import time
+        full = full or (time.time() - self._full_reload_timestamp) >= CONFIG_FULL_RELOAD_SECONDS
         try:
             # Refresh both config and secret caches
-            await self._load_configs()
-            await self._load_secrets()
+            config_changed, secret_changed = await asyncio.gather(
+                self._load_configs(full), self._load_secrets(full)
+            )
+            if config_changed or secret_changed or not self._loaded:
+                self._provider_configs = self._build_provider_configs()
             self._cache_timestamp = time.time()
-            logger.info("Configuration cache updated")
+            if full:
+                self._full_reload_timestamp = self._cache_timestamp
+                self._stats['full_reloads'] += 1
+            self._stats['refreshes'] += 1
+            self._loaded = True
+            if config_changed or secret_changed:
+                logger.info("Configuration cache updated")
         except Exception as e:
+            self._stats['failures'] += 1
             logger.error(f"Failed to update cache: {e}")
     
-    async def _load_configs(self):
+    async def _fetch_changed(self, table: str, full: bool) -> Tuple[List[Dict[str, Any]], bool]:
+        """Rows of `table` for this environment changed since the watermark, and whether it was a full read"""
+        query = self.client.table(table).select('*').eq('environment', self.environment)
+        watermark = self._watermarks[table]
+        full = full or watermark is None
+        if full:
+            query = query.eq('is_active', True)
+        else:
+            # Inactive rows are fetched too so deactivations are applied;
+            # gte re-reads rows sharing the watermark timestamp (harmless)
+            query = query.gte('updated_at', watermark)
+        response = await run_query(query)
+        rows = response.data or []
+        self._stats['rows_fetched'] += len(rows)
+        stamps = [r['updated_at'] for r in rows if r.get('updated_at')]
+        if not full and watermark:
+            stamps.append(watermark)
+        self._watermarks[table] = max(stamps) if stamps else None
+        return rows, full
+    
+    @staticmethod
+    def _apply_rows(current: Dict[str, Any], rows: List[Dict[str, Any]], key_field: str,
+                    value_field: str, full: bool, parse=lambda v: v) -> Optional[Dict[str, Any]]:
+        """New snapshot dict with rows applied, or None if nothing changed"""
+        updated = {} if full else dict(current)
+        for row in rows:
+            if row.get('is_active', True):
+                updated[row[key_field]] = parse(row[value_field])
+            else:
+                updated.pop(row[key_field], None)
+        return None if updated == current else updated
+    
+    async def _load_configs(self, full: bool = True) -> bool:
         """Load configurations from environment_configs table"""
         try:
-            response = self.client.table('environment_configs').select('*').eq(
-                'environment', self.environment
-            ).eq('is_active', True).execute()
-            
-            self._config_cache = {}
-            for config in response.data:
-                key = config['config_key']
-                value = config['config_value']
-                # Handle JSON values
-                if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
-                    value = json.loads(value)
-                self._config_cache[key] = value
-                
+            rows, full = await self._fetch_changed('environment_configs', full)
+            updated = self._apply_rows(self._config_cache, rows, 'config_key', 'config_value', full,
+                                       parse=_parse_config_value)
+            if updated is None:
+                return False
+            self._config_cache = updated
             logger.info(f"Loaded {len(self._config_cache)} configurations")
+            return True
         except Exception as e:
             logger.error(f"Failed to load configurations: {e}")
+            return False
     
-    async def _load_secrets(self):
+    async def _load_secrets(self, full: bool = True) -> bool:
         """Load secrets from environment table"""
         try:
-            response = self.client.table('environment').select('*').eq(
-                'environment', self.environment
-            ).eq('is_active', True).execute()
-            
-            self._secret_cache = {}
-            for secret in response.data:
-                key = secret['key']
-                value = secret['value']
-                self._secret_cache[key] = value
-                
+            rows, full = await self._fetch_changed('environment', full)
+            updated = self._apply_rows(self._secret_cache, rows, 'key', 'value', full)
+            if updated is None:
+                return False
+            self._secret_cache = updated
             logger.info(f"Loaded {len(self._secret_cache)} secrets")
+            return True
         except Exception as e:
             logger.error(f"Failed to load secrets: {e}")
             # If secrets table doesn't exist yet, that's okay
-            pass
+            return False
+    
+    def _build_provider_configs(self) -> Dict[str, Dict[str, Any]]:
+        """Resolve PROVIDER_CONFIG_SPEC against the current snapshot"""
+        development = self.environment == 'development'
+        
+        def resolve(value):
+            if isinstance(value, tuple) and len(value) == 2:
+                return value[0] if development else value[1]
+            return value
+        
+        configs = {}
+        for provider, fields in PROVIDER_CONFIG_SPEC.items():
+            resolved = {}
+            for field, spec in fields.items():
+                if isinstance(spec, tuple) and len(spec) == 3:
+                    source, key, default = spec
+                    cache = self._secret_cache if source == 'secret' else self._config_cache
+                    resolved[field] = cache.get(key, resolve(default))
+                else:
+                    resolved[field] = resolve(spec)
+            configs[provider] = resolved
+        return configs
     
     async def get_secret(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """Get a secret value by key"""
-        if not await self._is_cache_valid():
-            await self._update_cache()
+        await self._ensure_loaded()
         
         value = self._secret_cache.get(key, default)
         if value and value.startswith(('your-', 'sk-test-', 'pk-test-')):
@@ -122,53 +259,42 @@ class SupabaseConfig:
     
     async def get_config(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
         """Get a configuration value by key"""
-        if not await self._is_cache_valid():
-            await self._update_cache()
+        await self._ensure_loaded()
         
         return self._config_cache.get(key, default)
     
     async def get_provider_config(self, provider: str) -> Dict[str, Any]:
         """Get configuration for a specific provider"""
-        provider_configs = {
-            'amadeus': {
-                'client_id': await self.get_secret('AMADEUS_CLIENT_ID'),
-                'client_secret': await self.get_secret('AMADEUS_CLIENT_SECRET'),
-                'base_url': await self.get_config('amadeus_base_url', 
-                    'https://test.api.amadeus.com' if self.environment == 'development' 
-                    else 'https://api.amadeus.com')
-            },
-            'sabre': {
-                'client_id': await self.get_secret('SABRE_CLIENT_ID'),
-                'client_secret': await self.get_secret('SABRE_CLIENT_SECRET'),
-                'base_url': await self.get_config('sabre_base_url',
-                    'https://api-crt.cert.havail.sabre.com' if self.environment == 'development'
-                    else 'https://api.havail.sabre.com')
-            },
-            'viator': {
-                'api_key': await self.get_secret('VIATOR_API_KEY'),
-                'base_url': 'https://api.sandbox-viatorapi.com' if self.environment == 'development'
-                           else 'https://api.viatorapi.com'
-            },
-            'duffle': {
-                'api_key': await self.get_secret('DUFFLE_API_KEY'),
-                'base_url': 'https://api.duffel.com'
-            },
-            'ratehawk': {
-                'api_key': await self.get_secret('RATEHAWK_API_KEY'),
-                'base_url': 'https://api.ratehawk.com'
-            },
-            'expedia': {
-                'api_key': await self.get_secret('EXPEDIA_API_KEY'),
-                'base_url': 'https://api.ean.com'
-            },
-            'stripe': {
-                'publishable_key': await self.get_secret('STRIPE_PUBLISHABLE_KEY'),
-                'secret_key': await self.get_secret('STRIPE_SECRET_KEY'),
-                'mode': await self.get_config('stripe_mode', 'test')
-            }
-        }
+        await self._ensure_loaded()
         
-        return provider_configs.get(provider, {})
+        return dict(self._provider_configs.get(provider, {}))
+    
+    async def _refresh_loop(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.refresh()
+    
+    def start_background_refresh(self, interval_seconds: float = CONFIG_REFRESH_SECONDS):
+        """Load now and keep the snapshot fresh on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        self._start_refresh(full=True)
+        self._task = asyncio.get_event_loop().create_task(self._refresh_loop(interval_seconds))
+        logger.info(f"🚀 Supabase config refresh started (every {interval_seconds:.0f}s)")
+    
+    def stop_background_refresh(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'configs': len(self._config_cache),
+            'secrets': len(self._secret_cache),
+            'age_seconds': round(time.time() - self._cache_timestamp, 1) if self._loaded else None,
+            'watermarks': dict(self._watermarks),
+            **self._stats
+        }
     
     async def get_all_provider_configs(self) -> Dict[str, Dict[str, Any]]:
         """Get configuration for all providers"""
@@ -0,0 +1,161 @@
+"""
+Supabase Client Pool
+Process-wide, reusable Supabase clients
+
+Building a supabase-py client sets up fresh HTTP sessions, so creating one
+per request throws away connection reuse. Clients are instead created once
+per key role and shared: a small fixed set per role, handed out round-robin
+so concurrent queries on the worker pool spread across HTTP sessions.
+
+Roles:
+- service: SUPABASE_SERVICE_ROLE_KEY (server-side, bypasses RLS)
+- anon: SUPABASE_ANON_KEY (public key, RLS applies)
+
+Usage:
+    supabase = get_supabase_client()                 # service role
+    supabase = get_supabase_client(allow_anon=True)  # service, else anon
+    supabase = get_supabase_client(ANON)
+"""
+
+import os
+import time
+import logging
+import threading
+from itertools import count
+from typing import Any, Dict, List, Optional
+
+from supabase import create_client, Client
+from supabase_async import run_query
+
+logger = logging.getLogger(__name__)
+
+SERVICE = 'service'
+ANON = 'anon'
+
+ROLE_KEY_ENV = {
+    SERVICE: 'SUPABASE_SERVICE_ROLE_KEY',
+    ANON: 'SUPABASE_ANON_KEY',
+}
+
+SUPABASE_POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '4'))
+SUPABASE_HEALTH_TABLE = os.getenv('SUPABASE_HEALTH_TABLE', 'provider_registry')
+
+
+class SupabaseNotConfigured(RuntimeError):
+    """Raised when the URL or key for a role is missing"""
+
+
+class SupabaseClientPool:
+    """Fixed set of shared clients for one key role"""
+
+    def __init__(self, role: str, url: str, key: str, size: int = SUPABASE_POOL_SIZE):
+        self.role = role
+        self.url = url
+        self.key = key
+        self.size = max(1, size)
+        self._clients: List[Client] = []
+        self._usage: List[int] = []
+        self._next = count()
+        self._lock = threading.Lock()
+        self.last_health: Optional[Dict[str, Any]] = None
+
+    def acquire(self) -> Client:
+        """Next client in round-robin order, created on first use"""
+        slot = next(self._next) % self.size
+        if slot >= len(self._clients):
+            with self._lock:
+                while len(self._clients) <= slot:
+                    self._clients.append(create_client(self.url, self.key))
+                    self._usage.append(0)
+                    logger.info(f"Created Supabase {self.role} client {len(self._clients)}/{self.size}")
+        self._usage[slot] += 1
+        return self._clients[slot]
+
+    async def health_check(self, table: str = SUPABASE_HEALTH_TABLE) -> Dict[str, Any]:
+        """Cheapest possible round trip through one pooled client"""
+        start = time.perf_counter()
+        try:
+            await run_query(self.acquire().table(table).select('id').limit(1))
+            status, error = 'up', None
+        except Exception as e:
+            status, error = 'down', str(e)
+            logger.warning(f"Supabase {self.role} pool health check failed: {e}")
+
+        self.last_health = {
+            'status': status,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            'checked_at': time.time(),
+            'error': error
+        }
+        return self.last_health
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'size': self.size,
+            'clients_created': len(self._clients),
+            'acquisitions': sum(self._usage),
+            'per_client': list(self._usage),
+            'last_health': self.last_health
+        }
+
+
+_pools: Dict[str, SupabaseClientPool] = {}
+_pools_lock = threading.Lock()
+
+
+def is_configured(role: str = SERVICE) -> bool:
+    return bool(os.getenv('SUPABASE_URL') and os.getenv(ROLE_KEY_ENV[role]))
+
+
+def get_pool(role: str = SERVICE) -> SupabaseClientPool:
+    """Shared pool for a role (raises SupabaseNotConfigured when unset)"""
+    pool = _pools.get(role)
+    if pool is not None:
+        return pool
+
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv(ROLE_KEY_ENV[role])
+    if not url or not key:
+        raise SupabaseNotConfigured(
+            f"Supabase configuration missing. Check SUPABASE_URL and {ROLE_KEY_ENV[role]}"
+        )
+
+    with _pools_lock:
+        if role not in _pools:
+            _pools[role] = SupabaseClientPool(role, url, key)
+        return _pools[role]
+
+
+def get_supabase_client(role: str = SERVICE, allow_anon: bool = False) -> Client:
+    """
+    Shared Supabase client
+
+    Args:
+        role: SERVICE or ANON
+        allow_anon: Fall back to the anon key when the service key is unset
+    """
+    if role == SERVICE and allow_anon and not is_configured(SERVICE):
+        role = ANON
+    return get_pool(role).acquire()
+
+
+async def check_health() -> Dict[str, Any]:
+    """Health check every configured pool"""
+    results = {}
+    for role in (SERVICE, ANON):
+        if is_configured(role):
+            results[role] = await get_pool(role).health_check()
+    return results
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return {
+        role: _pools[role].get_stats() if role in _pools else None
+        for role in (SERVICE, ANON)
+    }
+
+
+def reset_pools():
+    """Drop all shared clients (used after credential changes and in tests)"""
+    with _pools_lock:
+        _pools.clear()
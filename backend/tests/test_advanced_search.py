@@ -0,0 +1,163 @@
+"""
+Advanced Search Testing
+Tests compact result records, search sessions and the hotel/flight/activity search endpoints
+"""
+
+import pytest
+from advanced_search import (
+    HotelRecord, HotelResult, FlightResult, ActivityResult,
+    AdvancedHotelSearchRequest, AdvancedFlightSearchRequest, AdvancedActivitySearchRequest,
+    HotelSortBy, SortOrder, PriceRange,
+    generate_mock_hotels, advanced_hotel_search, advanced_flight_search, advanced_activity_search
+)
+
+
+def create_hotel_request(**overrides) -> AdvancedHotelSearchRequest:
+    """Create hotel search request for testing"""
+    params = {
+        "destination": "Sydney",
+        "checkin": "2025-06-01",
+        "checkout": "2025-06-05"
+    }
+    params.update(overrides)
+    return AdvancedHotelSearchRequest(**params)
+
+
+class TestCompactRecords:
+    """Test slot-based result records"""
+
+    def test_records_have_no_instance_dict(self):
+        """Records stay compact"""
+        record = generate_mock_hotels("Sydney", 1)[0]
+        assert isinstance(record, HotelRecord)
+        assert not hasattr(record, "__dict__")
+
+    def test_record_fields_match_response_model(self):
+        """Every response model field is carried by the record"""
+        assert set(HotelRecord.__slots__) == set(HotelResult.model_fields)
+
+    def test_to_model_validates(self):
+        """Conversion produces the response model with identical values"""
+        record = generate_mock_hotels("Sydney", 3)[2]
+        model = record.to_model()
+        assert isinstance(model, HotelResult)
+        assert model.hotel_id == "hotel_3"
+        assert model.price_per_night == record.price_per_night
+
+
+class TestSearchEndpoints:
+    """Test search endpoints return validated page models"""
+
+    @pytest.mark.asyncio
+    async def test_hotel_search_page(self):
+        """Hotel page is filtered, sorted and converted"""
+        request = create_hotel_request(
+            price_range=PriceRange(max=300),
+            sort_by=HotelSortBy.PRICE,
+            sort_order=SortOrder.DESC,
+            per_page=5
+        )
+        response = await advanced_hotel_search(request)
+
+        results = response["results"]
+        assert len(results) == 5
+        assert all(isinstance(r, HotelResult) for r in results)
+        prices = [r.price_per_night for r in results]
+        assert prices == sorted(prices, reverse=True)
+        assert max(prices) <= 300
+        assert response["metadata"].total_results == 10
+
+    @pytest.mark.asyncio
+    async def test_flight_search_page(self):
+        """Flight page only contains flights within max stops"""
+        request = AdvancedFlightSearchRequest(origin="SYD", destination="MEL", max_stops=0)
+        response = await advanced_flight_search(request)
+
+        assert all(isinstance(r, FlightResult) for r in response["results"])
+        assert all(r.stops == 0 for r in response["results"])
+        assert response["metadata"].total_results == 5
+
+    @pytest.mark.asyncio
+    async def test_activity_search_page(self):
+        """Activity page honours accessibility filter"""
+        request = AdvancedActivitySearchRequest(destination="Sydney", start_date="2025-06-01", accessibility=True)
+        response = await advanced_activity_search(request)
+
+        assert all(isinstance(r, ActivityResult) for r in response["results"])
+        assert all(r.accessibility for r in response["results"])
+        assert response["metadata"].total_results == 5
+
+    @pytest.mark.asyncio
+    async def test_hotel_facets_reused_across_pages(self):
+        """Paging through a session reuses facet counts from the first page"""
+        first = await advanced_hotel_search(create_hotel_request(per_page=5))
+        search_id = first["session"]["search_id"]
+        second = await advanced_hotel_search(create_hotel_request(per_page=5, page=2, search_id=search_id))
+
+        facets = first["facets"]
+        assert set(facets) == {"amenities", "star_rating", "property_type", "price"}
+        assert facets["amenities"]["wifi"] == 20
+        assert sum(facets["price"].values()) == 20
+        assert second["facets"] is facets
+
+
+class TestSearchSessions:
+    """Test paging, re-sorting and re-filtering against session snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_pages_served_from_snapshot(self, monkeypatch):
+        """Later pages never fetch candidates again"""
+        import advanced_search
+        calls = []
+        original = advanced_search.generate_mock_hotels
+
+        def counting_generator(destination, count=20):
+            calls.append(destination)
+            return original(destination, count)
+
+        monkeypatch.setattr(advanced_search, "generate_mock_hotels", counting_generator)
+
+        first = await advanced_hotel_search(create_hotel_request(per_page=5))
+        search_id = first["session"]["search_id"]
+        assert first["metadata"].from_cache is False
+
+        second = await advanced_hotel_search(create_hotel_request(
+            per_page=5, page=2, search_id=search_id, sort_order=SortOrder.DESC
+        ))
+        third = await advanced_hotel_search(create_hotel_request(
+            per_page=5, search_id=search_id, price_range=PriceRange(max=200)
+        ))
+
+        assert len(calls) == 1
+        assert second["metadata"].from_cache is True
+        assert [r.hotel_id for r in second["results"]] == ["hotel_15", "hotel_14", "hotel_13", "hotel_12", "hotel_11"]
+        assert third["metadata"].total_results == 5
+        assert third["session"]["search_id"] == search_id
+
+    @pytest.mark.asyncio
+    async def test_refresh_and_changed_query_open_new_session(self):
+        first = await advanced_hotel_search(create_hotel_request())
+        search_id = first["session"]["search_id"]
+
+        refreshed = await advanced_hotel_search(create_hotel_request(search_id=search_id, refresh=True))
+        other_city = await advanced_hotel_search(create_hotel_request(
+            destination="Melbourne", search_id=refreshed["session"]["search_id"]
+        ))
+
+        assert refreshed["session"]["search_id"] != search_id
+        assert refreshed["metadata"].from_cache is False
+        assert other_city["metadata"].from_cache is False
+        assert other_city["results"][0].name.endswith("Melbourne")
+
+    @pytest.mark.asyncio
+    async def test_results_converted_to_requested_currency(self):
+        from fx_rate_service import fx_rates
+        response = await advanced_hotel_search(create_hotel_request(
+            currency="aud", price_range=PriceRange(max=200, currency="USD")
+        ))
+
+        rate = fx_rates.get_rate("USD", "AUD")
+        results = response["results"]
+        assert all(r.currency == "AUD" for r in results)
+        assert results[0].price_per_night == round(120.0 * rate, 2)
+        assert response["metadata"].total_results == 5
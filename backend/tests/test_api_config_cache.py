@@ -0,0 +1,124 @@
+"""
+API Configuration Cache Testing
+Tests TTL lookups, shared misses, pre-warming and invalidation
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import api_config_cache as cache_module
+from api_config_cache import ApiConfigCache
+
+ROWS = [
+    {"provider": "expedia", "environment": "production", "config_data": {"api_key": "prod"}, "is_active": True},
+    {"provider": "expedia", "environment": "test", "config_data": {"api_key": "test"}, "is_active": True},
+]
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = {}
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        self.db.queries += 1
+        rows = [r for r in self.db.rows if all(r.get(c) == v for c, v in self.filters.items())]
+        return SimpleNamespace(data=rows)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rows = [dict(r) for r in ROWS]
+        self.queries = 0
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(cache_module, "get_supabase_client", lambda role: db)
+    monkeypatch.setattr(cache_module, "is_configured", lambda role: True)
+    return db
+
+
+class TestApiConfigCache:
+    """Test the (provider, environment) cache"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_query(self, fake):
+        cache = ApiConfigCache()
+
+        results = await asyncio.gather(*[cache.get("expedia", "production") for _ in range(10)])
+
+        assert fake.queries == 1
+        assert all(r == {"api_key": "prod"} for r in results)
+        assert await cache.get("expedia", "production") == {"api_key": "prod"}
+        assert fake.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_then_ttl_expiry(self, fake):
+        now = [0.0]
+        cache = ApiConfigCache(ttl_seconds=60, clock=lambda: now[0])
+
+        assert await cache.warm() == 2
+        assert await cache.get("expedia", "test") == {"api_key": "test"}
+        assert fake.queries == 1
+
+        now[0] = 61
+        await cache.get("expedia", "test")
+        assert fake.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_warmed_entries_expire_spread_over_the_jitter(self, fake):
+        now = [0.0]
+        cache = ApiConfigCache(ttl_seconds=100, clock=lambda: now[0], warm_jitter=0.5)
+        fake.rows = [{"provider": f"p{i}", "environment": "production", "config_data": {"i": i}, "is_active": True}
+                     for i in range(50)]
+
+        await cache.warm()
+
+        loaded_at = [entry[0] for entry in cache._entries.values()]
+        assert all(-50 <= t <= 0 for t in loaded_at)
+        assert len(set(loaded_at)) > 1
+
+    @pytest.mark.asyncio
+    async def test_warm_keeps_the_first_duplicate_like_a_lookup(self, fake):
+        fake.rows.append({"provider": "expedia", "environment": "test", "config_data": {"api_key": "dup"},
+                          "is_active": True})
+        warmed = ApiConfigCache()
+        loaded = ApiConfigCache()
+
+        assert await warmed.warm() == 2
+        assert await warmed.get("expedia", "test") == await loaded.get("expedia", "test") == {"api_key": "test"}
+
+    @pytest.mark.asyncio
+    async def test_missing_row_is_cached_and_invalidate_reloads(self, fake):
+        cache = ApiConfigCache()
+        assert await cache.get("viator", "production") is None
+        assert await cache.get("viator", "production") is None
+        assert fake.queries == 1
+
+        fake.rows.append({"provider": "viator", "environment": "production",
+                          "config_data": {"api_key": "v"}, "is_active": True})
+        cache.invalidate("viator", "production")
+
+        assert await cache.get("viator", "production") == {"api_key": "v"}
+
+    @pytest.mark.asyncio
+    async def test_callers_cannot_mutate_cached_config(self, fake):
+        cache = ApiConfigCache()
+        config = await cache.get("expedia", "production")
+        config["api_key"] = "changed"
+
+        assert await cache.get("expedia", "production") == {"api_key": "prod"}
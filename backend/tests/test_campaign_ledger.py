@@ -0,0 +1,61 @@
+"""
+Campaign Ledger Testing
+Tests shaping of materialized offseason_campaign_ledger rows for the API and partner emails
+"""
+
+from datetime import date
+
+from email_system import build_campaign_ledger_email_data, render_template
+from offseason_endpoints import build_campaign_ledger
+
+LEDGER_ROWS = [
+    {"day": "2025-06-02", "capacity": 4, "allocated": 1, "revenue": 250.0},
+    {"day": "2025-06-01", "capacity": 4, "allocated": 3, "revenue": 750.0},
+    {"day": "2025-06-03", "capacity": 0, "allocated": 0, "revenue": 0},
+    {"day": "2025-06-04", "capacity": 4, "allocated": 4, "revenue": 1000.5},
+]
+
+
+class TestBuildCampaignLedger:
+    """Test API ledger response"""
+
+    def test_daily_rows_and_totals(self):
+        ledger = build_campaign_ledger("campaign_1", "Winter Escape", LEDGER_ROWS)
+
+        assert [d.date for d in ledger.daily_allocation] == ["2025-06-01", "2025-06-02", "2025-06-03", "2025-06-04"]
+        assert [d.available for d in ledger.daily_allocation] == [1, 3, 0, 0]
+        assert [d.utilization for d in ledger.daily_allocation] == [0.75, 0.25, 0, 1.0]
+        assert ledger.total_allocated == 8
+        assert ledger.total_available == 4
+
+    def test_empty_ledger(self):
+        ledger = build_campaign_ledger("campaign_1", "Winter Escape", [])
+
+        assert ledger.daily_allocation == []
+        assert ledger.total_allocated == 0
+
+
+class TestCampaignLedgerEmail:
+    """Test daily partner digest data"""
+
+    def test_digest_fields_render(self):
+        data = build_campaign_ledger_email_data(
+            {"partner_name": "Seaside Hotel", "contact_info": {"email": "ops@seaside.test"}},
+            {"id": "campaign_1", "title": "Winter Escape"},
+            LEDGER_ROWS,
+            date(2025, 6, 2)
+        )
+
+        assert data["rooms_booked_today"] == 1
+        assert (data["total_filled"], data["total_available"], data["rooms_remaining"]) == (8, 12, 4)
+        assert data["revenue"] == "2,000.50"
+        assert [data[f"top_date_{i}"] for i in (1, 2, 3)] == ["2025-06-04", "2025-06-01", "2025-06-02"]
+        assert "Winter Escape" in render_template("campaign_ledger", data)
+
+    def test_pads_missing_top_dates(self):
+        data = build_campaign_ledger_email_data(
+            {"partner_name": "Seaside Hotel"}, {"id": "campaign_1", "title": "Winter Escape"}, [], date(2025, 6, 2)
+        )
+
+        assert (data["top_date_1"], data["top_bookings_3"]) == ("-", 0)
+        render_template("campaign_ledger", data)
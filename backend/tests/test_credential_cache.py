@@ -0,0 +1,129 @@
+"""
+Credential Cache Testing
+Tests cached decrypts, zeroing on eviction and provider bootstrap
+"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet
+
+from credential_cache import CredentialCache, token_key
+from providers.universal_provider_manager import UniversalProviderManager
+
+manager_module = sys.modules[UniversalProviderManager.__module__]
+
+
+class TestCredentialCache:
+    """Test the decrypted-credential cache"""
+
+    def test_decrypt_runs_once_per_ttl(self):
+        fernet = Fernet(Fernet.generate_key())
+        token = fernet.encrypt(b"s3cret").decode()
+        now = [0.0]
+        cache = CredentialCache(ttl_seconds=60, clock=lambda: now[0])
+        decrypt = lambda t: fernet.decrypt(t.encode()).decode()
+
+        values = [cache.decrypt(token_key(token), token, decrypt) for _ in range(100)]
+        now[0] = 61
+        cache.decrypt(token_key(token), token, decrypt)
+
+        assert set(values) == {"s3cret"}
+        assert cache.get_stats()["decrypts"] == 2
+        assert cache.get_stats()["hits"] == 99
+
+    def test_evicted_values_are_zeroed(self):
+        now = [0.0]
+        cache = CredentialCache(ttl_seconds=10, clock=lambda: now[0])
+        cache.put(("p1", "api_key"), "abc123")
+        cache.put(("p2", "api_key"), "xyz789")
+        p1_buffer = cache._entries[("p1", "api_key")][1]
+        p2_buffer = cache._entries[("p2", "api_key")][1]
+
+        cache.invalidate_provider("p1")
+        now[0] = 11
+        assert cache.purge_expired() == 1
+
+        assert p1_buffer == bytearray(6) and p2_buffer == bytearray(6)
+        assert cache.get(("p1", "api_key")) is None
+
+    def test_oldest_entries_are_evicted_at_capacity(self):
+        cache = CredentialCache(max_entries=2)
+        cache.put(("p1", "k"), "one")
+        oldest = cache._entries[("p1", "k")][1]
+        cache.put(("p2", "k"), "two")
+        cache.put(("p3", "k"), "three")
+
+        assert cache.get_stats()["entries"] == 2
+        assert cache.get(("p1", "k")) is None and oldest == bytearray(3)
+        assert cache.get(("p3", "k")) == "three"
+
+    def test_failed_decrypt_is_not_cached(self):
+        cache = CredentialCache()
+
+        def broken(token):
+            raise ValueError("bad token")
+
+        with pytest.raises(ValueError):
+            cache.decrypt(("p1", "k"), "t", broken)
+        assert cache.get_stats()["decrypt_failures"] == 1
+        assert cache.bulk_decrypt({("p1", "k"): "t"}, broken) == {}
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.db.queries += 1
+        return SimpleNamespace(data=self.db.rows)
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+class TestProviderCredentials:
+    """Test that provider credentials are decrypted at bootstrap"""
+
+    @pytest.mark.asyncio
+    async def test_bootstrap_then_reads_hit_cache(self, monkeypatch):
+        cache = CredentialCache()
+        monkeypatch.setattr(manager_module, "credential_cache", cache)
+        rows = [{"provider_id": "p1", "credential_key": "api_key", "credential_value_vault_id": "v1"},
+                {"provider_id": "p1", "credential_key": "secret", "credential_value_vault_id": "v2"}]
+        db = FakeSupabase(rows)
+        manager = UniversalProviderManager()
+
+        await manager._bootstrap_credentials(["p1"], db)
+        credentials = [await manager._get_provider_credentials("p1", db) for _ in range(5)]
+
+        assert credentials[0] == {"api_key": "VAULT_SECRET_v1", "secret": "VAULT_SECRET_v2"}
+        assert db.queries == 1
+        assert cache.get_stats()["decrypts"] == 2
+
+        cache.invalidate_provider("p1")
+        await manager._get_provider_credentials("p1", db)
+        assert db.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_provider_without_credentials_is_refetched(self, monkeypatch):
+        monkeypatch.setattr(manager_module, "credential_cache", CredentialCache())
+        db = FakeSupabase([])
+        manager = UniversalProviderManager()
+
+        await manager._bootstrap_credentials(["p1"], db)
+        assert await manager._get_provider_credentials("p1", db) == {}
+
+        db.rows = [{"provider_id": "p1", "credential_key": "api_key", "credential_value_vault_id": "v1"}]
+        assert await manager._get_provider_credentials("p1", db) == {"api_key": "VAULT_SECRET_v1"}
+        assert db.queries == 3
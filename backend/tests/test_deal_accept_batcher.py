@@ -0,0 +1,187 @@
+"""
+Deal Accept Batcher Testing
+Tests batched, overbooking-proof deal acceptance under concurrent load
+"""
+
+import time
+import uuid
+import random
+import asyncio
+import threading
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import deal_accept_batcher
+import offseason_endpoints
+from deal_accept_batcher import DealAcceptBatcher, accept_deals_rpc
+
+
+class FakeLedger:
+    """In-memory stand-in for accept_offseason_deals with one lock per campaign day"""
+
+    def __init__(self, capacity, deals, lock_hold_s=0.001):
+        self.capacity = dict(capacity)
+        self.allocated = Counter()
+        self.deals = dict(deals)
+        self.accepted = set()
+        self.lock_hold_s = lock_hold_s
+        self.row_locks = {key: threading.Lock() for key in capacity}
+        self.deal_lock = threading.Lock()
+        self.lock_acquisitions = 0
+
+    def accept_batch(self, requests):
+        groups = {}
+        for request in requests:
+            key = self.deals.get(request["deal_id"])
+            if key is not None:
+                groups.setdefault(key, []).append(request["deal_id"])
+
+        outcomes = {}
+        for key in sorted(groups):
+            with self.row_locks[key]:
+                self.lock_acquisitions += 1
+                time.sleep(self.lock_hold_s)
+                remaining = self.capacity[key] - self.allocated[key]
+                with self.deal_lock:
+                    open_deals = [d for d in groups[key] if d not in self.accepted]
+                    taken = open_deals[:remaining]
+                    self.accepted.update(taken)
+                self.allocated[key] += len(taken)
+                assert self.allocated[key] <= self.capacity[key]
+            for deal_id in groups[key]:
+                if deal_id in taken:
+                    outcomes[deal_id] = {"accepted": True, "campaign_id": key[0], "stay_date": key[1],
+                                         "remaining": remaining - len(taken)}
+                else:
+                    outcomes[deal_id] = {"accepted": False, "campaign_id": key[0], "reason": "sold_out"}
+
+        return [
+            {"deal_id": r["deal_id"], **outcomes.get(r["deal_id"], {"accepted": False, "reason": "not_found"})}
+            for r in requests
+        ]
+
+    async def flush(self, requests):
+        return await asyncio.to_thread(self.accept_batch, requests)
+
+
+def make_ledger(days=3, capacity=100, deals_per_day=2000):
+    keys = [("campaign_1", f"2025-06-0{d + 1}") for d in range(days)]
+    deals = {f"deal_{k}_{i}": key for k, key in enumerate(keys) for i in range(deals_per_day)}
+    return FakeLedger({key: capacity for key in keys}, deals)
+
+
+class TestDealAcceptBatcher:
+    """Test coalescing and per-caller outcomes"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_accepts_never_overbook(self):
+        ledger = make_ledger()
+        batcher = DealAcceptBatcher(ledger.flush, max_batch=500, max_delay_ms=2)
+        deal_ids = list(ledger.deals)
+        random.Random(7).shuffle(deal_ids)
+
+        outcomes = await asyncio.gather(*(batcher.accept(deal_id) for deal_id in deal_ids))
+
+        accepted = [o for o in outcomes if o["accepted"]]
+        per_day = Counter(o["stay_date"] for o in accepted)
+        assert per_day == {"2025-06-01": 100, "2025-06-02": 100, "2025-06-03": 100}
+        assert len({o["deal_id"] for o in accepted}) == 300
+        assert all(o["reason"] == "sold_out" for o in outcomes if not o["accepted"])
+        # 6000 accepts take a few dozen row locks, not one each
+        assert ledger.lock_acquisitions <= 3 * batcher.get_stats()["flushes"] < len(deal_ids) / 10
+
+    @pytest.mark.asyncio
+    async def test_processes_sharing_a_ledger(self):
+        ledger = make_ledger(days=1, capacity=50, deals_per_day=1000)
+        batchers = [DealAcceptBatcher(ledger.flush, max_batch=64, max_delay_ms=1) for _ in range(4)]
+        deal_ids = list(ledger.deals)
+
+        outcomes = await asyncio.gather(*(
+            batchers[i % 4].accept(deal_id) for i, deal_id in enumerate(deal_ids + deal_ids[:200])
+        ))
+
+        assert len({o["deal_id"] for o in outcomes if o["accepted"]}) == 50
+        assert ledger.allocated[("campaign_1", "2025-06-01")] == 50
+
+    @pytest.mark.asyncio
+    async def test_duplicate_accept_in_window_is_sent_once(self):
+        sent = []
+
+        async def flush(requests):
+            sent.extend(requests)
+            return [{"deal_id": r["deal_id"], "accepted": True, "stay_date": "2025-06-01"} for r in requests]
+
+        batcher = DealAcceptBatcher(flush, max_delay_ms=1)
+        first, second = await asyncio.gather(batcher.accept("deal_1"), batcher.accept("deal_1"))
+
+        assert first is second
+        assert [r["deal_id"] for r in sent] == ["deal_1"]
+
+    @pytest.mark.asyncio
+    async def test_flush_failure_reaches_every_caller(self):
+        async def flush(requests):
+            raise RuntimeError("db down")
+
+        batcher = DealAcceptBatcher(flush, max_delay_ms=1)
+        results = await asyncio.gather(batcher.accept("a"), batcher.accept("b"), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.get_stats()["failed"] == 2
+
+
+class FakeRpc:
+    """accept_offseason_deals stand-in that fails like a UUID[] cast on a malformed id"""
+
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(params)
+        ids = [str(uuid.UUID(d)) for d in params["deal_uuids"]]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=[
+            {"deal_id": d, "accepted": True, "campaign_id": "c1", "stay_date": "2025-06-01", "remaining": 9}
+            for d in ids
+        ]))
+
+
+class TestMalformedDealIds:
+    """Test that one bad id cannot fail the other accepts in its batch"""
+
+    @pytest.fixture
+    def fake(self, monkeypatch):
+        db = FakeRpc()
+        monkeypatch.setattr(deal_accept_batcher, "get_supabase_client", lambda **kwargs: db)
+        return db
+
+    @pytest.mark.asyncio
+    async def test_malformed_ids_are_not_sent_and_case_is_matched(self, fake):
+        good = str(uuid.uuid4())
+        batcher = DealAcceptBatcher(accept_deals_rpc, max_delay_ms=1)
+
+        bad, upper = await asyncio.gather(batcher.accept("not-a-uuid"), batcher.accept(good.upper()))
+
+        assert bad == {"deal_id": "not-a-uuid", "accepted": False, "reason": "not_found"}
+        assert upper["accepted"] and upper["deal_id"] == good.upper()
+        assert fake.calls == [{"deal_uuids": [good], "stay_days": [None]}]
+
+    @pytest.mark.asyncio
+    async def test_endpoint_rejects_malformed_id_before_queueing(self, monkeypatch):
+        queued = []
+
+        async def accept(deal_id, stay_date=None):
+            queued.append(deal_id)
+            return {"deal_id": deal_id, "accepted": True, "campaign_id": "c1",
+                    "stay_date": "2025-06-01", "remaining": 3}
+
+        monkeypatch.setattr(offseason_endpoints.deal_accept_batcher, "accept", accept)
+        good = str(uuid.uuid4())
+
+        with pytest.raises(HTTPException) as error:
+            await offseason_endpoints.accept_deal("1; drop table", stay_date=None)
+        response = await offseason_endpoints.accept_deal(good.upper(), stay_date=None)
+
+        assert error.value.status_code == 404
+        assert queued == [good] and response.deal_id == good
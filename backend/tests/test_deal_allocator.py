@@ -0,0 +1,111 @@
+"""
+Deal Allocator Testing
+Tests capacity-aware global assignment of dreams to campaign days
+"""
+
+from collections import Counter
+from datetime import date
+
+from deal_allocator import CampaignDays, allocate_deals, _merge_reserved
+
+# Campaign windows in these tests lie after this date
+TODAY = date(2025, 5, 1)
+
+
+def make_campaign(idx, max_allocation=2, discount=40.0, tags=("family",), blackout=(),
+                  start="2025-06-01", end="2025-06-03"):
+    return {
+        "id": f"campaign_{idx}",
+        "discount": discount,
+        "audience_tags": list(tags),
+        "blackout": list(blackout),
+        "start_date": start,
+        "end_date": end,
+        "max_allocation": max_allocation,
+        "metadata": {}
+    }
+
+
+def make_dream(idx, tags=("family",), **extra):
+    return {"id": f"dream_{idx}", "user_id": f"user_{idx}", "budget": 2000.0, "tags": list(tags), **extra}
+
+
+class TestCampaignDays:
+    """Test next-open-day lookup"""
+
+    def test_fills_days_in_order_and_skips_blackout(self):
+        days = CampaignDays(date(2025, 6, 1), date(2025, 6, 4), 1, blackout=["2025-06-02"])
+
+        taken = [days.take() for _ in range(4)]
+
+        assert taken == [date(2025, 6, 1), date(2025, 6, 3), date(2025, 6, 4), None]
+
+    def test_window_and_reserved(self):
+        days = CampaignDays(date(2025, 6, 1), date(2025, 6, 5), 2, reserved={"2025-06-03": 1})
+
+        assert days.take(date(2025, 6, 3), date(2025, 6, 3)) == date(2025, 6, 3)
+        assert days.take(date(2025, 6, 3), date(2025, 6, 3)) is None
+        assert days.take(date(2025, 6, 3)) == date(2025, 6, 4)
+        assert days.take(date(2025, 7, 1)) is None
+
+
+class TestAllocateDeals:
+    """Test global assignment"""
+
+    def test_never_exceeds_daily_allocation(self):
+        campaigns = [make_campaign(0, max_allocation=2, discount=60), make_campaign(1, max_allocation=1)]
+        dreams = [make_dream(i) for i in range(20)]
+
+        result = allocate_deals(dreams, campaigns, today=TODAY)
+
+        per_day = Counter((a.campaign_id, a.stay_date) for a in result.assignments)
+        assert len(result.assignments) == 3 * 2 + 3 * 1
+        assert max(per_day.values()) <= 2
+        assert all(count == 1 for (cid, _), count in per_day.items() if cid == "campaign_1")
+        assert len({a.dream_id for a in result.assignments}) == len(result.assignments)
+
+    def test_highest_scores_win_contested_capacity(self):
+        campaign = make_campaign(0, max_allocation=1, start="2025-06-01", end="2025-06-01")
+        dreams = [make_dream(0, tags=("beach",)), make_dream(1, tags=("family",))]
+
+        result = allocate_deals(dreams, [campaign], wallet_tiers={"user_0": "platinum"}, today=TODAY)
+
+        assert [a.dream_id for a in result.assignments] == ["dream_1"]
+        assert result.summary()["unassigned"] == 1
+
+    def test_falls_through_to_next_candidate(self):
+        best = make_campaign(0, max_allocation=1, discount=70, start="2025-06-01", end="2025-06-01")
+        backup = make_campaign(1, max_allocation=5, discount=20)
+        dreams = [make_dream(0), make_dream(1)]
+
+        result = allocate_deals(dreams, [best, backup], today=TODAY)
+
+        assert {a.campaign_id for a in result.assignments} == {"campaign_0", "campaign_1"}
+
+    def test_respects_preferred_dates_unless_flexible(self):
+        campaign = make_campaign(0, max_allocation=5, start="2025-06-01", end="2025-06-10")
+        fixed = make_dream(0, preferred_start_date="2025-06-07", preferred_end_date="2025-06-09")
+        outside = make_dream(1, preferred_start_date="2025-07-01", preferred_end_date="2025-07-05")
+        flexible = make_dream(2, flexible_dates=True, preferred_start_date="2025-07-01")
+
+        result = allocate_deals([fixed, outside, flexible], [campaign], today=TODAY)
+
+        stays = {a.dream_id: a.stay_date for a in result.assignments}
+        assert stays == {"dream_0": date(2025, 6, 7), "dream_2": date(2025, 6, 1)}
+
+    def test_running_campaign_is_never_placed_in_the_past(self):
+        campaign = make_campaign(0, max_allocation=1, start="2025-06-01", end="2025-06-10")
+        flexible = make_dream(0, flexible_dates=True)
+        fixed = make_dream(1, preferred_start_date="2025-06-02", preferred_end_date="2025-06-08")
+
+        result = allocate_deals([flexible, fixed], [campaign], today=date(2025, 6, 5))
+
+        assert sorted(a.stay_date for a in result.assignments) == [date(2025, 6, 5), date(2025, 6, 6)]
+
+    def test_outstanding_offers_count_as_reserved(self):
+        campaign = make_campaign(0, max_allocation=2, start="2025-06-01", end="2025-06-01")
+        reserved = _merge_reserved({"campaign_0": {"2025-06-01": 1}}, {"campaign_0": {"2025-06-01": 1}})
+
+        result = allocate_deals([make_dream(0)], [campaign], reserved=reserved, today=TODAY)
+
+        assert result.assignments == []
@@ -0,0 +1,247 @@
+"""
+Dream Match Index Testing
+Tests write-time matching of dreams and campaigns through the in-memory index
+"""
+
+import random
+import threading
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import dream_match_index
+from dream_match_index import DreamMatchIndex
+from yield_optimizer import YieldOptimizer
+
+TAGS = ["family", "beach", "ski", "culture", "food", "spa"]
+DESTINATIONS = ["bali", "goa", "kyoto", ""]
+START = date.today() + timedelta(days=10)
+
+
+def make_campaign(idx, tags=(), destination="", discount=30.0, status="active", days=30):
+    return {
+        "id": f"campaign_{idx:03d}",
+        "status": status,
+        "discount": discount,
+        "audience_tags": list(tags),
+        "blackout": [],
+        "start_date": START.isoformat(),
+        "end_date": (START + timedelta(days=days)).isoformat(),
+        "metadata": {"destination": destination, "occupancy_rate": 30}
+    }
+
+
+def make_dream(idx, tags=(), destination="bali", user="user_1", budget=1500.0):
+    return {"id": f"dream_{idx:03d}", "user_id": user, "status": "active",
+            "destination": destination, "tags": list(tags), "budget": budget}
+
+
+def random_rows(rng, campaigns=40, dreams=60):
+    return (
+        [make_campaign(j, rng.sample(TAGS, rng.randint(0, 2)), rng.choice(DESTINATIONS),
+                       discount=round(rng.uniform(5, 60), 2)) for j in range(campaigns)],
+        [make_dream(i, rng.sample(TAGS, rng.randint(0, 2)), rng.choice(DESTINATIONS),
+                    user=f"user_{i % 7}", budget=rng.uniform(300, 4000)) for i in range(dreams)]
+    )
+
+
+class TestCandidateRules:
+    """Test which campaigns a dream is matched against"""
+
+    def test_high_scoring_campaign_without_shared_tags_is_matched(self):
+        index = DreamMatchIndex(candidates_per_dream=2)
+        for campaign in [make_campaign(0, ["beach"], discount=10), make_campaign(1, ["ski"], discount=60),
+                         make_campaign(2, ["spa"], discount=5), make_campaign(3, discount=55)]:
+            index.apply_change("offseason_campaigns", "INSERT", campaign)
+
+        index.apply_change("dream_intents", "INSERT", make_dream(0, ["Beach"]))
+
+        matched = [c["id"] for _, c in index.matches_for_dream("dream_000")]
+        full = YieldOptimizer.rank_campaigns([make_dream(0, ["Beach"])], list(index.campaigns.values()), top_k=2)
+        assert matched == [m["campaign"]["id"] for m in full["dream_000"]]
+        assert "campaign_001" in matched
+
+    def test_low_scoring_campaign_without_shared_tags_is_not_scored_against_tagged_dreams(self):
+        index = DreamMatchIndex(candidates_per_dream=1)
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(0, ["beach"], discount=50))
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(1, ["ski"], discount=40))
+        index.apply_change("dream_intents", "INSERT", make_dream(0, ["beach"]))
+        index.apply_change("dream_intents", "INSERT", make_dream(1, []))
+
+        assert index._candidate_dreams(index.campaigns["campaign_001"]) == {"dream_001"}
+
+    def test_inactive_and_expired_campaigns_are_not_indexed(self):
+        index = DreamMatchIndex()
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(0, status="draft"))
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(1, days=-20))
+
+        assert index.get_stats()["campaigns"] == 0
+
+
+class TestIncrementalUpdates:
+    """Test that change events keep the match lists exact"""
+
+    def test_incremental_equals_bulk_build(self):
+        rng = random.Random(3)
+        campaigns, dreams = random_rows(rng)
+        bulk = DreamMatchIndex(candidates_per_dream=5)
+        bulk.build(campaigns, dreams, chunk_size=16)
+
+        incremental = DreamMatchIndex(candidates_per_dream=5)
+        events = [("offseason_campaigns", c) for c in campaigns] + [("dream_intents", d) for d in dreams]
+        rng.shuffle(events)
+        for table, row in events:
+            incremental.apply_change(table, "INSERT", row)
+
+        assert incremental._matches == bulk._matches
+
+    def test_removing_a_campaign_backfills_the_next_best(self):
+        index = DreamMatchIndex(candidates_per_dream=1)
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(0, ["beach"], discount=60))
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(1, ["beach"], discount=20))
+        index.apply_change("dream_intents", "INSERT", make_dream(0, ["beach"]))
+        assert index.matches_for_dream("dream_000")[0][1]["id"] == "campaign_000"
+
+        paused = dict(make_campaign(0, ["beach"], discount=60), status="paused")
+        index.apply_change("offseason_campaigns", "UPDATE", paused)
+
+        assert [c["id"] for _, c in index.matches_for_dream("dream_000")] == ["campaign_001"]
+
+    def test_dream_status_change_removes_it(self):
+        index = DreamMatchIndex()
+        index.apply_change("offseason_campaigns", "INSERT", make_campaign(0))
+        index.apply_change("dream_intents", "INSERT", make_dream(0))
+        index.apply_change("dream_intents", "UPDATE", dict(make_dream(0), status="matched"))
+
+        assert index.lookup_user("user_1") == ([], [])
+
+
+class TestLookup:
+    """Test that lookups rank like a full scan over every active campaign"""
+
+    def test_lookup_ranking_matches_full_scan(self):
+        rng = random.Random(11)
+        campaigns, dreams = random_rows(rng)
+        dreams += [make_dream(90, ["beach"], user="user_0", budget=0.0), make_dream(91, [], user="user_3")]
+        index = DreamMatchIndex(candidates_per_dream=8)
+        index.build(campaigns, dreams)
+
+        for user in ("user_0", "user_3"):
+            for tier in ("bronze", "platinum"):
+                user_dreams, candidates = index.lookup_user(user)
+                fast = YieldOptimizer.rank_campaigns(user_dreams, candidates, tier, 5)
+                full = YieldOptimizer.rank_campaigns(user_dreams, campaigns, tier, 5)
+                for dream in user_dreams:
+                    assert [(m["campaign"]["id"], m["total_score"]) for m in fast[dream["id"]]] == \
+                           [(m["campaign"]["id"], m["total_score"]) for m in full[dream["id"]]]
+
+    def test_incremental_lookups_match_full_scan_after_removals(self):
+        rng = random.Random(5)
+        campaigns, dreams = random_rows(rng)
+        index = DreamMatchIndex(candidates_per_dream=4)
+        for campaign in campaigns:
+            index.apply_change("offseason_campaigns", "INSERT", campaign)
+        for dream in dreams:
+            index.apply_change("dream_intents", "INSERT", dream)
+        for campaign in rng.sample(campaigns, 15):
+            index.apply_change("offseason_campaigns", "DELETE", old=campaign)
+
+        remaining = sorted(index.campaigns.values(), key=lambda c: c["id"])
+        for dream_id, dream in index.dreams.items():
+            full = YieldOptimizer.rank_campaigns([dream], remaining, top_k=4)[dream_id]
+            assert [cid for _, cid in index._matches.get(dream_id, [])] == [m["campaign"]["id"] for m in full]
+
+
+class TestRequestPath:
+    """Test that request handlers never score on the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_pushed_changes_are_scored_on_a_worker_thread(self, monkeypatch):
+        index = DreamMatchIndex()
+        scoring_threads = []
+        apply_change = index.apply_change
+
+        def record_thread(*args, **kwargs):
+            scoring_threads.append(threading.get_ident())
+            apply_change(*args, **kwargs)
+
+        monkeypatch.setattr(index, "apply_change", record_thread)
+
+        index.push_change("offseason_campaigns", "INSERT", make_campaign(0, ["beach"]))
+        index.push_change("dream_intents", "INSERT", make_dream(0, ["beach"]))
+        assert scoring_threads == [] and index.get_stats()["queued"] == 2
+
+        await index._drain_task
+        dreams, campaigns = await index.lookup("user_1")
+
+        assert [c["id"] for c in campaigns] == ["campaign_000"] and len(dreams) == 1
+        assert threading.get_ident() not in scoring_threads
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.since = None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def gt(self, column, value):
+        self.since = value
+        return self
+
+    def execute(self):
+        self.db.reads.append((self.table, self.since))
+        rows = self.db.rows[self.table]
+        if self.since is not None:
+            rows = [r for r in rows if r["updated_at"] > self.since]
+        return SimpleNamespace(data=list(rows), count=None)
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class TestSync:
+    """Test polling for rows changed by other workers"""
+
+    @pytest.fixture
+    def fake(self, monkeypatch):
+        db = FakeSupabase({
+            "offseason_campaigns": [dict(make_campaign(0, ["beach"]), updated_at="2025-10-20T10:00:05+00:00")],
+            "dream_intents": [dict(make_dream(0, ["beach"]), updated_at="2025-10-20T10:00:00+00:00")],
+        })
+        monkeypatch.setattr(dream_match_index, "get_supabase_client", lambda **kwargs: db)
+        return db
+
+    @pytest.mark.asyncio
+    async def test_watermark_follows_database_timestamps(self, fake):
+        index = DreamMatchIndex()
+        await index.rebuild()
+
+        overlap = timedelta(seconds=dream_match_index.MATCH_SYNC_OVERLAP_SECONDS)
+        assert index.watermark == (datetime(2025, 10, 20, 10, 0, 5, tzinfo=timezone.utc) - overlap).isoformat()
+
+    @pytest.mark.asyncio
+    async def test_late_commit_inside_overlap_is_picked_up(self, fake):
+        index = DreamMatchIndex()
+        await index.rebuild()
+        assert index.get_stats()["events"] == 0
+
+        # Committed after the rebuild read, stamped before the newest row seen
+        fake.rows["dream_intents"].append(
+            dict(make_dream(1, ["beach"], user="user_2"), updated_at="2025-10-20T10:00:03+00:00")
+        )
+        await index.sync_changes()
+        await index.sync_changes()
+
+        assert index.lookup_user("user_2")[1][0]["id"] == "campaign_000"
+        # Rows re-read inside the overlap are applied once
+        assert index.get_stats()["events"] == 1
@@ -0,0 +1,53 @@
+"""
+FX Rate Service Testing
+Tests in-memory rate lookups and vectorized conversion
+"""
+
+import numpy as np
+import pytest
+from fx_rate_service import FxRateService
+
+TEST_RATES = {'USD': 1.0, 'AUD': 1.5, 'EUR': 0.8, 'JPY': 150.0}
+
+
+class TestFxRateService:
+    """Test rate table conversions"""
+
+    @pytest.fixture
+    def fx(self):
+        return FxRateService(TEST_RATES)
+
+    def test_cross_rate(self, fx):
+        assert fx.get_rate('AUD', 'EUR') == pytest.approx(0.8 / 1.5)
+        assert fx.convert(100, 'usd', 'aud') == pytest.approx(150)
+
+    def test_unsupported_currency(self, fx):
+        assert not fx.supports('XYZ')
+        with pytest.raises(ValueError):
+            fx.convert(1, 'XYZ', 'USD')
+
+    def test_convert_many_matches_scalar(self, fx):
+        amounts = [100.0, 200.0, 300.0, 400.0]
+        currencies = ['AUD', 'USD', 'JPY', 'AUD']
+
+        converted = fx.convert_many(amounts, currencies, 'EUR')
+
+        expected = [fx.convert(a, c, 'EUR') for a, c in zip(amounts, currencies)]
+        np.testing.assert_allclose(converted, expected)
+
+    def test_convert_many_rows(self, fx):
+        """Per-row currency applies across every column"""
+        converted = fx.convert_many([[150.0, 300.0], [10.0, 20.0]], ['AUD', 'USD'], 'USD')
+        np.testing.assert_allclose(converted, [[100.0, 200.0], [10.0, 20.0]])
+
+    def test_single_source_currency(self, fx):
+        converted = fx.convert_many(np.array([1.0, 2.0]), 'USD', 'JPY')
+        np.testing.assert_allclose(converted, [150.0, 300.0])
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_rates(self, fx, monkeypatch):
+        monkeypatch.setattr('fx_rate_service.FX_RATES_URL', 'http://127.0.0.1:9/latest')
+        assert await fx.refresh() is False
+        assert fx.rates == TEST_RATES
+        assert fx.snapshot()['source'] == 'fallback'
+        assert fx.last_error
@@ -0,0 +1,177 @@
+"""
+Keyset Pagination Testing
+Tests opaque cursors, cursor-paged list endpoints and the inventory
+endpoint's database-side summary
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from postgrest import SyncPostgrestClient
+
+import provider_partner_marketplace
+from keyset_pagination import (
+    InvalidCursor, PaginationError, apply_keyset, count_method, decode_cursor, encode_cursor,
+    keyset_page, keyset_query
+)
+from provider_partner_marketplace import get_partner_inventory, list_partner_bids, list_providers
+from provider_registry_cache import ProviderRegistryCache
+
+
+class TestCursors:
+    """Test cursor encoding and keyset filters"""
+
+    def test_round_trip(self):
+        key = {"date": "2025-03-01", "id": "b9a1"}
+        cursor = encode_cursor(key)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == key
+
+    def test_garbage_cursor_is_rejected(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor!")
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor({"date": "2025-03-01"}))
+
+    def test_keyset_filter_breaks_ties_on_id(self):
+        query = SyncPostgrestClient("http://localhost").table("partner_inventory").select("*")
+
+        query = apply_keyset(query, "date", {"date": "2025-03-01", "id": "b9a1"}, descending=True)
+
+        assert dict(query.params)["or"] == '(date.lt."2025-03-01",and(date.eq."2025-03-01",id.lt."b9a1"))'
+
+    def test_page_uses_extra_row_only_as_signal(self):
+        rows = [{"id": str(i), "date": f"2025-03-0{i}"} for i in range(1, 5)]
+
+        page, cursor = keyset_page(rows, "date", 3)
+        last_page, no_cursor = keyset_page(rows[:3], "date", 3)
+
+        assert [r["id"] for r in page] == ["1", "2", "3"]
+        assert decode_cursor(cursor) == {"date": "2025-03-03", "id": "3"}
+        assert len(last_page) == 3 and no_cursor is None
+
+    def test_count_is_estimated_unless_requested(self):
+        assert count_method("estimated") == "estimated"
+        assert count_method("exact") == "exact"
+        assert count_method("none") is None
+        with pytest.raises(PaginationError):
+            count_method("all")
+
+    def test_keyset_query_with_and_without_cursor(self):
+        table = SyncPostgrestClient("http://localhost").table("partner_bids")
+        cursor = encode_cursor({"submitted_at": "2025-03-01T10:00:00", "id": "b9"})
+
+        first = dict(keyset_query(table.select("*"), "submitted_at", None, 50, offset=100, descending=True).params)
+        later = dict(keyset_query(table.select("*"), "submitted_at", cursor, 50, descending=True).params)
+
+        assert first["order"] == "submitted_at.desc,id.desc"
+        assert (first["offset"], first["limit"]) == ("100", "51")
+        assert "offset" not in later and later["limit"] == "51"
+        assert later["or"].startswith('(submitted_at.lt."2025-03-01T10:00:00"')
+
+
+class FakeBuilder:
+    def __init__(self, db, result):
+        self.db = db
+        self.result = result
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.db.calls.append((name, args, kwargs) if kwargs else (name, args))
+            return self
+        return record
+
+    def execute(self):
+        return SimpleNamespace(data=self.result, count=None)
+
+
+class FakeSupabase:
+    def __init__(self, rows, summary):
+        self.rows = rows
+        self.summary = summary
+        self.calls = []
+
+    def table(self, name):
+        return FakeBuilder(self, self.rows)
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return FakeBuilder(self, self.summary)
+
+
+class TestInventoryEndpoint:
+    """Test that the inventory summary comes from the database function"""
+
+    @pytest.mark.asyncio
+    async def test_summary_and_buckets_from_rpc(self, monkeypatch):
+        rows = [{"id": f"r{i}", "date": f"2025-03-0{i}"} for i in range(1, 4)]
+        summary = [
+            {"bucket_start": None, "row_count": 40, "total_available_rooms": 400, "average_price": "120.50"},
+            {"bucket_start": "2025-03-03", "row_count": 7, "total_available_rooms": 70, "average_price": "99.00",
+             "min_price": 80, "max_price": 110, "blackout_days": 1},
+        ]
+        fake = FakeSupabase(rows, summary)
+        monkeypatch.setattr(provider_partner_marketplace, "get_supabase_client", lambda **kwargs: fake)
+
+        result = await get_partner_inventory("p1", start_date=None, end_date=None, room_type=None,
+                                             min_available_rooms=None, bucket="week", include_rows=True,
+                                             cursor=None, limit=2, offset=0)
+
+        assert result["count"] == 40
+        assert result["summary"]["average_price"] == 120.5
+        assert result["summary"]["buckets"][0]["start"] == "2025-03-03"
+        assert [r["id"] for r in result["inventory"]] == ["r1", "r2"]
+        assert decode_cursor(result["pagination"]["next_cursor"]) == {"date": "2025-03-02", "id": "r2"}
+        assert ("partner_inventory_summary", {
+            "p_partner_id": "p1", "p_start": None, "p_end": None, "p_room_type": None,
+            "p_min_available": None, "p_bucket": "week"
+        }) in fake.calls
+
+    @pytest.mark.asyncio
+    async def test_bad_bucket_and_cursor_are_client_errors(self, monkeypatch):
+        fake = FakeSupabase([], [])
+        monkeypatch.setattr(provider_partner_marketplace, "get_supabase_client", lambda **kwargs: fake)
+        kwargs = dict(start_date=None, end_date=None, room_type=None, min_available_rooms=None,
+                      include_rows=True, limit=10, offset=0)
+
+        for bucket, cursor in (("year", None), (None, "bogus")):
+            with pytest.raises(HTTPException) as exc:
+                await get_partner_inventory("p1", bucket=bucket, cursor=cursor, **kwargs)
+            assert exc.value.status_code == 400
+
+
+class TestListEndpoints:
+    """Test cursor paging on the list endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_provider_cursor_walks_every_row_once(self, monkeypatch):
+        cache = ProviderRegistryCache()
+        cache.load([{"id": f"p{i:02d}", "priority": i % 3, "is_active": True} for i in range(10)])
+        monkeypatch.setattr(provider_partner_marketplace, "provider_registry_cache", cache)
+
+        seen, cursor = [], None
+        while True:
+            result = await list_providers(provider_type=None, is_active=None, cursor=cursor, limit=4, offset=0)
+            seen += [p["id"] for p in result["providers"]]
+            cursor = result["pagination"]["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == 10 and len(set(seen)) == 10
+        assert result["count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_bids_default_to_estimated_count(self, monkeypatch):
+        rows = [{"id": f"b{i}", "bid_status": "submitted", "submitted_at": f"2025-03-0{9 - i}"} for i in range(3)]
+        fake = FakeSupabase(rows, [])
+        monkeypatch.setattr(provider_partner_marketplace, "get_supabase_client", lambda **kwargs: fake)
+
+        result = await list_partner_bids("partner_1", bid_status=None, user_dream_id=None, cursor=None,
+                                         count_mode="estimated", limit=2, offset=0)
+
+        assert ("select", ("*",), {"count": "estimated"}) in fake.calls
+        assert [b["id"] for b in result["bids"]] == ["b0", "b1"]
+        assert result["statistics"]["by_status"] == {"submitted": 2}
+        assert decode_cursor(result["pagination"]["next_cursor"]) == {"submitted_at": "2025-03-08", "id": "b1"}
@@ -0,0 +1,144 @@
+"""
+MongoDB Store Testing
+Tests client options, index bootstrap and keyset paging
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import IndexModel
+
+import mongo_store
+from keyset_pagination import InvalidCursor
+from mongo_store import ensure_indexes, find_page, keyset_filter
+
+
+def matches(doc, condition):
+    for field, expected in condition.items():
+        if field == '$or':
+            if not any(matches(doc, c) for c in expected):
+                return False
+        elif field == '$and':
+            if not all(matches(doc, c) for c in expected):
+                return False
+        elif isinstance(expected, dict):
+            if not doc[field] > expected['$gt']:
+                return False
+        elif doc[field] != expected:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        self.docs = sorted(self.docs, key=lambda d: tuple(d[k] for k, _ in keys))
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.filters = []
+        self.indexes = []
+
+    def find(self, condition, projection=None):
+        self.filters.append(condition)
+        return FakeCursor([dict(d) for d in self.docs if matches(d, condition)])
+
+    async def create_indexes(self, indexes):
+        if any(i.document.get('unique') for i in indexes):
+            raise RuntimeError('duplicate key error')
+        self.indexes.extend(indexes)
+        return [i.document['name'] for i in indexes]
+
+
+class FakeDb(dict):
+    def __missing__(self, name):
+        if name == 'broken':
+            raise RuntimeError('index build failed')
+        self[name] = FakeCollection([])
+        return self[name]
+
+
+START = datetime(2025, 10, 1, 12, 0)
+# Two documents share a timestamp so the id tiebreaker matters
+DOCS = [
+    {'id': f'id-{i:02d}', 'client_name': 'probe', 'timestamp': START + timedelta(minutes=i // 2)}
+    for i in range(7)
+]
+
+
+class TestFindPage:
+    """Test keyset paging over a collection"""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_every_document_once(self):
+        collection = FakeCollection(list(reversed(DOCS)))
+        seen, cursor = [], None
+        while True:
+            page, cursor = await find_page(collection, 'timestamp', cursor, limit=3)
+            seen.extend(d['id'] for d in page)
+            if not cursor:
+                break
+
+        assert seen == [d['id'] for d in DOCS]
+        assert len(collection.filters) == 3
+
+    @pytest.mark.asyncio
+    async def test_query_is_combined_with_cursor(self):
+        collection = FakeCollection(DOCS + [{'id': 'id-99', 'client_name': 'other', 'timestamp': START}])
+        page, cursor = await find_page(collection, 'timestamp', None, 2, query={'client_name': 'probe'})
+        page, _ = await find_page(collection, 'timestamp', cursor, 2, query={'client_name': 'probe'})
+
+        assert [d['id'] for d in page] == ['id-02', 'id-03']
+        assert '$and' in collection.filters[-1]
+
+    def test_bad_cursor_is_rejected(self):
+        with pytest.raises(InvalidCursor):
+            keyset_filter('timestamp', 'not-a-cursor')
+
+
+class TestIndexBootstrap:
+    """Test declared index creation"""
+
+    @pytest.mark.asyncio
+    async def test_declared_indexes_are_created_and_failures_skipped(self):
+        db = FakeDb()
+        declared = {
+            'broken': [IndexModel([('x', 1)], name='x')],
+            **mongo_store.COLLECTION_INDEXES,
+        }
+
+        created = await ensure_indexes(db, declared)
+
+        assert created == {'status_checks': ['status_checks_id', 'status_checks_timestamp_id']}
+
+    @pytest.mark.asyncio
+    async def test_failing_index_does_not_block_the_others(self):
+        db = FakeDb()
+        declared = {'events': [
+            IndexModel([('id', 1)], name='events_id', unique=True),
+            IndexModel([('timestamp', 1)], name='events_timestamp'),
+        ]}
+
+        created = await ensure_indexes(db, declared)
+
+        assert created == {'events': ['events_timestamp']}
+
+    def test_client_options_bound_pool_and_timeouts(self, monkeypatch):
+        monkeypatch.setattr(mongo_store, 'MONGO_MAX_POOL_SIZE', 10)
+        monkeypatch.setattr(mongo_store, 'MONGO_MIN_POOL_SIZE', 20)
+        options = mongo_store.mongo_client_options()
+
+        assert options['maxPoolSize'] == 10 and options['minPoolSize'] == 10
+        assert options['serverSelectionTimeoutMS'] == mongo_store.MONGO_SERVER_SELECTION_TIMEOUT_MS
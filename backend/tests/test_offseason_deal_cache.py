@@ -0,0 +1,143 @@
+"""
+Off-Season Deal Cache Testing
+Tests per-user caching of get_offseason_deals results and event invalidation
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from offseason_deal_cache import OffseasonDealCache
+
+FAR_END = (date.today() + timedelta(days=60)).isoformat()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def deal(campaign_id, end_date=FAR_END):
+    return {"campaign_id": campaign_id, "campaign_title": "Winter", "end_date": end_date}
+
+
+class TestOffseasonDealCache:
+    """Test hits, misses, expiry and invalidation"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.cache = OffseasonDealCache(ttl_seconds=60, max_users=3, clock=self.clock)
+        self.fetches = []
+
+    def fetcher(self, user_id, rows):
+        async def fetch():
+            self.fetches.append(user_id)
+            return rows
+        return fetch
+
+    @pytest.mark.asyncio
+    async def test_hit_after_miss_and_ttl_expiry(self):
+        rows = [deal("c1")]
+
+        assert await self.cache.get_or_fetch("u1", self.fetcher("u1", rows)) == rows
+        assert await self.cache.get_or_fetch("u1", self.fetcher("u1", rows)) == rows
+        self.clock.now += 61
+        await self.cache.get_or_fetch("u1", self.fetcher("u1", rows))
+
+        assert self.fetches == ["u1", "u1"]
+        stats = self.cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_campaign_invalidation_only_drops_affected_users(self):
+        await self.cache.get_or_fetch("u1", self.fetcher("u1", [deal("c1"), deal("c2")]))
+        await self.cache.get_or_fetch("u2", self.fetcher("u2", [deal("c3")]))
+
+        self.cache.invalidate_campaign("c2")
+
+        assert self.cache.get("u1") is None
+        assert self.cache.get("u2") == [deal("c3")]
+
+    @pytest.mark.asyncio
+    async def test_user_invalidation_and_clear(self):
+        await self.cache.get_or_fetch("u1", self.fetcher("u1", [deal("c1")]))
+        await self.cache.get_or_fetch("u2", self.fetcher("u2", [deal("c1")]))
+
+        self.cache.invalidate_user("u1")
+        assert self.cache.get("u1") is None and self.cache.get("u2") is not None
+
+        self.cache.clear()
+        assert self.cache.get_stats()["users"] == 0
+
+    @pytest.mark.asyncio
+    async def test_fetch_racing_invalidation_is_not_stored(self):
+        gate = asyncio.Event()
+
+        async def slow_fetch():
+            await gate.wait()
+            return [deal("c1")]
+
+        task = asyncio.create_task(self.cache.get_or_fetch("u1", slow_fetch))
+        await asyncio.sleep(0)
+        self.cache.invalidate_campaign("c1")
+        gate.set()
+
+        assert await task == [deal("c1")]
+        assert self.cache.get("u1") is None
+
+    @pytest.mark.asyncio
+    async def test_unrelated_invalidations_do_not_discard_a_fetch(self):
+        gate = asyncio.Event()
+
+        async def slow_fetch():
+            await gate.wait()
+            return [deal("c1")]
+
+        task = asyncio.create_task(self.cache.get_or_fetch("u1", slow_fetch))
+        await asyncio.sleep(0)
+        for user_id in ("u2", "u3", "u4"):
+            self.cache.invalidate_user(user_id)
+        self.cache.invalidate_campaign("c9")
+        gate.set()
+        await task
+
+        assert self.cache.get("u1") == [deal("c1")]
+
+    @pytest.mark.asyncio
+    async def test_fetch_racing_its_user_invalidation_or_clear_is_not_stored(self):
+        for invalidate in (lambda: self.cache.invalidate_user("u1"), self.cache.clear):
+            gate = asyncio.Event()
+
+            async def slow_fetch():
+                await gate.wait()
+                return [deal("c1")]
+
+            task = asyncio.create_task(self.cache.get_or_fetch("u1", slow_fetch))
+            await asyncio.sleep(0)
+            invalidate()
+            gate.set()
+            await task
+
+            assert self.cache.get("u1") is None
+        assert self.cache._user_invalidated == {} and self.cache._campaign_invalidated == {}
+
+    def test_entry_expires_with_earliest_campaign(self):
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+
+        self.cache.put("u1", [deal("c1"), deal("c2", end_date=yesterday)])
+
+        assert self.cache.get("u1") is None
+
+    def test_lru_eviction(self):
+        for user_id in ("u1", "u2", "u3"):
+            self.cache.put(user_id, [deal("c1")])
+        self.cache.get("u1")
+        self.cache.put("u4", [deal("c1")])
+
+        assert self.cache.get("u2") is None
+        assert self.cache.get("u1") is not None
+        assert self.cache.get_stats()["evictions"] == 1
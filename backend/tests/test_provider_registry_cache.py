@@ -0,0 +1,188 @@
+"""
+Provider Registry Cache Testing
+Tests that registry readers share one cached load and writes invalidate it
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import provider_analytics_api
+import provider_partner_marketplace
+import provider_registry_cache as cache_module
+from provider_partner_marketplace import (
+    get_provider_rotation, list_providers, marketplace_health, marketplace_stats
+)
+from provider_registry_cache import ProviderRegistryCache, filter_providers
+
+ROWS = [
+    {"id": "p2", "provider_name": "hotelbeds", "provider_type": "hotel", "is_active": True, "priority": 2,
+     "supports_hotels": True, "supported_regions": ["EU"], "health_status": "healthy", "eco_rating": 80},
+    {"id": "p1", "provider_name": "sabre", "provider_type": "flight", "is_active": True, "priority": 1,
+     "supports_flights": True, "supported_regions": ["US", "EU"], "health_status": "healthy"},
+    {"id": "p3", "provider_name": "expedia_taap", "provider_type": "hotel", "is_active": False, "priority": 3,
+     "supports_hotels": True, "supported_regions": ["US"]},
+]
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.payload = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def execute(self):
+        if self.payload is not None:
+            self.db.writes.append(self.payload)
+            return SimpleNamespace(data=[self.payload], count=None)
+        self.db.selects += 1
+        self.db.on_select()
+        rows = self.db.tables.get(self.table, self.db.rows)
+        return SimpleNamespace(data=[dict(r) for r in rows], count=len(rows))
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = 0
+        self.writes = []
+        self.on_select = lambda: None
+        # Rows of tables other than provider_registry
+        self.tables = {}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fake = FakeSupabase(ROWS)
+    cache = ProviderRegistryCache(ttl_seconds=30)
+    monkeypatch.setattr(cache_module, "get_supabase_client", lambda **kwargs: fake)
+    monkeypatch.setattr(provider_analytics_api, "get_supabase_client", lambda **kwargs: fake)
+    for module in ("provider_partner_marketplace", "provider_analytics_api"):
+        monkeypatch.setattr(f"{module}.provider_registry_cache", cache)
+    return fake, cache
+
+
+class TestProviderRegistryCache:
+    """Test the read-through cache"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, registry):
+        fake, cache = registry
+
+        results = await asyncio.gather(*[cache.get_all() for _ in range(20)])
+
+        assert fake.selects == 1
+        assert [p["id"] for p in results[0]] == ["p1", "p2", "p3"]
+        assert (await cache.get_by_name("hotelbeds"))["id"] == "p2"
+        assert fake.selects == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_reloads(self, registry):
+        fake, _ = registry
+        now = [0.0]
+        cache = ProviderRegistryCache(ttl_seconds=30, clock=lambda: now[0])
+
+        await cache.get_all()
+        now[0] = 29
+        await cache.get_all()
+        now[0] = 31
+        await cache.get_all()
+
+        assert fake.selects == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_lookups_with_rows(self, registry):
+        fake, cache = registry
+        await cache.get_all()
+        fake.rows = [dict(ROWS[0], provider_name="hotelbeds_v2")]
+
+        cache.invalidate()
+
+        assert cache._by_id == {} and cache._by_name == {}
+        assert await cache.get_by_name("hotelbeds") is None
+        assert (await cache.get_by_name("hotelbeds_v2"))["id"] == "p2"
+
+    @pytest.mark.asyncio
+    async def test_lookup_during_invalidated_load_reads_the_loaded_rows(self, registry):
+        fake, cache = registry
+        # A registry write lands while the select is running
+        fake.on_select = cache.invalidate
+
+        assert (await cache.get_by_id("p1"))["provider_name"] == "sabre"
+        assert cache._rows is None
+
+    def test_filters(self):
+        assert [p["id"] for p in filter_providers(ROWS, is_active=True, region="EU")] == ["p2", "p1"]
+        assert [p["id"] for p in filter_providers(ROWS, service_type="hotel", region="US")] == ["p3"]
+
+
+class TestRegistryEndpoints:
+    """Test that endpoints read through the cache and writes invalidate it"""
+
+    @pytest.mark.asyncio
+    async def test_endpoints_keep_response_shape(self, registry):
+        fake, _ = registry
+
+        listed = await list_providers(provider_type=None, is_active=True, cursor=None, limit=1, offset=1)
+        rotation = await get_provider_rotation("hotel", region=None)
+
+        assert listed["count"] == 2 and [p["id"] for p in listed["providers"]] == ["p2"]
+        assert [p["id"] for p in rotation["rotation"]] == ["p2"]
+        assert rotation["rotation"][0]["rotation_score"] == -6.0
+        assert fake.selects == 1
+
+    @pytest.mark.asyncio
+    async def test_priority_update_invalidates(self, registry):
+        fake, cache = registry
+        await cache.get_all()
+
+        await provider_analytics_api.update_provider_priority("p2", priority=5)
+        await cache.get_all()
+
+        assert fake.writes[0]["priority"] == 5
+        assert fake.selects == 2
+
+    @pytest.mark.asyncio
+    async def test_marketplace_health_is_cached(self, registry, monkeypatch):
+        fake, _ = registry
+        monkeypatch.setattr(provider_partner_marketplace, "get_supabase_client", lambda **kwargs: fake)
+        monkeypatch.setitem(provider_partner_marketplace._health_cache, "data", None)
+
+        first = await marketplace_health()
+        second = await marketplace_health()
+
+        assert first["statistics"]["providers"] == {"total": 3, "active": 2}
+        assert second["statistics"] == first["statistics"]
+        assert fake.selects == 1 + 4
+
+    @pytest.mark.asyncio
+    async def test_marketplace_stats_counts_cached_providers(self, registry, monkeypatch):
+        fake, _ = registry
+        monkeypatch.setattr(provider_partner_marketplace, "get_supabase_client", lambda **kwargs: fake)
+        fake.tables = {
+            "partner_registry": [{"partner_type": "hotel", "total_revenue": 100.0, "total_bookings": 2}],
+            "partner_inventory": [{"available_rooms": 5, "base_price": 80.0}],
+            "partner_bids": [{"bid_status": "accepted", "offer_price": 70.0}],
+        }
+
+        stats = await marketplace_stats()
+
+        assert stats["providers"] == {"by_type": {"hotel": 2, "flight": 1}, "total": 3}
+        assert fake.selects == 1 + 3
@@ -0,0 +1,104 @@
+"""
+Search Pipeline Testing
+Tests predicate compilation, heap-based top-k pagination and facets
+"""
+
+import random
+import pytest
+from search_pipeline import Facet, SearchPipeline, compile_predicate
+from advanced_search import generate_mock_hotels
+
+
+class TestCompilePredicate:
+    """Test predicate combination"""
+
+    def test_no_predicates(self):
+        assert compile_predicate([]) is None
+
+    def test_single_predicate_is_returned_as_is(self):
+        predicate = lambda r: True
+        assert compile_predicate([predicate]) is predicate
+
+    def test_all_predicates_must_pass(self):
+        combined = compile_predicate([lambda n: n > 2, lambda n: n % 2 == 0])
+        assert [n for n in range(10) if combined(n)] == [4, 6, 8]
+
+
+class TestSearchPipeline:
+    """Test single-pass filtering and top-k pagination"""
+
+    @pytest.fixture
+    def records(self):
+        records = generate_mock_hotels("Sydney", 500)
+        random.Random(7).shuffle(records)
+        return records
+
+    @pytest.mark.parametrize("descending", [False, True])
+    @pytest.mark.parametrize("page", [1, 3, 25])
+    def test_page_matches_full_sort(self, records, descending, page):
+        """Heap selection returns the same page as a stable full sort"""
+        predicate = lambda r: "pool" in r.amenities
+        pipeline = SearchPipeline({"amenities": predicate}, sort_field="star_rating", descending=descending)
+
+        result = pipeline.execute(records, page=page, per_page=10)
+
+        expected = sorted(
+            [r for r in records if predicate(r)],
+            key=lambda r: r.star_rating,
+            reverse=descending
+        )
+        assert result.records == expected[(page - 1) * 10:page * 10]
+        assert result.total_results == len(expected)
+        assert result.total_pages == (len(expected) + 9) // 10
+
+    def test_page_past_end_is_empty(self, records):
+        pipeline = SearchPipeline({}, sort_field="price_per_night")
+        result = pipeline.execute(records, page=100, per_page=20)
+        assert result.records == []
+        assert result.total_results == 500
+
+
+class TestFacets:
+    """Test facet counting in the filtering scan"""
+
+    @pytest.fixture
+    def records(self):
+        return generate_mock_hotels("Sydney", 20)
+
+    def test_facets_without_filters(self, records):
+        pipeline = SearchPipeline({}, sort_field="price_per_night", facets=[
+            Facet.field("star_rating", "star_rating"),
+            Facet.multi_field("amenities", "amenities")
+        ])
+        result = pipeline.execute(records, page=1, per_page=5)
+
+        assert result.facets["star_rating"] == {4.0: 10, 5.0: 10}
+        assert result.facets["amenities"]["wifi"] == 20
+        assert result.facets["amenities"]["pool"] == 10
+
+    def test_facet_ignores_its_own_filter(self, records):
+        """Star facet still shows other ratings while stars are filtered"""
+        pipeline = SearchPipeline(
+            {
+                "star_rating": lambda r: r.star_rating == 5.0,
+                "price_max": lambda r: r.price_per_night <= 300
+            },
+            sort_field="price_per_night",
+            facets=[
+                Facet.field("star_rating", "star_rating", filters=["star_rating"]),
+                Facet.buckets("price", "price_per_night", [200, 300], filters=["price_max"])
+            ]
+        )
+        result = pipeline.execute(records, page=1, per_page=5)
+
+        # 10 hotels priced <= 300, split evenly across 4 and 5 stars
+        assert result.facets["star_rating"] == {5.0: 5, 4.0: 5}
+        # All 5-star hotels bucketed by price, regardless of price filter
+        assert result.facets["price"] == {"0-200": 2, "200-300": 3, "300+": 5}
+        assert result.total_results == 5
+
+    def test_facets_skipped_when_not_requested(self, records):
+        pipeline = SearchPipeline({}, sort_field="price_per_night", facets=[
+            Facet.field("star_rating", "star_rating")
+        ])
+        assert pipeline.execute(records, 1, 5, with_facets=False).facets is None
@@ -0,0 +1,69 @@
+"""
+Search Session Store Testing
+Tests LRU eviction, memory accounting and expiry of search snapshots
+"""
+
+import time
+import pytest
+from search_sessions import SearchSessionStore, SearchView
+from search_pipeline import SearchPipeline
+from advanced_search import generate_mock_hotels
+
+
+class TestSearchSessionStore:
+    """Test bounded session storage"""
+
+    def test_lookup_requires_matching_query(self):
+        store = SearchSessionStore()
+        session = store.create("hotels", "sydney", generate_mock_hotels("Sydney", 10))
+
+        assert store.get(session.search_id, "hotels", "sydney") is session
+        assert store.get(session.search_id, "hotels", "melbourne") is None
+        assert store.get(session.search_id, "flights", "sydney") is None
+        assert store.get_stats()["hits"] == 1
+
+    def test_least_recently_used_session_evicted(self):
+        store = SearchSessionStore(max_sessions=2)
+        first = store.create("hotels", "a", generate_mock_hotels("A", 5))
+        second = store.create("hotels", "b", generate_mock_hotels("B", 5))
+
+        # Touch the first session so the second becomes least recently used
+        store.get(first.search_id, "hotels", "a")
+        store.create("hotels", "c", generate_mock_hotels("C", 5))
+
+        assert store.get(first.search_id, "hotels", "a") is first
+        assert store.get(second.search_id, "hotels", "b") is None
+        assert store.get_stats()["evictions"] == 1
+
+    def test_memory_budget_enforced(self):
+        records = generate_mock_hotels("Sydney", 200)
+        probe = SearchSessionStore().create("hotels", "probe", records)
+
+        store = SearchSessionStore(max_bytes=int(probe.size_bytes * 2.5))
+        for key in "abcd":
+            store.create("hotels", key, generate_mock_hotels(key, 200))
+
+        stats = store.get_stats()
+        assert stats["sessions"] == 2
+        assert stats["used_bytes"] <= store.max_bytes
+
+    def test_expired_session_dropped(self):
+        store = SearchSessionStore(ttl_seconds=60)
+        session = store.create("hotels", "a", generate_mock_hotels("A", 5))
+        session.expires_at = time.time() - 1
+
+        assert store.get(session.search_id, "hotels", "a") is None
+        assert store.get_stats()["sessions"] == 0
+
+
+class TestSearchView:
+    """Test ranked paging over a filtered view"""
+
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_deep_pages_match_pipeline(self, descending):
+        records = generate_mock_hotels("Sydney", 95)
+        pipeline = SearchPipeline({}, sort_field="guest_rating", descending=descending)
+        view = SearchView(*pipeline.scan(records))
+
+        for page in (1, 2, 5, 10):
+            assert view.page(pipeline, page, 10) == pipeline.paginate(records, page, 10)
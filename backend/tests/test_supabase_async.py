@@ -0,0 +1,142 @@
+"""
+Supabase Async Access Testing
+Tests that queries run off the event loop, and flags blocking .execute()
+calls in async code anywhere in the backend
+"""
+
+import ast
+import asyncio
+import threading
+from pathlib import Path
+
+from types import SimpleNamespace
+
+import pytest
+from supabase_async import SupabaseExecutor, run_counts
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Standalone CLI scripts are synchronous by design
+EXCLUDED_DIRS = {"tests", "scripts"}
+
+
+class FakeQuery:
+    """Query builder stand-in recording the thread that executed it"""
+
+    def __init__(self, result=None, error=None, delay=0.0):
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.thread = None
+
+    def execute(self):
+        import time
+        self.thread = threading.current_thread()
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TestSupabaseExecutor:
+    """Test the bounded worker pool"""
+
+    @pytest.fixture
+    def executor(self):
+        executor = SupabaseExecutor(max_workers=4)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_query_runs_on_worker_thread(self, executor):
+        query = FakeQuery(result="rows")
+
+        assert await executor.execute(query) == "rows"
+        assert query.thread is not threading.main_thread()
+        assert query.thread.name.startswith("supabase")
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running(self, executor):
+        """Concurrent slow queries overlap instead of serialising the loop"""
+        queries = [FakeQuery(delay=0.1) for _ in range(4)]
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        await asyncio.gather(*(executor.execute(q) for q in queries))
+
+        assert loop.time() - start < 0.3
+        assert executor.get_stats()["max_in_flight"] == 4
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_are_counted(self, executor):
+        with pytest.raises(RuntimeError):
+            await executor.execute(FakeQuery(error=RuntimeError("boom")))
+
+        stats = executor.get_stats()
+        assert stats["failed"] == 1
+        assert stats["in_flight"] == 0
+
+
+class TestRunCounts:
+    """Test concurrent count queries"""
+
+    @pytest.mark.asyncio
+    async def test_counts_run_concurrently(self):
+        queries = {name: FakeQuery(result=SimpleNamespace(count=n), delay=0.1)
+                   for n, name in enumerate(["a", "b", "c", "d"])}
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        counts = await run_counts(queries)
+
+        assert loop.time() - start < 0.3
+        assert counts == {"a": 0, "b": 1, "c": 2, "d": 3}
+
+    @pytest.mark.asyncio
+    async def test_optional_failures_count_as_zero(self):
+        queries = {"bookings": FakeQuery(result=SimpleNamespace(count=7)),
+                   "journeys": FakeQuery(error=RuntimeError("missing table"))}
+
+        assert await run_counts(queries, optional=["journeys"]) == {"bookings": 7, "journeys": 0}
+        with pytest.raises(RuntimeError):
+            await run_counts(queries)
+
+
+def find_blocking_calls(path: Path):
+    """Zero-argument .execute() calls made directly inside async functions"""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    found = []
+
+    def visit(node, in_async):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.AsyncFunctionDef):
+                visit(child, True)
+                continue
+            if isinstance(child, (ast.FunctionDef, ast.Lambda)):
+                visit(child, False)
+                continue
+            if (in_async and isinstance(child, ast.Call)
+                    and isinstance(child.func, ast.Attribute)
+                    and child.func.attr == "execute"
+                    and not child.args and not child.keywords):
+                found.append(f"{path.relative_to(BACKEND_DIR)}:{child.lineno}")
+            visit(child, in_async)
+
+    visit(tree, False)
+    return found
+
+
+class TestNoBlockingSupabaseCalls:
+    """Lint: async code must go through supabase_async.run_query"""
+
+    def test_no_execute_in_async_functions(self):
+        offenders = []
+        for path in sorted(BACKEND_DIR.rglob("*.py")):
+            if EXCLUDED_DIRS & set(path.relative_to(BACKEND_DIR).parts):
+                continue
+            offenders.extend(find_blocking_calls(path))
+
+        assert not offenders, (
+            "Blocking Supabase .execute() inside async functions; "
+            f"use 'await run_query(query)' instead: {offenders}"
+        )
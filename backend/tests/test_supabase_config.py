@@ -0,0 +1,116 @@
+"""
+Supabase Config Snapshot Testing
+Tests single-flight refresh, incremental watermark fetches and provider lookups
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import supabase_config
+from supabase_config import SupabaseConfig
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda r: r.get(column) >= value)
+        return self
+
+    def execute(self):
+        self.db.fetches.append(self.table)
+        rows = [dict(r) for r in self.db.rows[self.table] if all(f(r) for f in self.filters)]
+        return SimpleNamespace(data=rows)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.fetches = []
+        self.rows = {
+            'environment_configs': [
+                {'environment': 'development', 'config_key': 'amadeus_base_url', 'is_active': True,
+                 'config_value': '"https://amadeus.example"', 'updated_at': '2025-01-01T00:00:00'},
+            ],
+            'environment': [
+                {'environment': 'development', 'key': 'AMADEUS_CLIENT_ID', 'value': 'id-1',
+                 'is_active': True, 'updated_at': '2025-01-01T00:00:00'},
+                {'environment': 'development', 'key': 'VIATOR_API_KEY', 'value': 'viator-1',
+                 'is_active': True, 'updated_at': '2025-01-01T00:00:00'},
+            ]
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def config(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setenv('SUPABASE_URL', 'http://localhost')
+    monkeypatch.setenv('SUPABASE_SERVICE_ROLE_KEY', 'service-key')
+    monkeypatch.setenv('ENVIRONMENT', 'development')
+    monkeypatch.setattr(supabase_config, 'get_supabase_client', lambda **kwargs: fake)
+    return SupabaseConfig(), fake
+
+
+class TestSupabaseConfigSnapshot:
+    """Test the config snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_reads_share_one_load(self, config):
+        cfg, fake = config
+
+        results = await asyncio.gather(*[cfg.get_provider_config('amadeus') for _ in range(25)])
+
+        assert sorted(fake.fetches) == ['environment', 'environment_configs']
+        assert results[0] == {'client_id': 'id-1', 'client_secret': None, 'base_url': 'https://amadeus.example'}
+        assert (await cfg.get_provider_config('viator'))['base_url'] == 'https://api.sandbox-viatorapi.com'
+
+    @pytest.mark.asyncio
+    async def test_stale_reads_do_not_wait_and_fetch_only_changes(self, config):
+        cfg, fake = config
+        await cfg.get_secret('AMADEUS_CLIENT_ID')
+        fake.rows['environment'][0].update(value='id-2', updated_at='2025-02-01T00:00:00')
+        fake.rows['environment'][1].update(is_active=False, updated_at='2025-02-01T00:00:00')
+        cfg._cache_timestamp = 0
+        fake.fetches.clear()
+
+        # Stale snapshot is served immediately while the refresh runs
+        assert await cfg.get_secret('AMADEUS_CLIENT_ID') == 'id-1'
+        await cfg.refresh()
+
+        assert await cfg.get_secret('AMADEUS_CLIENT_ID') == 'id-2'
+        assert await cfg.get_secret('VIATOR_API_KEY') is None
+        assert (await cfg.get_provider_config('amadeus'))['client_id'] == 'id-2'
+        assert cfg.get_stats()['watermarks']['environment'] == '2025-02-01T00:00:00'
+        assert cfg.get_stats()['full_reloads'] == 1
+
+    @pytest.mark.asyncio
+    async def test_reader_is_not_blocked_by_slow_refresh(self, config, monkeypatch):
+        cfg, fake = config
+        await cfg.get_config('amadeus_base_url')
+        cfg._cache_timestamp = 0
+        release = asyncio.Event()
+
+        async def slow_update(full=False):
+            await release.wait()
+
+        monkeypatch.setattr(cfg, '_update_cache', slow_update)
+
+        value = await asyncio.wait_for(cfg.get_config('amadeus_base_url'), timeout=0.5)
+        release.set()
+        await cfg.refresh()
+
+        assert value == 'https://amadeus.example'
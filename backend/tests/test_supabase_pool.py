@@ -0,0 +1,60 @@
+"""
+Supabase Client Pool Testing
+Tests client reuse, role separation and pool metrics
+"""
+
+import pytest
+import supabase_pool
+from supabase_pool import (
+    ANON, SERVICE, SupabaseNotConfigured,
+    get_pool_stats, get_supabase_client, reset_pools
+)
+
+
+@pytest.fixture
+def fake_create_client(monkeypatch):
+    """Count client construction instead of building real clients"""
+    created = []
+
+    def create_client(url, key):
+        client = object()
+        created.append((url, key, client))
+        return client
+
+    monkeypatch.setattr(supabase_pool, "create_client", create_client)
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon-key")
+    reset_pools()
+    yield created
+    reset_pools()
+
+
+class TestSupabaseClientPool:
+    """Test process-wide client reuse"""
+
+    def test_clients_are_reused(self, fake_create_client):
+        size = supabase_pool.SUPABASE_POOL_SIZE
+        clients = [get_supabase_client() for _ in range(size * 3)]
+
+        assert len(fake_create_client) == size
+        assert len(set(map(id, clients))) == size
+        stats = get_pool_stats()[SERVICE]
+        assert stats["acquisitions"] == size * 3
+        assert stats["per_client"] == [3] * size
+
+    def test_roles_use_separate_keys(self, fake_create_client):
+        get_supabase_client(SERVICE)
+        get_supabase_client(ANON)
+
+        assert {key for _, key, _ in fake_create_client} == {"service-key", "anon-key"}
+
+    def test_anon_fallback(self, fake_create_client, monkeypatch):
+        monkeypatch.delenv("SUPABASE_SERVICE_ROLE_KEY")
+
+        with pytest.raises(SupabaseNotConfigured):
+            get_supabase_client()
+
+        get_supabase_client(allow_anon=True)
+        assert fake_create_client[0][1] == "anon-key"
+        assert get_pool_stats()[SERVICE] is None
@@ -0,0 +1,79 @@
+"""
+Unified Metrics Snapshot Testing
+Tests that platform metrics are read from a snapshot and refreshes are coalesced
+"""
+
+import asyncio
+
+import pytest
+
+from unified_metrics_service import UnifiedMetricsService
+
+
+@pytest.fixture
+def service():
+    svc = UnifiedMetricsService()
+    svc.enabled = True
+    svc.computes = 0
+    svc.fail_counts = False
+
+    async def travel_fund(force_refresh=False):
+        return {"total_savers": 3, "data_source": "test"}
+
+    async def counts():
+        svc.computes += 1
+        await asyncio.sleep(0.05)
+        if svc.fail_counts:
+            raise RuntimeError("database down")
+        return {"nft": svc.computes, "bookings": 10, "journeys": 0}
+
+    svc.get_travel_fund_metrics = travel_fund
+    svc._get_platform_counts = counts
+    return svc
+
+
+class TestMetricsSnapshot:
+    """Test snapshot reads and refreshes"""
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_recompute(self, service):
+        first = await service.get_platform_metrics()
+        for _ in range(50):
+            latest = await service.get_platform_metrics()
+
+        assert service.computes == 1
+        assert latest["nft"] == first["nft"] == {"total_minted": 1}
+        assert latest["snapshot"]["compute_ms"] >= 50
+        assert latest["snapshot"]["age_seconds"] is not None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_force_refreshes_are_coalesced(self, service):
+        await service.get_platform_metrics()
+
+        results = await asyncio.gather(*[service.get_platform_metrics(force_refresh=True) for _ in range(20)])
+
+        assert service.computes == 2
+        assert {r["nft"]["total_minted"] for r in results} == {2}
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_last_snapshot(self, service):
+        await service.get_platform_metrics()
+        service.fail_counts = True
+
+        result = await service.get_platform_metrics(force_refresh=True)
+
+        assert result["nft"] == {"total_minted": 1}
+        assert result["snapshot"]["last_error"] == "database down"
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_populates_snapshot(self, service):
+        service.start_background_refresh(interval_minutes=1)
+        try:
+            for _ in range(20):
+                if service.snapshot:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            service.stop_background_refresh()
+
+        assert service.snapshot["bookings"] == {"total": 10}
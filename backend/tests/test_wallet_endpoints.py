@@ -0,0 +1,93 @@
+"""
+LAXMI Wallet Endpoint Testing
+Tests that wallet operations are single database calls and bulk deposits report per item
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import offseason_endpoints
+from offseason_endpoints import (
+    WalletBulkDepositRequest, WalletDepositRequest, WalletRedeemRequest,
+    bulk_deposit_to_wallets, redeem_from_wallet
+)
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.calls.append((self.name, self.params))
+        return SimpleNamespace(data=self.client.handlers[self.name](self.params))
+
+
+class FakeSupabase:
+    def __init__(self, **handlers):
+        self.handlers = handlers
+        self.calls = []
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+
+def bulk_handler(balances):
+    def handle(params):
+        results = []
+        for i, item in enumerate(params["items"]):
+            if item["user_id"] not in balances:
+                results.append({"index": i, "user_id": item["user_id"], "success": False,
+                                "reason": "wallet_not_found"})
+                continue
+            balances[item["user_id"]] += item["amount"]
+            results.append({"index": i, "user_id": item["user_id"], "success": True,
+                            "transaction_id": f"txn_{item['user_id']}_{i}",
+                            "new_balance": balances[item["user_id"]]})
+        return results
+    return handle
+
+
+class TestWalletEndpoints:
+    """Test wallet endpoints against the wallet RPCs"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_deposit_chunks_and_keeps_item_order(self, monkeypatch):
+        balances = {f"user_{i}": 0.0 for i in range(0, 2500, 2)}
+        fake = FakeSupabase(wallet_bulk_deposit=bulk_handler(balances))
+        monkeypatch.setattr(offseason_endpoints, "get_supabase_client", lambda **kwargs: fake)
+        deposits = [WalletDepositRequest(user_id=f"user_{i % 2500}", amount=1.5) for i in range(2600)]
+
+        response = await bulk_deposit_to_wallets(WalletBulkDepositRequest(deposits=deposits))
+
+        assert len(fake.calls) == 3
+        assert [r.index for r in response.results] == list(range(2600))
+        assert response.succeeded == 1300 and response.failed == 1300
+        assert response.results[2500].new_balance == 3.0
+        assert response.results[1].error == "wallet_not_found"
+
+    @pytest.mark.asyncio
+    async def test_bulk_deposit_limit(self, monkeypatch):
+        monkeypatch.setattr(offseason_endpoints, "WALLET_BULK_MAX", 2)
+        deposits = [WalletDepositRequest(user_id="u", amount=1) for _ in range(3)]
+
+        with pytest.raises(HTTPException) as exc:
+            await bulk_deposit_to_wallets(WalletBulkDepositRequest(deposits=deposits))
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_redeem_is_one_call_and_maps_insufficient_balance(self, monkeypatch):
+        fake = FakeSupabase(wallet_redeem=lambda params: {
+            "success": False, "reason": "insufficient_balance", "available": 12.5
+        })
+        monkeypatch.setattr(offseason_endpoints, "get_supabase_client", lambda **kwargs: fake)
+
+        with pytest.raises(HTTPException) as exc:
+            await redeem_from_wallet(WalletRedeemRequest(amount=50, booking_id="b1"), user_id="user_1")
+
+        assert exc.value.status_code == 400
+        assert "Available: 12.5" in exc.value.detail
+        assert [name for name, _ in fake.calls] == ["wallet_redeem"]
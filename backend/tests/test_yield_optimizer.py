@@ -0,0 +1,249 @@
+"""
+Yield Optimizer Testing
+Tests the scalar scoring cases, the vectorized score matrix, batch ranking
+and the optimize endpoint
+"""
+
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+import yield_optimizer
+from yield_optimizer import YieldOptimizer
+
+TAGS = ["family", "Beach", "beach", "spiritual", "pet-friendly", "concerts", "adventure", "luxury"]
+TIERS = ["bronze", "silver", "gold", "platinum", "unknown"]
+
+
+def make_campaign(idx, discount=40.0, tags=("family",), blackout=(), occupancy=None):
+    campaign = {
+        "id": f"campaign_{idx}",
+        "discount": discount,
+        "audience_tags": list(tags),
+        "blackout": list(blackout),
+        "start_date": "2025-06-01",
+        "end_date": "2025-06-30",
+        "metadata": {}
+    }
+    if occupancy is not None:
+        campaign["metadata"]["occupancy_rate"] = occupancy
+    return campaign
+
+
+def make_dream(idx, budget=2000.0, tags=("family", "beach")):
+    return {"id": f"dream_{idx}", "budget": budget, "tags": list(tags)}
+
+
+class TestScalarScore:
+    """The module's own scoring cases"""
+
+    @pytest.mark.parametrize("case", [
+        yield_optimizer.test_perfect_match,
+        yield_optimizer.test_no_match,
+        yield_optimizer.test_discount_impact,
+        yield_optimizer.test_wallet_tier_impact,
+    ])
+    def test_cases(self, case):
+        case()
+
+
+def random_rows(rng, dreams, campaigns):
+    """Random dreams and campaigns covering empty tags and zero occupancy"""
+    dream_rows = [
+        {
+            "id": f"dream_{i}",
+            "budget": rng.choice([0, 500, 1000, 1999.99, 2000, rng.uniform(100, 5000)]),
+            "tags": rng.sample(TAGS, rng.randint(0, 4))
+        }
+        for i in range(dreams)
+    ]
+    campaign_rows = []
+    for j in range(campaigns):
+        start = date(2025, 6, 1) + timedelta(days=rng.randint(0, 60))
+        end = start + timedelta(days=rng.randint(-2, 90))
+        campaign = make_campaign(
+            j,
+            discount=rng.choice([10, 33.33, 40, 65, 100, round(rng.uniform(1, 99), 2)]),
+            tags=rng.sample(TAGS, rng.randint(0, 3)),
+            blackout=[str(start)] * rng.randint(0, 40),
+            occupancy=rng.choice([None, 0, 15, 20, 39.9, 40, 59, 60, 85])
+        )
+        campaign["start_date"], campaign["end_date"] = str(start), str(end)
+        campaign_rows.append(campaign)
+    return dream_rows, campaign_rows
+
+
+def scalar_result(dream, campaign, tier):
+    return YieldOptimizer.calculate_score(
+        dream_tags=dream["tags"],
+        dream_budget=float(dream["budget"]),
+        campaign_discount=float(campaign["discount"]),
+        campaign_price=YieldOptimizer.deal_price(dream, campaign),
+        campaign_tags=campaign["audience_tags"],
+        wallet_tier=tier,
+        blackout_dates=campaign["blackout"],
+        campaign_start=date.fromisoformat(campaign["start_date"]),
+        campaign_end=date.fromisoformat(campaign["end_date"]),
+        occupancy_rate=campaign["metadata"].get("occupancy_rate")
+    )
+
+
+class TestScoreMatrix:
+    """Vectorized scores must equal calculate_score exactly"""
+
+    def test_matches_scalar_for_every_pair(self):
+        rng = random.Random(7)
+        dreams, campaigns = random_rows(rng, 60, 40)
+        tiers = [rng.choice(TIERS) for _ in dreams]
+
+        scores = YieldOptimizer.score_matrix(dreams, campaigns, tiers, chunk_size=16)
+
+        assert scores.shape == (60, 40)
+        for i, dream in enumerate(dreams):
+            for j, campaign in enumerate(campaigns):
+                assert scores.result(i, j) == scalar_result(dream, campaign, tiers[i]), (i, j)
+
+    def test_wide_tag_vocabulary(self):
+        """Vocabularies beyond one 64-bit word still count overlap exactly"""
+        vocab = [f"tag_{i}" for i in range(150)]
+        dreams = [{"id": "d", "budget": 1000, "tags": vocab[60:140]}]
+        campaigns = [make_campaign(0, tags=vocab[:70]), make_campaign(1, tags=vocab[130:])]
+
+        scores = YieldOptimizer.score_matrix(dreams, campaigns)
+
+        for j, campaign in enumerate(campaigns):
+            assert scores.result(0, j) == scalar_result(dreams[0], campaign, "bronze")
+
+    def test_top_k_ties_keep_campaign_order(self):
+        campaigns = [make_campaign(i, discount=d) for i, d in enumerate([40, 65, 40, 65, 10])]
+        scores = YieldOptimizer.score_matrix([make_dream(0)], campaigns)
+
+        assert scores.top_k(3).tolist() == [[1, 3, 0]]
+        assert scores.top_k(10).tolist() == [[1, 3, 0, 2, 4]]
+
+
+class TestRankCampaigns:
+    """Test scoring every dream against every campaign"""
+
+    def test_matches_scalar_score(self):
+        dream = make_dream(1)
+        campaign = make_campaign(1, discount=30, tags=("beach",), blackout=["2025-06-02"], occupancy=15)
+
+        match = YieldOptimizer.rank_campaigns([dream], [campaign], "gold")["dream_1"][0]
+
+        expected = YieldOptimizer.calculate_score(
+            dream_tags=dream["tags"],
+            dream_budget=2000.0,
+            campaign_discount=30,
+            campaign_price=1400.0,
+            campaign_tags=["beach"],
+            wallet_tier="gold",
+            blackout_dates=["2025-06-02"],
+            campaign_start=date(2025, 6, 1),
+            campaign_end=date(2025, 6, 30),
+            occupancy_rate=15
+        )
+        assert match["total_score"] == expected["total_score"]
+        assert match["breakdown"] == expected["breakdown"]
+        assert match["price"] == pytest.approx(1400.0)
+
+    def test_keeps_top_k_per_dream(self):
+        campaigns = [make_campaign(i, discount=10 + i * 5) for i in range(10)]
+        dreams = [make_dream(i) for i in range(3)]
+
+        ranked = YieldOptimizer.rank_campaigns(dreams, campaigns, top_k=3)
+
+        assert set(ranked) == {"dream_0", "dream_1", "dream_2"}
+        for matches in ranked.values():
+            scores = [m["total_score"] for m in matches]
+            assert len(matches) == 3
+            assert scores == sorted(scores, reverse=True)
+
+
+class FakeQuery:
+    """Chainable stand-in for a Supabase query builder"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.payload = None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def insert(self, payload):
+        self.payload = payload
+        return self
+
+    def execute(self):
+        if self.payload is not None:
+            self.client.inserts.append((self.table, self.payload))
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            return SimpleNamespace(data=[{**row, "id": f"deal_{i}"} for i, row in enumerate(rows)])
+        return SimpleNamespace(data=self.client.rows.get(self.table, []))
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.inserts = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class TestOptimizeYieldEndpoint:
+    """Test the optimize endpoint writes one bulk insert"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_insert_of_top_k(self, monkeypatch):
+        import offseason_endpoints
+        fake = FakeSupabase({
+            "dream_intents": [make_dream(i) for i in range(4)],
+            "offseason_campaigns": [make_campaign(i, discount=10 + i * 5) for i in range(8)],
+            "wallet_accounts": [{"tier": "silver"}]
+        })
+        monkeypatch.setattr(offseason_endpoints, "get_supabase_client", lambda **kwargs: fake)
+
+        response = await offseason_endpoints.optimize_yield("user_1", top_k=2)
+
+        assert len(fake.inserts) == 1
+        table, rows = fake.inserts[0]
+        assert table == "deal_candidates"
+        assert len(rows) == 4 * 2
+        assert response.total_deals_found == 8
+        assert len(response.optimized_deals) == 5
+        assert set(response.stage_timings_ms) == {"fetch", "score", "insert", "total"}
+
+    @pytest.mark.asyncio
+    async def test_match_index_path_inserts_the_same_deals_as_full_scan(self, monkeypatch):
+        import offseason_endpoints
+        from dream_match_index import DreamMatchIndex
+        rng = random.Random(9)
+        end_date = (date.today() + timedelta(days=30)).isoformat()
+        campaigns = [
+            dict(make_campaign(f"{i:02d}", discount=round(rng.uniform(5, 60), 2),
+                               tags=rng.sample(TAGS, rng.randint(0, 2)), occupancy=rng.choice([10, 30, 50, 70])),
+                 status="active", end_date=end_date)
+            for i in range(30)
+        ]
+        dreams = [dict(make_dream(i, tags=rng.sample(TAGS, rng.randint(0, 2))), user_id="user_1", status="active")
+                  for i in range(6)]
+        fake = FakeSupabase({
+            "dream_intents": dreams,
+            "offseason_campaigns": campaigns,
+            "wallet_accounts": [{"tier": "gold"}]
+        })
+        monkeypatch.setattr(offseason_endpoints, "get_supabase_client", lambda **kwargs: fake)
+        index = DreamMatchIndex(candidates_per_dream=5)
+        monkeypatch.setattr(offseason_endpoints, "dream_match_index", index)
+
+        await offseason_endpoints.optimize_yield("user_1", top_k=5)
+        index.build(campaigns, dreams)
+        index.ready = True
+        await offseason_endpoints.optimize_yield("user_1", top_k=5)
+
+        full_scan, indexed = ([(r["dream_id"], r["campaign_id"], r["score"]) for r in rows]
+                              for _, rows in fake.inserts)
+        assert indexed == full_scan
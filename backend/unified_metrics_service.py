@@ -1,19 +1,24 @@
 """
 Unified Metrics Service - Single Source of Truth
 All platform metrics served from this service
-Updates daily, ensures consistency across all pages
+Platform metrics are a snapshot refreshed in the background, so requests
+never compute them inline
 """
 
-import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional
+import os
+import time
+import asyncio
 import logging
-from supabase import create_client, Client
+from supabase import Client
+from supabase_async import count_query, run_counts, run_query
+from supabase_pool import SERVICE, get_supabase_client, is_configured
+from fx_rate_service import fx_rates
 
 logger = logging.getLogger(__name__)
 
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+METRICS_REFRESH_MINUTES = float(os.getenv('METRICS_REFRESH_MINUTES', '5'))
 
 class UnifiedMetricsService:
     """Centralized metrics for platform-wide consistency"""
@@ -22,9 +27,17 @@ class UnifiedMetricsService:
         self.metrics_cache = {}
         self.last_updated = None
         self.cache_ttl_minutes = 60  # 1 hour cache
+        # Platform metrics snapshot
+        self.snapshot: Optional[Dict] = None
+        self.snapshot_at: Optional[datetime] = None
+        self.compute_ms: Optional[float] = None
+        self.refresh_count = 0
+        self.last_error: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
         
-        if SUPABASE_URL and SUPABASE_SERVICE_KEY:
-            self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        if is_configured(SERVICE):
+            self.supabase: Client = get_supabase_client()
             self.enabled = True
             logger.info("✅ Unified Metrics Service initialized with Supabase")
         else:
@@ -39,21 +52,9 @@ class UnifiedMetricsService:
         age_minutes = (datetime.utcnow() - self.last_updated).total_seconds() / 60
         return age_minutes < self.cache_ttl_minutes
     
-    async def _get_aud_exchange_rate(self) -> float:
-        """Get live USD to AUD exchange rate"""
-        try:
-            # Use a free exchange rate API
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.exchangerate.host/latest?base=USD&symbols=AUD",
-                    timeout=5.0
-                )
-                data = response.json()
-                return data['rates']['AUD']
-        except Exception as e:
-            logger.warning(f"Failed to fetch live AUD rate: {e}, using fallback")
-            return 1.52  # Fallback approximate rate
+    def _get_aud_exchange_rate(self) -> float:
+        """USD to AUD rate from the in-memory FX table (no network call)"""
+        return fx_rates.get_rate('USD', 'AUD')
     
     async def get_travel_fund_metrics(self, force_refresh: bool = False) -> Dict:
         """
@@ -84,26 +85,26 @@ class UnifiedMetricsService:
             # Note: Adjust table/column names to match your schema
             
             # Get total funds (sum of all fund targets)
-            funds_response = self.supabase.table('travel_funds') \
-                .select('target_amount, currency, status, user_id, created_at') \
-                .execute()
+            funds_response = await run_query(
+                self.supabase.table('travel_funds')
+                .select('target_amount, currency, status, user_id, created_at')
+            )
             
             if not funds_response.data:
                 return self._get_placeholder_travel_fund_metrics()
             
-            # Calculate totals
-            total_amount_usd = 0
+            # Calculate totals (all fund targets converted to USD in one step)
+            funds = funds_response.data
+            total_amount_usd = float(fx_rates.convert_many(
+                [fund.get('target_amount') or 0 for fund in funds],
+                [fund.get('currency') if fx_rates.supports(fund.get('currency') or '') else 'USD' for fund in funds],
+                'USD'
+            ).sum())
             unique_users = set()
             group_funds = 0
             completed_funds = 0
             
-            for fund in funds_response.data:
-                amount = fund.get('target_amount', 0)
-                # Convert to USD if needed
-                if fund.get('currency') == 'AUD':
-                    amount = amount / 1.52  # Approximate conversion
-                
-                total_amount_usd += amount
+            for fund in funds:
                 unique_users.add(fund.get('user_id'))
                 
                 if fund.get('is_group_fund', False):
@@ -115,7 +116,7 @@ class UnifiedMetricsService:
             total_savers = len(unique_users)
             
             # Get AUD rate
-            aud_rate = await self._get_aud_exchange_rate()
+            aud_rate = self._get_aud_exchange_rate()
             total_amount_aud = total_amount_usd * aud_rate
             
             # Calculate averages
@@ -166,7 +167,7 @@ class UnifiedMetricsService:
             "currency_primary": "USD",
             "total_amount_usd": 0,
             "total_amount_aud": 0,
-            "aud_exchange_rate": 1.52,
+            "aud_exchange_rate": round(self._get_aud_exchange_rate(), 4),
             "total_savers": 0,
             "total_groups": 0,
             "avg_fund_size_usd": 0,
@@ -181,55 +182,104 @@ class UnifiedMetricsService:
         """
         Get all platform metrics for admin dashboard
         Includes: Travel Fund, NFT, Bookings, Smart Dreams
+        
+        Served from the latest snapshot; only the very first call (or
+        force_refresh) waits for a refresh, which concurrent callers share.
         """
+        if force_refresh or self.snapshot is None:
+            await self.refresh()
         
-        travel_fund = await self.get_travel_fund_metrics(force_refresh)
+        return {
+            **self.snapshot,
+            "snapshot": self.get_snapshot_info()
+        }
+    
+    def get_snapshot_info(self) -> Dict:
+        """Snapshot freshness and cost"""
+        return {
+            "computed_at": self.snapshot_at.isoformat() if self.snapshot_at else None,
+            "age_seconds": round((datetime.utcnow() - self.snapshot_at).total_seconds(), 1) if self.snapshot_at else None,
+            "compute_ms": self.compute_ms,
+            "refreshes": self.refresh_count,
+            "last_error": self.last_error
+        }
+    
+    async def refresh(self) -> Dict:
+        """Recompute the snapshot; calls made while a refresh runs join it"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._compute_snapshot())
+        return await asyncio.shield(self._refresh_task)
+    
+    async def _compute_snapshot(self) -> Dict:
+        started = time.perf_counter()
         
         if not self.enabled:
-            return {
-                "travel_fund": travel_fund,
-                "nft": {"total_minted": 0},
-                "bookings": {"total": 0},
-                "smart_dreams": {"total_journeys": 0}
-            }
+            travel_fund, counts = await self.get_travel_fund_metrics(force_refresh=True), None
+        else:
+            travel_fund, counts = await asyncio.gather(
+                self.get_travel_fund_metrics(force_refresh=True),
+                self._get_platform_counts(),
+                return_exceptions=True
+            )
         
-        try:
-            # NFT metrics
-            nft_response = self.supabase.table('nft_memberships').select('tier', count='exact').execute()
-            total_nft = nft_response.count or 0
-            
-            # Bookings
-            bookings_response = self.supabase.table('bookings').select('id', count='exact').execute()
-            total_bookings = bookings_response.count or 0
-            
+        # Travel fund falls back to placeholders itself; counts may raise
+        if isinstance(counts, BaseException):
+            logger.error(f"Failed to fetch platform metrics: {counts}")
+            self.last_error = str(counts)
+            if self.snapshot is not None:
+                # Keep serving the last good snapshot
+                return self.snapshot
+            counts = None
+        else:
+            self.last_error = None
+        
+        counts = counts or {'nft': 0, 'bookings': 0, 'journeys': 0}
+        self.snapshot = {
+            "travel_fund": travel_fund,
+            "nft": {
+                "total_minted": counts['nft'],
+            },
+            "bookings": {
+                "total": counts['bookings'],
+            },
+            "smart_dreams": {
+                "total_journeys": counts['journeys'],
+            },
+            "last_updated": datetime.utcnow().isoformat()
+        }
+        self.snapshot_at = datetime.utcnow()
+        self.compute_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.refresh_count += 1
+        return self.snapshot
+    
+    async def _get_platform_counts(self) -> Dict[str, int]:
+        """NFT, booking and journey counts (head-only, concurrent)"""
+        return await run_counts({
+            'nft': count_query(self.supabase, 'nft_memberships'),
+            'bookings': count_query(self.supabase, 'bookings'),
             # Smart Dreams journeys (if table exists)
+            'journeys': count_query(self.supabase, 'smart_dreams_journeys')
+        }, optional=['journeys'])
+    
+    async def _refresh_loop(self, interval_seconds: float):
+        while True:
             try:
-                journeys_response = self.supabase.table('smart_dreams_journeys').select('id', count='exact').execute()
-                total_journeys = journeys_response.count or 0
-            except:
-                total_journeys = 0
-            
-            return {
-                "travel_fund": travel_fund,
-                "nft": {
-                    "total_minted": total_nft,
-                },
-                "bookings": {
-                    "total": total_bookings,
-                },
-                "smart_dreams": {
-                    "total_journeys": total_journeys,
-                },
-                "last_updated": datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            logger.error(f"Failed to fetch platform metrics: {e}")
-            return {
-                "travel_fund": travel_fund,
-                "nft": {"total_minted": 0},
-                "bookings": {"total": 0},
-                "smart_dreams": {"total_journeys": 0}
-            }
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Platform metrics refresh failed: {e}")
+            await asyncio.sleep(interval_seconds)
+    
+    def start_background_refresh(self, interval_minutes: float = METRICS_REFRESH_MINUTES):
+        """Start periodic snapshot refresh on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_event_loop().create_task(self._refresh_loop(interval_minutes * 60))
+        logger.info(f"🚀 Platform metrics refresh started (every {interval_minutes} minutes)")
+    
+    def stop_background_refresh(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
 
 # Singleton instance
 unified_metrics = UnifiedMetricsService()
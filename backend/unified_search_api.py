@@ -9,8 +9,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, date, timedelta
 from providers.universal_provider_manager import universal_provider_manager
 from providers.base_provider import SearchRequest
-from supabase import create_client
-import os
+from supabase_async import run_query
+from supabase_pool import get_supabase_client
+from provider_registry_cache import provider_registry_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,14 +19,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/search", tags=["Unified Search"])
 
 
-def get_supabase_client():
-    """Get Supabase client"""
-    return create_client(
-        os.getenv('SUPABASE_URL'),
-        os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-    )
-
-
 class UnifiedSearchRequest(BaseModel):
     """Unified search request model"""
     search_type: str  # 'hotel', 'flight', 'activity'
@@ -96,13 +89,10 @@ async def unified_search(search_request: UnifiedSearchRequest):
                 try:
                     # Get provider ID
                     provider_name = log_entry.get('provider')
-                    provider_result = supabase.table('provider_registry')\
-                        .select('id')\
-                        .eq('provider_name', provider_name)\
-                        .execute()
+                    provider = await provider_registry_cache.get_by_name(provider_name)
                     
-                    if provider_result.data:
-                        provider_id = provider_result.data[0]['id']
+                    if provider:
+                        provider_id = provider['id']
                         
                         # Insert rotation log
                         import uuid
@@ -120,7 +110,7 @@ async def unified_search(search_request: UnifiedSearchRequest):
                             'result_count': log_entry.get('results_count', 0)
                         }
                         
-                        supabase.table('provider_rotation_logs').insert(rotation_log_data).execute()
+                        await run_query(supabase.table('provider_rotation_logs').insert(rotation_log_data))
                         
                 except Exception as e:
                     logger.warning(f"Failed to log rotation for {provider_name}: {e}")
@@ -3,9 +3,12 @@ Yield Optimizer v1 - Full Scoring Algorithm
 Implements 5-factor scoring system for matching dreams with campaigns
 """
 
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import Any, List, Dict, Sequence, Tuple, Union
 from datetime import datetime, date
 
+import numpy as np
+
 class YieldOptimizer:
     """
     Off-Season Yield Optimizer with 5-factor scoring
@@ -191,6 +194,297 @@ class YieldOptimizer:
             }
         }
 
+    
+    @staticmethod
+    def _as_date(value: Any) -> date:
+        """Campaign dates arrive as ISO strings from Supabase"""
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
+    
+    @classmethod
+    def deal_price(cls, dream: Dict, campaign: Dict) -> float:
+        """Dream budget after the campaign discount"""
+        return float(dream['budget']) * (1 - float(campaign['discount']) / 100)
+    
+    # ------------------------------------------------------------------
+    # Batch scoring
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def score_matrix(cls,
+                     dreams: Sequence[Dict],
+                     campaigns: Sequence[Dict],
+                     wallet_tiers: Union[str, Sequence[str]] = 'bronze',
+                     chunk_size: int = 1024) -> "ScoreMatrix":
+        """
+        Score every dream against every campaign in vectorized form
+        
+        Gives exactly the totals and breakdowns calculate_score returns for
+        each pair. Tag overlap is a popcount over packed uint64 tag bitsets;
+        budget fit, discount, seasonality, tier and blackout terms are array
+        expressions evaluated in the same operation order as the scalar code.
+        
+        Args:
+            dreams: dream_intents rows (tags, budget)
+            campaigns: offseason_campaigns rows (discount, audience_tags,
+                blackout, start_date, end_date and metadata.occupancy_rate)
+            wallet_tiers: One tier for all dreams, or one per dream
+            chunk_size: Dreams scored per block (bounds temporary memory)
+        
+        Returns:
+            ScoreMatrix with dreams as rows and campaigns as columns
+        """
+        n, m = len(dreams), len(campaigns)
+        
+        # Campaign-side factors (one value per campaign)
+        occupancy = np.array(
+            [(c.get('metadata') or {}).get('occupancy_rate') or 50 for c in campaigns], dtype=np.float64
+        )
+        seasonality = np.select(
+            [occupancy < 20, occupancy < 40, occupancy < 60],
+            [30.0, 20.0, 10.0], default=0.0
+        )
+        discounts = np.array([float(c['discount']) for c in campaigns], dtype=np.float64)
+        discount = (discounts / 100) * cls.DISCOUNT_WEIGHT
+        blackout = cls._blackout_penalties(campaigns)
+        
+        # Dream-side factors (one value per dream)
+        budgets = np.array([float(d['budget']) for d in dreams], dtype=np.float64)
+        if isinstance(wallet_tiers, str):
+            wallet_tiers = [wallet_tiers] * n
+        wallet = np.array([cls.calculate_wallet_tier_score(t) for t in wallet_tiers], dtype=np.float64)
+        
+        # Tag bitsets over a shared lowercased vocabulary
+        dream_tags = [d.get('tags') or [] for d in dreams]
+        campaign_tags = [c.get('audience_tags') or [] for c in campaigns]
+        vocab: Dict[str, int] = {}
+        dream_bits, dream_sizes = _tag_bitsets(dream_tags, vocab)
+        campaign_bits, _ = _tag_bitsets(campaign_tags, vocab)
+        words = max(1, (len(vocab) + 63) // 64)
+        dream_bits = _pad_words(dream_bits, words)
+        campaign_bits = _pad_words(campaign_bits, words)
+        dream_has_tags = np.array([bool(t) for t in dream_tags])
+        campaign_has_tags = np.array([bool(t) for t in campaign_tags])
+        
+        base = seasonality + discount
+        total = np.empty((n, m), dtype=np.float64)
+        dream_match = np.empty((n, m), dtype=np.float64)
+        
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            rows = slice(lo, hi)
+            
+            # Tag overlap score (0-20 points)
+            overlap = np.bitwise_count(
+                dream_bits[rows, None, :] & campaign_bits[None, :, :]
+            ).sum(axis=2, dtype=np.int64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tag_score = (overlap / dream_sizes[rows, None]) * 20
+            tag_score[~(dream_has_tags[rows, None] & campaign_has_tags[None, :])] = 0.0
+            
+            # Budget fit score (0-15 points)
+            budget = budgets[rows, None]
+            prices = budget * (1 - discounts[None, :] / 100)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_ratio = prices / budget
+                budget_fit = np.where(
+                    price_ratio <= 1.0,
+                    1 - np.abs(1 - price_ratio),
+                    np.maximum(0, 1 - (price_ratio - 1))
+                )
+            budget_score = budget_fit * 15
+            budget_score[np.broadcast_to(budget == 0, budget_score.shape)] = 0.0
+            
+            match = tag_score + budget_score
+            block = ((base[None, :] + match) + wallet[rows, None]) - blackout[None, :]
+            total[rows] = _round2(np.maximum(0, np.minimum(block, 100)))
+            dream_match[rows] = _round2(match)
+        
+        return ScoreMatrix(
+            total=total,
+            dream_match=dream_match,
+            seasonality=_round2(seasonality),
+            discount=_round2(discount),
+            wallet_tier=_round2(wallet),
+            blackout=_round2(blackout),
+            budgets=budgets,
+            discounts=discounts
+        )
+    
+    @classmethod
+    def _blackout_penalties(cls, campaigns: Sequence[Dict]) -> np.ndarray:
+        """Vectorized calculate_blackout_penalty over campaigns"""
+        if not campaigns:
+            return np.zeros(0)
+        counts = np.array([len(c.get('blackout') or []) for c in campaigns], dtype=np.float64)
+        starts = np.array([cls._as_date(c['start_date']) for c in campaigns], dtype='datetime64[D]')
+        ends = np.array([cls._as_date(c['end_date']) for c in campaigns], dtype='datetime64[D]')
+        total_days = (ends - starts).astype(np.int64) + 1
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            penalty = np.minimum((counts / total_days) * cls.BLACKOUT_PENALTY_MAX, cls.BLACKOUT_PENALTY_MAX)
+        return np.where((counts == 0) | (total_days <= 0), 0.0, penalty)
+    
+    @classmethod
+    def rank_campaigns(cls,
+                       dreams: List[Dict],
+                       campaigns: List[Dict],
+                       wallet_tier: str = 'bronze',
+                       top_k: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Score every dream against every campaign, keeping the best top_k per dream
+        
+        Args:
+            dreams: dream_intents rows (id, tags, budget)
+            campaigns: offseason_campaigns rows (see score_matrix)
+            wallet_tier: Owner's wallet tier
+            top_k: Matches kept per dream
+        
+        Returns:
+            {dream_id: [{'campaign', 'price', 'total_score', 'breakdown'}, ...]}
+            best first; ties keep campaign order
+        """
+        if not dreams or not campaigns:
+            return {dream['id']: [] for dream in dreams}
+        
+        scores = cls.score_matrix(dreams, campaigns, wallet_tier)
+        best = scores.top_k(top_k)
+        
+        return {
+            dream['id']: [
+                {
+                    'campaign': campaigns[j],
+                    'price': scores.price(i, j),
+                    'total_score': float(scores.total[i, j]),
+                    'breakdown': scores.breakdown(i, j)
+                }
+                for j in best[i].tolist()
+            ]
+            for i, dream in enumerate(dreams)
+        }
+
+
+@dataclass
+class ScoreMatrix:
+    """
+    Dream x campaign yield scores from YieldOptimizer.score_matrix
+    
+    total and dream_match are (dreams, campaigns); the other factors depend
+    on one side only and are stored as vectors. All values are rounded the
+    way calculate_score rounds them.
+    """
+    total: np.ndarray
+    dream_match: np.ndarray
+    seasonality: np.ndarray
+    discount: np.ndarray
+    wallet_tier: np.ndarray
+    blackout: np.ndarray
+    budgets: np.ndarray
+    discounts: np.ndarray
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.total.shape
+    
+    def price(self, i: int, j: int) -> float:
+        """Deal price for one pair (see YieldOptimizer.deal_price)"""
+        return float(self.budgets[i] * (1 - self.discounts[j] / 100))
+    
+    def breakdown(self, i: int, j: int) -> Dict[str, float]:
+        return {
+            'seasonality_score': float(self.seasonality[j]),
+            'discount_score': float(self.discount[j]),
+            'dream_match_score': float(self.dream_match[i, j]),
+            'wallet_tier_score': float(self.wallet_tier[i]),
+            'blackout_penalty': float(self.blackout[j])
+        }
+    
+    def result(self, i: int, j: int) -> Dict:
+        """Same shape as YieldOptimizer.calculate_score"""
+        return {'total_score': float(self.total[i, j]), 'breakdown': self.breakdown(i, j)}
+    
+    def top_k(self, k: int) -> np.ndarray:
+        """
+        Campaign indices of the k best scores per dream, best first
+        
+        Ties keep campaign order. Scores have two decimals, so each one maps
+        to a unique integer key with the column index as tie-breaker, which
+        lets argpartition select without a full per-row sort.
+        """
+        n, m = self.shape
+        k = min(k, m)
+        if k == 0:
+            return np.empty((n, 0), dtype=np.int64)
+        
+        keys = (10000 - np.rint(self.total * 100).astype(np.int64)) * m + np.arange(m)
+        if k < m:
+            selected = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        else:
+            selected = np.broadcast_to(np.arange(m), (n, m))
+        order = np.argsort(np.take_along_axis(keys, selected, axis=1), axis=1)
+        return np.take_along_axis(selected, order, axis=1)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals exactly as Python's round() does
+    
+    np.round scales by 100 before rounding, which can put a value sitting
+    within float noise of a .xx5 tie on the wrong side. For those values the
+    exact product 100 * x is recovered as p + err (Dekker's two-product;
+    100 needs no splitting) and compared with the tie exactly, with exact
+    ties going to the even neighbour like round().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    floor = np.floor(scaled)
+    near_tie = np.abs(scaled - floor - 0.5) < 1e-6
+    if near_tie.any():
+        x, p, n = values[near_tie], scaled[near_tie], floor[near_tie]
+        split = x * 134217729.0  # 2**27 + 1
+        hi = split - (split - x)
+        lo = x - hi
+        err = (hi * 100 - p) + lo * 100
+        diff = (p - (n + 0.5)) + err
+        up = (diff > 0) | ((diff == 0) & (n % 2 == 1))
+        rounded[near_tie] = (n + up) / 100
+    return rounded
+
+
+def _tag_bitsets(tag_lists: Sequence[Sequence[str]], vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack each row's lowercased tag set into uint64 words
+    
+    New tags are added to vocab. Returns (bits, distinct tag count per row).
+    """
+    rows, columns = [], []
+    sizes = np.zeros(len(tag_lists), dtype=np.float64)
+    for row, tags in enumerate(tag_lists):
+        tag_set = {tag.lower() for tag in tags}
+        sizes[row] = len(tag_set)
+        for tag in tag_set:
+            rows.append(row)
+            columns.append(vocab.setdefault(tag, len(vocab)))
+    
+    words = max(1, (len(vocab) + 63) // 64)
+    bits = np.zeros((len(tag_lists), words), dtype=np.uint64)
+    if rows:
+        columns = np.array(columns, dtype=np.uint64)
+        np.bitwise_or.at(
+            bits,
+            (np.array(rows), (columns >> np.uint64(6)).astype(np.intp)),
+            np.uint64(1) << (columns & np.uint64(63))
+        )
+    return bits, sizes
+
+
+def _pad_words(bits: np.ndarray, words: int) -> np.ndarray:
+    """Widen a bitset array to the final vocabulary size"""
+    if bits.shape[1] == words:
+        return bits
+    return np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
 
 # Unit tests
 def test_perfect_match():
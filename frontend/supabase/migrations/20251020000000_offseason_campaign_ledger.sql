@@ -0,0 +1,189 @@
+-- ============================================================================
+-- MAKU.TRAVEL OFF-SEASON OCCUPANCY ENGINE
+-- Materialized campaign daily-allocation ledger
+-- ============================================================================
+-- One row per campaign per day with that day's capacity and the rooms
+-- actually allocated. Rows are created with the campaign (trigger), kept in
+-- step when its window/allocation/blackout changes, and incremented
+-- atomically when a deal is accepted, so reading a ledger is one range scan.
+-- Lowering max_allocation below rooms already sold on a day leaves that day
+-- sold out (capacity = allocated) instead of rejecting the campaign update.
+-- ============================================================================
+
+-- ============================================================================
+-- PART 1: LEDGER TABLE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS public.offseason_campaign_ledger (
+    campaign_id UUID NOT NULL REFERENCES public.offseason_campaigns(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+
+    -- Rooms offered that day (0 on blackout dates) and rooms taken
+    capacity INTEGER NOT NULL CHECK (capacity >= 0),
+    allocated INTEGER NOT NULL DEFAULT 0 CHECK (allocated >= 0),
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    is_blackout BOOLEAN NOT NULL DEFAULT false,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (campaign_id, day),
+    CONSTRAINT ledger_not_overbooked CHECK (allocated <= capacity OR is_blackout)
+);
+
+-- Partner digests read "today" across all campaigns
+CREATE INDEX IF NOT EXISTS idx_offseason_campaign_ledger_day
+ON public.offseason_campaign_ledger(day);
+
+-- ============================================================================
+-- PART 2: KEEP LEDGER IN STEP WITH CAMPAIGNS
+-- ============================================================================
+CREATE OR REPLACE FUNCTION public.sync_offseason_campaign_ledger(campaign_uuid UUID)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO public.offseason_campaign_ledger (campaign_id, day, capacity, is_blackout)
+    SELECT
+        oc.id,
+        d::date,
+        CASE WHEN oc.blackout ? to_char(d, 'YYYY-MM-DD') THEN 0 ELSE oc.max_allocation END,
+        oc.blackout ? to_char(d, 'YYYY-MM-DD')
+    FROM public.offseason_campaigns oc,
+         generate_series(oc.start_date, oc.end_date, INTERVAL '1 day') AS d
+    WHERE oc.id = campaign_uuid
+    ON CONFLICT (campaign_id, day) DO UPDATE
+    SET capacity = CASE
+            WHEN EXCLUDED.is_blackout THEN 0
+            ELSE GREATEST(EXCLUDED.capacity, offseason_campaign_ledger.allocated)
+        END,
+        is_blackout = EXCLUDED.is_blackout,
+        updated_at = NOW();
+
+    -- Days that left the window are dropped unless rooms were already sold
+    DELETE FROM public.offseason_campaign_ledger l
+    USING public.offseason_campaigns oc
+    WHERE l.campaign_id = campaign_uuid
+      AND oc.id = campaign_uuid
+      AND (l.day < oc.start_date OR l.day > oc.end_date)
+      AND l.allocated = 0;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.trigger_sync_offseason_campaign_ledger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM public.sync_offseason_campaign_ledger(NEW.id);
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER trigger_offseason_campaign_ledger_insert
+    AFTER INSERT ON public.offseason_campaigns
+    FOR EACH ROW
+    EXECUTE FUNCTION public.trigger_sync_offseason_campaign_ledger();
+
+CREATE TRIGGER trigger_offseason_campaign_ledger_update
+    AFTER UPDATE OF start_date, end_date, max_allocation, blackout ON public.offseason_campaigns
+    FOR EACH ROW
+    EXECUTE FUNCTION public.trigger_sync_offseason_campaign_ledger();
+
+-- Backfill campaigns created before this migration
+SELECT public.sync_offseason_campaign_ledger(id) FROM public.offseason_campaigns;
+
+-- ============================================================================
+-- PART 3: ACCEPT A DEAL (ATOMIC LEDGER INCREMENT)
+-- ============================================================================
+-- The conditional UPDATE only succeeds while the day still has capacity, so
+-- concurrent accepts can never push a day past its allocation.
+CREATE OR REPLACE FUNCTION public.accept_offseason_deal(deal_uuid UUID, stay_day DATE DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    deal RECORD;
+    target_day DATE;
+    ledger_row RECORD;
+BEGIN
+    SELECT * INTO deal
+    FROM public.deal_candidates
+    WHERE id = deal_uuid
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('accepted', false, 'reason', 'not_found');
+    END IF;
+    IF deal.status NOT IN ('pending', 'presented') OR deal.expires_at <= NOW() THEN
+        RETURN jsonb_build_object('accepted', false, 'reason', 'not_available');
+    END IF;
+
+    target_day := COALESCE(stay_day, (deal.metadata->>'stay_date')::date);
+
+    IF target_day IS NULL THEN
+        -- Flexible deal: take the first open day from today on
+        UPDATE public.offseason_campaign_ledger l
+        SET allocated = l.allocated + 1, revenue = l.revenue + deal.price, updated_at = NOW()
+        WHERE (l.campaign_id, l.day) = (
+            SELECT campaign_id, day FROM public.offseason_campaign_ledger
+            WHERE campaign_id = deal.campaign_id
+              AND day >= CURRENT_DATE
+              AND allocated < capacity
+            ORDER BY day
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        AND l.allocated < l.capacity
+        RETURNING l.day, l.capacity - l.allocated AS remaining INTO ledger_row;
+    ELSE
+        UPDATE public.offseason_campaign_ledger l
+        SET allocated = l.allocated + 1, revenue = l.revenue + deal.price, updated_at = NOW()
+        WHERE l.campaign_id = deal.campaign_id
+          AND l.day = target_day
+          AND l.allocated < l.capacity
+        RETURNING l.day, l.capacity - l.allocated AS remaining INTO ledger_row;
+    END IF;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('accepted', false, 'reason', 'sold_out', 'campaign_id', deal.campaign_id);
+    END IF;
+
+    UPDATE public.deal_candidates
+    SET status = 'accepted',
+        metadata = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object('stay_date', ledger_row.day)
+    WHERE id = deal_uuid;
+
+    UPDATE public.offseason_campaigns
+    SET current_allocation = current_allocation + 1
+    WHERE id = deal.campaign_id;
+
+    RETURN jsonb_build_object(
+        'accepted', true,
+        'campaign_id', deal.campaign_id,
+        'stay_date', ledger_row.day,
+        'remaining', ledger_row.remaining
+    );
+END;
+$$;
+
+-- ============================================================================
+-- PART 4: ROW LEVEL SECURITY
+-- ============================================================================
+ALTER TABLE public.offseason_campaign_ledger ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Public can view ledgers of active campaigns"
+ON public.offseason_campaign_ledger
+FOR SELECT
+USING (
+    EXISTS (
+        SELECT 1 FROM public.offseason_campaigns oc
+        WHERE oc.id = offseason_campaign_ledger.campaign_id
+        AND oc.status = 'active'
+    )
+);
+
+CREATE POLICY "Service role can manage all ledgers"
+ON public.offseason_campaign_ledger
+FOR ALL
+USING (auth.role() = 'service_role');
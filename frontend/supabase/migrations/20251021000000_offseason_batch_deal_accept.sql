@@ -0,0 +1,120 @@
+-- ============================================================================
+-- MAKU.TRAVEL OFF-SEASON OCCUPANCY ENGINE
+-- Batched deal acceptance against the campaign ledger
+-- ============================================================================
+-- accept_offseason_deal() takes one ledger row lock per accepted deal, so a
+-- flash promotion serializes every request on the same campaign day. The
+-- backend coalesces concurrent accepts and sends them here in one call: each
+-- campaign day is locked once per batch and granted LEAST(requested,
+-- remaining) rooms, so the ledger can still never be overbooked.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.accept_offseason_deals(deal_uuids UUID[], stay_days DATE[])
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    grp RECORD;
+    flexible RECORD;
+    remaining_before INTEGER;
+    taken UUID[];
+    outcomes JSONB := '{}'::jsonb;
+BEGIN
+    -- One group per campaign day, locked in a fixed order so concurrent
+    -- batches cannot deadlock on each other
+    FOR grp IN
+        SELECT dc.campaign_id,
+               COALESCE(r.stay_day, (dc.metadata->>'stay_date')::date) AS day,
+               array_agg(r.deal_id ORDER BY r.ord) AS deals
+        FROM (
+            SELECT DISTINCT ON (u.deal_id) u.deal_id, u.stay_day, u.ord
+            FROM unnest(deal_uuids, stay_days) WITH ORDINALITY AS u(deal_id, stay_day, ord)
+            ORDER BY u.deal_id, u.ord
+        ) r
+        JOIN public.deal_candidates dc ON dc.id = r.deal_id
+        WHERE dc.status IN ('pending', 'presented')
+          AND dc.expires_at > NOW()
+          AND COALESCE(r.stay_day, (dc.metadata->>'stay_date')::date) IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    LOOP
+        SELECT l.capacity - l.allocated INTO remaining_before
+        FROM public.offseason_campaign_ledger l
+        WHERE l.campaign_id = grp.campaign_id AND l.day = grp.day
+        FOR UPDATE;
+
+        remaining_before := GREATEST(COALESCE(remaining_before, 0), 0);
+
+        -- First come, first served within the batch
+        SELECT COALESCE(array_agg(t.id ORDER BY t.ord), '{}') INTO taken
+        FROM (
+            SELECT dc.id, u.ord
+            FROM public.deal_candidates dc
+            JOIN unnest(grp.deals) WITH ORDINALITY AS u(deal_id, ord) ON dc.id = u.deal_id
+            WHERE dc.status IN ('pending', 'presented')
+              AND dc.expires_at > NOW()
+            ORDER BY u.ord
+            LIMIT remaining_before
+            FOR UPDATE OF dc
+        ) t;
+
+        IF cardinality(taken) > 0 THEN
+            UPDATE public.offseason_campaign_ledger l
+            SET allocated = l.allocated + cardinality(taken),
+                revenue = l.revenue + (SELECT COALESCE(SUM(price), 0) FROM public.deal_candidates WHERE id = ANY(taken)),
+                updated_at = NOW()
+            WHERE l.campaign_id = grp.campaign_id AND l.day = grp.day;
+
+            UPDATE public.deal_candidates
+            SET status = 'accepted',
+                metadata = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object('stay_date', grp.day)
+            WHERE id = ANY(taken);
+
+            UPDATE public.offseason_campaigns
+            SET current_allocation = current_allocation + cardinality(taken)
+            WHERE id = grp.campaign_id;
+        END IF;
+
+        SELECT outcomes || COALESCE(jsonb_object_agg(
+            d::text,
+            CASE WHEN d = ANY(taken) THEN
+                jsonb_build_object('accepted', true, 'campaign_id', grp.campaign_id, 'stay_date', grp.day,
+                                   'remaining', remaining_before - cardinality(taken))
+            ELSE
+                jsonb_build_object('accepted', false, 'campaign_id', grp.campaign_id,
+                                   'reason', CASE WHEN cardinality(taken) = remaining_before THEN 'sold_out'
+                                                  ELSE 'not_available' END)
+            END
+        ), '{}'::jsonb) INTO outcomes
+        FROM unnest(grp.deals) AS d;
+    END LOOP;
+
+    -- Flexible deals without a stay date take the first open day one by one
+    FOR flexible IN
+        SELECT DISTINCT u.deal_id
+        FROM unnest(deal_uuids, stay_days) AS u(deal_id, stay_day)
+        JOIN public.deal_candidates dc ON dc.id = u.deal_id
+        WHERE u.stay_day IS NULL
+          AND dc.metadata->>'stay_date' IS NULL
+          AND NOT outcomes ? u.deal_id::text
+    LOOP
+        outcomes := outcomes || jsonb_build_object(
+            flexible.deal_id::text, public.accept_offseason_deal(flexible.deal_id, NULL)
+        );
+    END LOOP;
+
+    RETURN (
+        SELECT COALESCE(jsonb_agg(
+            COALESCE(
+                outcomes -> u.deal_id::text,
+                jsonb_build_object('accepted', false,
+                                   'reason', CASE WHEN dc.id IS NULL THEN 'not_found' ELSE 'not_available' END)
+            ) || jsonb_build_object('deal_id', u.deal_id)
+            ORDER BY u.ord
+        ), '[]'::jsonb)
+        FROM unnest(deal_uuids) WITH ORDINALITY AS u(deal_id, ord)
+        LEFT JOIN public.deal_candidates dc ON dc.id = u.deal_id
+    );
+END;
+$$;
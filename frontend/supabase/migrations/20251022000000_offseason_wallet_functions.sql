@@ -0,0 +1,213 @@
+-- ============================================================================
+-- MAKU.TRAVEL OFF-SEASON OCCUPANCY ENGINE
+-- Atomic LAXMI wallet operations
+-- ============================================================================
+-- Each wallet operation used to be a lookup, a transaction insert and a
+-- balance update sent as separate requests. These functions do the whole
+-- operation in one call and one transaction. The balance change is a single
+-- conditional UPDATE, so concurrent deposits and redemptions cannot lose
+-- updates or overdraw a wallet.
+-- ============================================================================
+
+-- ============================================================================
+-- PART 1: ACTIVATE
+-- ============================================================================
+CREATE OR REPLACE FUNCTION public.wallet_activate(owner UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    wallet RECORD;
+    created BOOLEAN;
+BEGIN
+    INSERT INTO public.wallet_accounts (owner_id, balance, tier, status)
+    VALUES (owner, 0.00, 'bronze', 'active')
+    ON CONFLICT (owner_id) DO NOTHING;
+    created := FOUND;
+
+    SELECT id, balance, tier, status INTO wallet
+    FROM public.wallet_accounts
+    WHERE owner_id = owner;
+
+    RETURN jsonb_build_object(
+        'wallet_id', wallet.id,
+        'balance', wallet.balance,
+        'tier', wallet.tier,
+        'status', wallet.status,
+        'created', created
+    );
+END;
+$$;
+
+-- ============================================================================
+-- PART 2: DEPOSIT
+-- ============================================================================
+CREATE OR REPLACE FUNCTION public.wallet_deposit(
+    owner UUID,
+    amount NUMERIC,
+    txn_type TEXT DEFAULT 'cashback',
+    booking UUID DEFAULT NULL,
+    txn_description TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    wallet RECORD;
+    txn_id UUID;
+BEGIN
+    IF amount IS NULL OR amount <= 0 OR txn_type NOT IN ('credit', 'cashback', 'refund', 'transfer') THEN
+        RETURN jsonb_build_object('success', false, 'reason', 'invalid_deposit');
+    END IF;
+
+    UPDATE public.wallet_accounts
+    SET balance = balance + amount, updated_at = NOW()
+    WHERE owner_id = owner
+    RETURNING id, balance - amount AS balance_before, balance AS balance_after INTO wallet;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'reason', 'wallet_not_found');
+    END IF;
+
+    INSERT INTO public.wallet_txns (wallet_id, type, amount, balance_before, balance_after, booking_id, description)
+    VALUES (wallet.id, txn_type, amount, wallet.balance_before, wallet.balance_after, booking,
+            COALESCE(txn_description, initcap(txn_type) || ' deposit'))
+    RETURNING id INTO txn_id;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'wallet_id', wallet.id,
+        'transaction_id', txn_id,
+        'new_balance', wallet.balance_after
+    );
+END;
+$$;
+
+-- ============================================================================
+-- PART 3: REDEEM
+-- ============================================================================
+CREATE OR REPLACE FUNCTION public.wallet_redeem(owner UUID, amount NUMERIC, booking UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    wallet RECORD;
+    available NUMERIC;
+    txn_id UUID;
+BEGIN
+    IF amount IS NULL OR amount <= 0 THEN
+        RETURN jsonb_build_object('success', false, 'reason', 'invalid_amount');
+    END IF;
+
+    -- Only succeeds while the balance covers the amount
+    UPDATE public.wallet_accounts
+    SET balance = balance - amount, updated_at = NOW()
+    WHERE owner_id = owner AND balance >= amount
+    RETURNING id, balance + amount AS balance_before, balance AS balance_after INTO wallet;
+
+    IF NOT FOUND THEN
+        SELECT balance INTO available FROM public.wallet_accounts WHERE owner_id = owner;
+        IF NOT FOUND THEN
+            RETURN jsonb_build_object('success', false, 'reason', 'wallet_not_found');
+        END IF;
+        RETURN jsonb_build_object('success', false, 'reason', 'insufficient_balance', 'available', available);
+    END IF;
+
+    INSERT INTO public.wallet_txns (wallet_id, type, amount, balance_before, balance_after, booking_id, description)
+    VALUES (wallet.id, 'debit', -amount, wallet.balance_before, wallet.balance_after, booking,
+            'Redemption for booking ' || booking)
+    RETURNING id INTO txn_id;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'wallet_id', wallet.id,
+        'transaction_id', txn_id,
+        'new_balance', wallet.balance_after
+    );
+END;
+$$;
+
+-- ============================================================================
+-- PART 4: BULK DEPOSIT
+-- ============================================================================
+-- items: [{"user_id", "amount", "type", "booking_id", "description"}, ...]
+-- Credits every wallet with one UPDATE and writes every transaction with one
+-- INSERT. Several items for the same wallet are applied in item order.
+-- Items with a malformed user_id, amount, type or booking_id fail as
+-- invalid_deposit.
+-- Returns one result per item, in order.
+CREATE OR REPLACE FUNCTION public.wallet_bulk_deposit(items JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    uuid_pattern CONSTANT TEXT := '^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$';
+    results JSONB;
+BEGIN
+    WITH req AS (
+        SELECT
+            t.ord,
+            t.item->>'user_id' AS user_id,
+            CASE WHEN t.item->>'user_id' ~ uuid_pattern THEN (t.item->>'user_id')::uuid END AS owner_id,
+            CASE WHEN jsonb_typeof(t.item->'amount') = 'number' THEN (t.item->>'amount')::numeric(12, 2) END AS amount,
+            COALESCE(t.item->>'type', 'cashback') AS type,
+            CASE WHEN t.item->>'booking_id' ~ uuid_pattern THEN (t.item->>'booking_id')::uuid END AS booking_id,
+            -- A booking_id that is present but not a UUID fails the item
+            t.item->>'booking_id' IS NULL OR t.item->>'booking_id' ~ uuid_pattern AS booking_ok,
+            t.item->>'description' AS description
+        FROM jsonb_array_elements(items) WITH ORDINALITY AS t(item, ord)
+    ),
+    valid AS (
+        SELECT * FROM req
+        WHERE owner_id IS NOT NULL
+          AND amount > 0
+          AND booking_ok
+          AND type IN ('credit', 'cashback', 'refund', 'transfer')
+    ),
+    totals AS (
+        SELECT owner_id, SUM(amount) AS total FROM valid GROUP BY owner_id
+    ),
+    credited AS (
+        UPDATE public.wallet_accounts w
+        SET balance = w.balance + t.total, updated_at = NOW()
+        FROM totals t
+        WHERE w.owner_id = t.owner_id
+        RETURNING w.id AS wallet_id, w.owner_id, w.balance - t.total AS opening_balance
+    ),
+    entries AS (
+        SELECT v.*, c.wallet_id,
+               c.opening_balance + SUM(v.amount) OVER (PARTITION BY v.owner_id ORDER BY v.ord) - v.amount
+                   AS balance_before
+        FROM valid v
+        JOIN credited c ON c.owner_id = v.owner_id
+    ),
+    inserted AS (
+        INSERT INTO public.wallet_txns (wallet_id, type, amount, balance_before, balance_after, booking_id, description, meta)
+        SELECT wallet_id, type, amount, balance_before, balance_before + amount, booking_id,
+               COALESCE(description, initcap(type) || ' deposit'), jsonb_build_object('bulk_item', ord)
+        FROM entries
+        RETURNING id, (meta->>'bulk_item')::bigint AS ord, balance_after
+    )
+    SELECT COALESCE(jsonb_agg(
+        CASE
+            WHEN i.id IS NOT NULL THEN jsonb_build_object(
+                'index', r.ord - 1, 'user_id', r.user_id, 'success', true,
+                'transaction_id', i.id, 'new_balance', i.balance_after)
+            WHEN v.ord IS NULL THEN jsonb_build_object(
+                'index', r.ord - 1, 'user_id', r.user_id, 'success', false, 'reason', 'invalid_deposit')
+            ELSE jsonb_build_object(
+                'index', r.ord - 1, 'user_id', r.user_id, 'success', false, 'reason', 'wallet_not_found')
+        END
+        ORDER BY r.ord
+    ), '[]'::jsonb) INTO results
+    FROM req r
+    LEFT JOIN valid v ON v.ord = r.ord
+    LEFT JOIN inserted i ON i.ord = r.ord;
+
+    RETURN results;
+END;
+$$;
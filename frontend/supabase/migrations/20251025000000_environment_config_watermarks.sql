@@ -0,0 +1,25 @@
+-- Incremental refresh support for environment and environment_configs
+-- The backend config cache fetches only rows whose updated_at moved past its
+-- last watermark, so updated_at must change on every update and be indexed.
+
+-- environment already has an updated_at trigger; environment_configs did not
+CREATE OR REPLACE FUNCTION update_environment_configs_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS environment_configs_updated_at_trigger ON public.environment_configs;
+CREATE TRIGGER environment_configs_updated_at_trigger
+  BEFORE UPDATE ON public.environment_configs
+  FOR EACH ROW
+  EXECUTE FUNCTION update_environment_configs_updated_at();
+
+-- Watermark lookups: WHERE environment = $1 AND updated_at >= $2
+CREATE INDEX IF NOT EXISTS idx_environment_env_updated_at
+  ON public.environment(environment, updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_environment_configs_env_updated_at
+  ON public.environment_configs(environment, updated_at);
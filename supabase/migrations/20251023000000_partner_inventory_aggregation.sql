@@ -0,0 +1,65 @@
+-- Partner Inventory Aggregation
+-- Server-side inventory summaries and date-range indexing
+
+-- Covering index for per-partner date-range scans. The trailing id makes
+-- (date, id) a unique keyset for cursor paging; the INCLUDE columns let the
+-- summary function run as an index-only scan.
+CREATE INDEX IF NOT EXISTS idx_partner_inventory_partner_date_covering
+  ON partner_inventory(partner_id, date, id)
+  INCLUDE (room_type, available_rooms, base_price, is_blackout);
+
+-- Superseded by the covering index above
+DROP INDEX IF EXISTS idx_partner_inventory_date;
+
+-- Inventory summary for one partner over an optional date range.
+-- Always returns one overall row (bucket_start IS NULL). With p_bucket set
+-- to 'day', 'week' or 'month' it also returns one row per bucket, ordered
+-- by bucket_start.
+CREATE OR REPLACE FUNCTION partner_inventory_summary(
+  p_partner_id UUID,
+  p_start DATE DEFAULT NULL,
+  p_end DATE DEFAULT NULL,
+  p_room_type TEXT DEFAULT NULL,
+  p_min_available INTEGER DEFAULT NULL,
+  p_bucket TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+  bucket_start DATE,
+  row_count BIGINT,
+  total_available_rooms BIGINT,
+  average_price NUMERIC,
+  min_price NUMERIC,
+  max_price NUMERIC,
+  blackout_days BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    b.bucket AS bucket_start,
+    COUNT(*) AS row_count,
+    COALESCE(SUM(b.available_rooms), 0) AS total_available_rooms,
+    ROUND(COALESCE(AVG(b.base_price), 0), 2) AS average_price,
+    MIN(b.base_price) AS min_price,
+    MAX(b.base_price) AS max_price,
+    COUNT(*) FILTER (WHERE b.is_blackout) AS blackout_days
+  FROM (
+    SELECT
+      CASE WHEN p_bucket IN ('day', 'week', 'month')
+           THEN date_trunc(p_bucket, i.date)::DATE END AS bucket,
+      i.available_rooms,
+      i.base_price,
+      i.is_blackout
+    FROM partner_inventory i
+    WHERE i.partner_id = p_partner_id
+      AND (p_start IS NULL OR i.date >= p_start)
+      AND (p_end IS NULL OR i.date <= p_end)
+      AND (p_room_type IS NULL OR i.room_type = p_room_type)
+      AND (p_min_available IS NULL OR i.available_rooms >= p_min_available)
+  ) b
+  GROUP BY GROUPING SETS ((), (b.bucket))
+  HAVING GROUPING(b.bucket) = 1 OR p_bucket IN ('day', 'week', 'month')
+  ORDER BY GROUPING(b.bucket) DESC, b.bucket;
+$$;
+
+COMMENT ON FUNCTION partner_inventory_summary IS 'Per-partner inventory totals, optionally bucketed by day/week/month';
@@ -0,0 +1,20 @@
+-- Marketplace Keyset Indexes
+-- Sort-key indexes backing cursor pagination on list endpoints
+
+-- Each list endpoint pages by (sort column, id); these indexes let PostgreSQL
+-- seek straight to the cursor position instead of scanning past earlier rows.
+
+-- GET /api/partners/registry (newest first)
+CREATE INDEX IF NOT EXISTS idx_partner_registry_created_keyset
+  ON partner_registry(created_at DESC, id DESC);
+
+-- GET /api/partners/{partner_id}/bids (newest first per partner)
+CREATE INDEX IF NOT EXISTS idx_partner_bids_partner_submitted_keyset
+  ON partner_bids(partner_id, submitted_at DESC, id DESC);
+
+-- GET /api/admin/providers/rotation/logs (newest first, optional service type)
+CREATE INDEX IF NOT EXISTS idx_provider_rotation_logs_created_keyset
+  ON provider_rotation_logs(created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_provider_rotation_logs_service_created_keyset
+  ON provider_rotation_logs(service_type, created_at DESC, id DESC);
@@ -0,0 +1,293 @@
+-- Provider Log Partitioning
+-- Monthly partitions, hourly rollups and retention for provider logs
+
+-- provider_health_logs gets a row per provider every 5 minutes and
+-- provider_rotation_logs a row per search attempt, with no retention. Both are
+-- rebuilt as monthly range-partitioned tables so time-bounded queries only
+-- touch the months they ask for, and expired months are dropped whole.
+-- compact_provider_logs() keeps raw rows for p_raw_days and folds anything
+-- older into hourly rollups before removing it. The backend runs it daily
+-- (provider_health_scheduler), which also creates partitions ahead of time.
+
+-- Move the unpartitioned tables (and their index names) out of the way
+ALTER TABLE provider_health_logs RENAME TO provider_health_logs_unpartitioned;
+ALTER TABLE provider_rotation_logs RENAME TO provider_rotation_logs_unpartitioned;
+ALTER INDEX IF EXISTS idx_provider_health_logs_provider
+  RENAME TO idx_provider_health_logs_unpartitioned_provider;
+ALTER INDEX IF EXISTS idx_provider_rotation_logs_created_keyset
+  RENAME TO idx_provider_rotation_logs_unpartitioned_created;
+ALTER INDEX IF EXISTS idx_provider_rotation_logs_service_created_keyset
+  RENAME TO idx_provider_rotation_logs_unpartitioned_service;
+
+-- The partition key has to be part of the primary key, so it is NOT NULL
+CREATE TABLE provider_health_logs (
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
+  provider_id UUID REFERENCES provider_registry(id) ON DELETE CASCADE,
+  check_time TIMESTAMP NOT NULL DEFAULT NOW(),
+  status VARCHAR(50), -- 'healthy', 'degraded', 'down'
+  response_time_ms INTEGER,
+  error_message TEXT,
+  endpoint_tested VARCHAR(500),
+  metadata JSONB,
+  PRIMARY KEY (id, check_time)
+) PARTITION BY RANGE (check_time);
+
+CREATE TABLE provider_rotation_logs (
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
+  correlation_id UUID NOT NULL,
+  service_type VARCHAR(50) NOT NULL, -- 'hotel', 'flight', 'activity'
+  provider_id UUID REFERENCES provider_registry(id),
+  attempt_order INTEGER,
+  success BOOLEAN,
+  response_time_ms INTEGER,
+  error_message TEXT,
+  created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  search_criteria JSONB,
+  result_count INTEGER,
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catch-all partitions so an insert never fails if the daily job has not
+-- created a month yet. They stay empty while the job is running.
+CREATE TABLE provider_health_logs_default PARTITION OF provider_health_logs DEFAULT;
+CREATE TABLE provider_rotation_logs_default PARTITION OF provider_rotation_logs DEFAULT;
+
+-- Create monthly partitions from p_from's month through p_months_ahead
+-- months past the current one. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_provider_log_partitions(
+  p_from DATE DEFAULT NULL,
+  p_months_ahead INTEGER DEFAULT 3
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_table TEXT;
+  v_key TEXT;
+  v_default TEXT;
+  v_name TEXT;
+  v_month DATE;
+  v_next DATE;
+  v_moved BIGINT;
+  v_last DATE := (date_trunc('month', NOW()) + make_interval(months => p_months_ahead))::DATE;
+  v_created INTEGER := 0;
+BEGIN
+  FOREACH v_table IN ARRAY ARRAY['provider_health_logs', 'provider_rotation_logs'] LOOP
+    v_key := CASE v_table WHEN 'provider_health_logs' THEN 'check_time' ELSE 'created_at' END;
+    v_default := v_table || '_default';
+    v_month := date_trunc('month', COALESCE(p_from, NOW()::DATE))::DATE;
+    WHILE v_month <= v_last LOOP
+      v_name := v_table || '_' || to_char(v_month, 'YYYYMM');
+      v_next := (v_month + INTERVAL '1 month')::DATE;
+      IF to_regclass(v_name) IS NULL THEN
+        -- A missed run leaves that month's rows in the DEFAULT partition, and
+        -- the partition cannot be created while DEFAULT holds rows in its
+        -- range. Block writers to DEFAULT, move those rows out, create the
+        -- partition and route them back into it.
+        EXECUTE format('LOCK TABLE %I IN SHARE ROW EXCLUSIVE MODE', v_default);
+        EXECUTE format('CREATE TEMP TABLE provider_log_partition_staging (LIKE %I) ON COMMIT DROP', v_default);
+        EXECUTE format(
+          'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+          'INSERT INTO provider_log_partition_staging SELECT * FROM moved',
+          v_default, v_key, v_month, v_key, v_next
+        );
+        GET DIAGNOSTICS v_moved = ROW_COUNT;
+        EXECUTE format(
+          'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+          v_name, v_table, v_month, v_next
+        );
+        IF v_moved > 0 THEN
+          EXECUTE format('INSERT INTO %I SELECT * FROM provider_log_partition_staging', v_table);
+          RAISE NOTICE 'Moved % rows of % from % into %', v_moved, v_table, v_default, v_name;
+        END IF;
+        DROP TABLE provider_log_partition_staging;
+        v_created := v_created + 1;
+      END IF;
+      v_month := (v_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+  END LOOP;
+  RETURN v_created;
+END;
+$$;
+
+-- Partitions for every month that already has data, plus the next three
+SELECT ensure_provider_log_partitions(
+  LEAST(
+    (SELECT MIN(check_time)::DATE FROM provider_health_logs_unpartitioned),
+    (SELECT MIN(created_at)::DATE FROM provider_rotation_logs_unpartitioned),
+    NOW()::DATE
+  )
+);
+
+INSERT INTO provider_health_logs
+  (id, provider_id, check_time, status, response_time_ms, error_message, endpoint_tested, metadata)
+SELECT id, provider_id, COALESCE(check_time, NOW()), status, response_time_ms, error_message, endpoint_tested, metadata
+FROM provider_health_logs_unpartitioned;
+
+INSERT INTO provider_rotation_logs
+  (id, correlation_id, service_type, provider_id, attempt_order, success, response_time_ms,
+   error_message, created_at, search_criteria, result_count)
+SELECT id, correlation_id, service_type, provider_id, attempt_order, success, response_time_ms,
+       error_message, COALESCE(created_at, NOW()), search_criteria, result_count
+FROM provider_rotation_logs_unpartitioned;
+
+DROP TABLE provider_health_logs_unpartitioned;
+DROP TABLE provider_rotation_logs_unpartitioned;
+
+-- Indexes on the parent are created on every partition
+CREATE INDEX idx_provider_health_logs_provider
+  ON provider_health_logs(provider_id, check_time DESC);
+
+CREATE INDEX idx_provider_rotation_logs_created_keyset
+  ON provider_rotation_logs(created_at DESC, id DESC);
+
+CREATE INDEX idx_provider_rotation_logs_service_created_keyset
+  ON provider_rotation_logs(service_type, created_at DESC, id DESC);
+
+-- Hourly rollups of health checks older than the raw retention window
+CREATE TABLE IF NOT EXISTS provider_health_rollups (
+  provider_id UUID NOT NULL REFERENCES provider_registry(id) ON DELETE CASCADE,
+  bucket_start TIMESTAMP NOT NULL,
+  total_checks INTEGER NOT NULL DEFAULT 0,
+  healthy_checks INTEGER NOT NULL DEFAULT 0,
+  degraded_checks INTEGER NOT NULL DEFAULT 0,
+  down_checks INTEGER NOT NULL DEFAULT 0,
+  total_response_time_ms BIGINT NOT NULL DEFAULT 0,
+  max_response_time_ms INTEGER,
+  PRIMARY KEY (provider_id, bucket_start)
+);
+
+-- Hourly rollups of rotation attempts older than the raw retention window
+CREATE TABLE IF NOT EXISTS provider_rotation_rollups (
+  provider_id UUID NOT NULL REFERENCES provider_registry(id) ON DELETE CASCADE,
+  service_type VARCHAR(50) NOT NULL,
+  bucket_start TIMESTAMP NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  successes INTEGER NOT NULL DEFAULT 0,
+  total_response_time_ms BIGINT NOT NULL DEFAULT 0,
+  total_results BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (provider_id, service_type, bucket_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_provider_rotation_rollups_bucket
+  ON provider_rotation_rollups(bucket_start, service_type);
+
+-- Roll up and remove raw log rows older than p_raw_days (cut at an hour
+-- boundary so a bucket is never split across runs), drop partitions that
+-- lie entirely before the cutoff and create the coming months' partitions.
+-- Rows without a provider_id are removed without a rollup.
+CREATE OR REPLACE FUNCTION compact_provider_logs(p_raw_days INTEGER DEFAULT 30)
+RETURNS TABLE (
+  log_table TEXT,
+  rollup_buckets BIGINT,
+  dropped_partitions INTEGER,
+  deleted_rows BIGINT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_cutoff TIMESTAMP := date_trunc('hour', NOW()::TIMESTAMP - make_interval(days => p_raw_days));
+  v_column TEXT;
+  v_partition TEXT;
+  v_buckets BIGINT;
+  v_dropped INTEGER;
+  v_deleted BIGINT;
+BEGIN
+  PERFORM ensure_provider_log_partitions();
+
+  FOREACH log_table IN ARRAY ARRAY['provider_health_logs', 'provider_rotation_logs'] LOOP
+    IF log_table = 'provider_health_logs' THEN
+      v_column := 'check_time';
+      INSERT INTO provider_health_rollups AS r
+        (provider_id, bucket_start, total_checks, healthy_checks, degraded_checks, down_checks,
+         total_response_time_ms, max_response_time_ms)
+      SELECT
+        provider_id,
+        date_trunc('hour', check_time),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE status = 'healthy'),
+        COUNT(*) FILTER (WHERE status = 'degraded'),
+        COUNT(*) FILTER (WHERE status = 'down'),
+        COALESCE(SUM(response_time_ms), 0),
+        MAX(response_time_ms)
+      FROM provider_health_logs
+      WHERE check_time < v_cutoff AND provider_id IS NOT NULL
+      GROUP BY provider_id, date_trunc('hour', check_time)
+      ON CONFLICT (provider_id, bucket_start) DO UPDATE SET
+        total_checks = r.total_checks + EXCLUDED.total_checks,
+        healthy_checks = r.healthy_checks + EXCLUDED.healthy_checks,
+        degraded_checks = r.degraded_checks + EXCLUDED.degraded_checks,
+        down_checks = r.down_checks + EXCLUDED.down_checks,
+        total_response_time_ms = r.total_response_time_ms + EXCLUDED.total_response_time_ms,
+        max_response_time_ms = GREATEST(r.max_response_time_ms, EXCLUDED.max_response_time_ms);
+    ELSE
+      v_column := 'created_at';
+      INSERT INTO provider_rotation_rollups AS r
+        (provider_id, service_type, bucket_start, attempts, successes, total_response_time_ms, total_results)
+      SELECT
+        provider_id,
+        service_type,
+        date_trunc('hour', created_at),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE success),
+        COALESCE(SUM(response_time_ms), 0),
+        COALESCE(SUM(result_count), 0)
+      FROM provider_rotation_logs
+      WHERE created_at < v_cutoff AND provider_id IS NOT NULL
+      GROUP BY provider_id, service_type, date_trunc('hour', created_at)
+      ON CONFLICT (provider_id, service_type, bucket_start) DO UPDATE SET
+        attempts = r.attempts + EXCLUDED.attempts,
+        successes = r.successes + EXCLUDED.successes,
+        total_response_time_ms = r.total_response_time_ms + EXCLUDED.total_response_time_ms,
+        total_results = r.total_results + EXCLUDED.total_results;
+    END IF;
+    GET DIAGNOSTICS v_buckets = ROW_COUNT;
+
+    -- Whole months before the cutoff are dropped rather than deleted row by row
+    v_dropped := 0;
+    FOR v_partition IN
+      SELECT c.relname
+      FROM pg_inherits i
+      JOIN pg_class c ON c.oid = i.inhrelid
+      WHERE i.inhparent = log_table::regclass
+        AND c.relname ~ ('^' || log_table || '_[0-9]{6}$')
+        AND to_date(right(c.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= v_cutoff
+    LOOP
+      EXECUTE format('DROP TABLE %I', v_partition);
+      v_dropped := v_dropped + 1;
+    END LOOP;
+
+    -- The rest of the expired rows sit in the month containing the cutoff
+    -- (or the default partition)
+    EXECUTE format('DELETE FROM %I WHERE %I < $1', log_table, v_column) USING v_cutoff;
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    rollup_buckets := v_buckets;
+    dropped_partitions := v_dropped;
+    deleted_rows := v_deleted;
+    RETURN NEXT;
+  END LOOP;
+END;
+$$;
+
+-- Row Level Security (policies from scripts/enable_rls_policies.py apply to
+-- the parent tables and were dropped with the old ones)
+ALTER TABLE provider_health_logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE provider_rotation_logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE provider_health_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE provider_rotation_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Admin read provider_health_logs" ON provider_health_logs
+  FOR SELECT USING (auth.jwt() ->> 'role' = 'admin' OR auth.jwt() ->> 'role' = 'service_role');
+CREATE POLICY "Service role write provider_health_logs" ON provider_health_logs
+  FOR INSERT WITH CHECK (auth.jwt() ->> 'role' = 'service_role');
+
+CREATE POLICY "Admin read provider_rotation_logs" ON provider_rotation_logs
+  FOR SELECT USING (auth.jwt() ->> 'role' = 'admin' OR auth.jwt() ->> 'role' = 'service_role');
+CREATE POLICY "Service role write provider_rotation_logs" ON provider_rotation_logs
+  FOR INSERT WITH CHECK (auth.jwt() ->> 'role' = 'service_role');
+
+CREATE POLICY "Admin read provider_health_rollups" ON provider_health_rollups
+  FOR SELECT USING (auth.jwt() ->> 'role' = 'admin' OR auth.jwt() ->> 'role' = 'service_role');
+CREATE POLICY "Admin read provider_rotation_rollups" ON provider_rotation_rollups
+  FOR SELECT USING (auth.jwt() ->> 'role' = 'admin' OR auth.jwt() ->> 'role' = 'service_role');